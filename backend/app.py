@@ -1,19 +1,37 @@
 from __future__ import annotations
 
-from typing import List, Tuple, Dict, Any
+import math
+from typing import List, Tuple, Dict, Any, Optional
 
+import numpy as np
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from shapely.geometry import mapping
 
-from urban_resilience.config import DEFAULT_CITIES, SCENARIOS
-from urban_resilience.graph_loader import load_city_graph
+from urban_resilience.config import (
+    ALL_SCENARIOS,
+    API_MAX_ORIGINS,
+    API_MAX_SEQUENTIAL_PAIRS,
+    API_OD_PANEL_PAIRS,
+    BETWEENNESS_TOLERANCES,
+    DEFAULT_CITIES,
+    MAX_ADAPTIVE_ATTACK_ROUNDS,
+    OD_PANEL_SEED,
+    REPLICATE_WORKERS,
+)
+from urban_resilience.graph_loader import graph_cache_stats, load_compiled_city_graph
+from urban_resilience.compiled_graph import CompiledGraph
+from urban_resilience.artifacts import artifact_stats, get_artifact
 from urban_resilience.edge_selection import (
+    get_adaptive_betweenness_ranking,
     select_edges_for_scenario,
     graph_to_edges_gdf,
 )
-from urban_resilience.simulation import simulate_single_shock
+from urban_resilience.simulation import mean_ci, simulate_single_shock
+from urban_resilience.experiments import run_scenario_replicates
+from urban_resilience.od_panel import ODPanel, get_od_panel
+from urban_resilience.percolation import sample_curve, scenario_robustness_curve
 from urban_resilience import ml_routes
 
 
@@ -44,7 +62,37 @@ class SimRequest(BaseModel):
     city: str
     scenario: str
     severity: float          # 0–1 fraction of edges to remove (after mapping from slider)
-    n_pairs: int = 20        # number of OD pairs to probe
+    n_pairs: int = Field(20, ge=1, le=API_OD_PANEL_PAIRS)  # OD pairs to probe
+    # Batched OD mode (runs == 1): origins sharing searches.
+    n_origins: Optional[int] = Field(None, ge=1, le=API_MAX_ORIGINS)
+    runs: int = Field(1, ge=1, le=20)  # replicates (> 1 adds 95% CIs)
+    # Sequential OD sampling (runs == 1): add batches of n_pairs until the
+    # 95% CI half-widths reach these targets or a budget runs out.
+    target_ratio_ci: Optional[float] = Field(None, gt=0)         # avg_ratio half-width
+    target_disconnected_ci: Optional[float] = Field(None, gt=0)  # pct_disconnected, points
+    max_pairs: int = Field(2000, ge=1, le=API_MAX_SEQUENTIAL_PAIRS)
+    time_budget_s: Optional[float] = Field(None, gt=0)
+    # Targeted Attack: sample betweenness sources until the top shares of
+    # edges are right within this expected error (not fixed k); rounded
+    # down to one of config.BETWEENNESS_TOLERANCES.
+    betweenness_tolerance: Optional[float] = Field(
+        None, ge=min(BETWEENNESS_TOLERANCES), le=max(BETWEENNESS_TOLERANCES)
+    )
+    # Adaptive Targeted Attack: betweenness recalculations (default 10).
+    attack_rounds: Optional[int] = Field(None, ge=1, le=MAX_ADAPTIVE_ATTACK_ROUNDS)
+
+    @model_validator(mode="after")
+    def _replicates_fit_panel(self) -> "SimRequest":
+        # Replicates slice the API OD panel (see `_simulate_replicates`), so
+        # batched OD sampling does not apply to them.
+        if self.runs > 1 and self.n_pairs * self.runs > API_OD_PANEL_PAIRS:
+            raise ValueError(
+                f"runs * n_pairs must be at most {API_OD_PANEL_PAIRS} "
+                f"(got {self.runs} * {self.n_pairs})."
+            )
+        if self.runs > 1 and self.n_origins is not None:
+            raise ValueError("n_origins applies to single runs only (runs == 1).")
+        return self
 
 
 class SimResponse(BaseModel):
@@ -58,6 +106,29 @@ class SimResponse(BaseModel):
     n_pairs: int
     edges_geojson: Dict[str, Any]
     removed_edges_geojson: Dict[str, Any]
+    runs: int = 1
+    avg_ratio_ci: Optional[List[float]] = None         # [low, high] 95% CI
+    pct_disconnected_ci: Optional[List[float]] = None  # [low, high] 95% CI
+    stop_reason: Optional[str] = None  # sequential mode only
+    betweenness_sources: Optional[int] = None   # adaptive ranking only
+    betweenness_error: Optional[float] = None   # expected misplaced share
+
+
+class CurveRequest(BaseModel):
+    city: str
+    scenario: str
+    # OD pairs for the connectivity curve (leading rows of the API panel)
+    n_pairs: int = Field(1000, ge=1, le=API_OD_PANEL_PAIRS)
+    n_points: int = Field(101, ge=2, le=1001)  # removal fractions returned (0 → 1)
+
+
+class CurveResponse(BaseModel):
+    city: str
+    scenario: str
+    fraction_removed: List[float]
+    n_removed_edges: List[int]
+    giant_component_fraction: List[float]
+    pct_disconnected: List[float]
 
 
 # ---------- Helper for GeoJSON building ----------
@@ -77,12 +148,36 @@ def build_edges_geojson(
         - bridge (bool)
         - tunnel (bool)
         - highway (string or None)
+
+    The full feature list is built once per graph and shared through the
+    artifact registry; only the removed subset is assembled per request.
+    """
+    features, index = get_artifact(
+        city_graph, "edges_geojson", lambda: _edge_features(city_graph)
+    )
+    removed_keys = {(int(u), int(v), int(k)) for (u, v, k) in removed_edges}
+    removed_features = [
+        features[i] for i in sorted({index[k] for k in removed_keys if k in index})
+    ]
+
+    edges_geojson = {"type": "FeatureCollection", "features": features}
+    removed_geojson = {"type": "FeatureCollection", "features": removed_features}
+    return edges_geojson, removed_geojson
+
+
+def _edge_features(
+    city_graph,
+) -> tuple[List[Dict[str, Any]], Dict[EdgeId, int]]:
     """
+    GeoJSON features of every edge, and (u, v, key) -> feature position.
+    """
+    if isinstance(city_graph, CompiledGraph):
+        return _compiled_edge_features(city_graph)
+
     gdf_edges = graph_to_edges_gdf(city_graph)
-    removed_set = {(int(u), int(v), int(k)) for (u, v, k) in removed_edges}
 
     all_features: List[Dict[str, Any]] = []
-    removed_features: List[Dict[str, Any]] = []
+    index: Dict[EdgeId, int] = {}
 
     for _, row in gdf_edges.iterrows():
         geom = row.get("geometry")
@@ -107,14 +202,55 @@ def build_edges_geojson(
             "geometry": mapping(geom),
             "properties": props,
         }
+        index.setdefault((u, v, k), len(all_features))
         all_features.append(feature)
 
-        if (u, v, k) in removed_set:
-            removed_features.append(feature)
+    return all_features, index
 
-    edges_geojson = {"type": "FeatureCollection", "features": all_features}
-    removed_geojson = {"type": "FeatureCollection", "features": removed_features}
-    return edges_geojson, removed_geojson
+
+def _compiled_edge_features(
+    cg: CompiledGraph,
+) -> tuple[List[Dict[str, Any]], Dict[EdgeId, int]]:
+    """
+    Same as `_edge_features`, reading geometry and tags straight from the
+    compiled arrays instead of a GeoDataFrame.
+    """
+    u_ids = cg.node_ids[cg.edge_sources].tolist()
+    v_ids = cg.node_ids[cg.targets].tolist()
+    keys = cg.keys.tolist()
+    bridges = cg.is_bridge.tolist()
+    tunnels = cg.is_tunnel.tolist()
+
+    all_features: List[Dict[str, Any]] = []
+
+    for i in range(cg.n_edges):
+        feature = {
+            "type": "Feature",
+            "geometry": {
+                "type": "LineString",
+                "coordinates": cg.edge_coords(i).tolist(),
+            },
+            "properties": {
+                "u": u_ids[i],
+                "v": v_ids[i],
+                "key": keys[i],
+                "bridge": bridges[i],
+                "tunnel": tunnels[i],
+                "highway": cg.highway_value(i),
+            },
+        }
+        all_features.append(feature)
+
+    index = {edge: i for i, edge in enumerate(zip(u_ids, v_ids, keys))}
+    return all_features, index
+
+
+def _api_panel(G: CompiledGraph, n_pairs: int) -> ODPanel:
+    """
+    First `n_pairs` rows of the city's API OD panel (`API_OD_PANEL_PAIRS`
+    pairs, `OD_PANEL_SEED`), which is built and persisted once per graph.
+    """
+    return get_od_panel(G, API_OD_PANEL_PAIRS, seed=OD_PANEL_SEED).take(0, n_pairs)
 
 
 # ---------- Routes ----------
@@ -122,7 +258,11 @@ def build_edges_geojson(
 
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    return {
+        "status": "ok",
+        "graph_cache": graph_cache_stats(),
+        "artifacts": artifact_stats(),
+    }
 
 
 @app.get("/cities")
@@ -132,7 +272,7 @@ def list_default_cities():
 
 @app.get("/scenarios")
 def list_scenarios():
-    return {"scenarios": SCENARIOS}
+    return {"scenarios": ALL_SCENARIOS}
 
 
 @app.post("/simulate", response_model=SimResponse)
@@ -140,16 +280,25 @@ def simulate(req: SimRequest):
     """
     Main endpoint for interactive website.
 
-    1. Load OSMnx road graph for the city.
+    1. Load the city's compiled road graph (CSR arrays of the OSMnx graph).
     2. Pick edges to remove according to scenario + severity.
-    3. Run A* based OD sampling to compute travel-time ratios.
+    3. Sample OD pairs and compute travel-time ratios with Dijkstra over
+       the compiled graph (`simulate_single_shock`; its ALT and CH engines
+       answer the same queries with landmarks or a contraction hierarchy).
     4. Build GeoJSON of all edges + removed edges for Leaflet visualization.
+
+    With `runs > 1` the scenario is replicated (see `_simulate_replicates`);
+    otherwise CI targets switch to sequential OD sampling, which reports the
+    achieved intervals and the number of pairs used.
     """
-    if req.scenario not in SCENARIOS:
+    if req.scenario not in ALL_SCENARIOS:
         raise HTTPException(status_code=400, detail=f"Unknown scenario: {req.scenario}")
 
-    # --- Load graph ---
-    G = load_city_graph(req.city, cache_dir="graphs")
+    # --- Load graph (compiled arrays; no GraphML parsing on warm disk cache) ---
+    G = load_compiled_city_graph(req.city, cache_dir="graphs")
+
+    if req.runs > 1:
+        return _simulate_replicates(G, req)
 
     # --- Select edges to remove ---
     edge_ids: List[EdgeId] = select_edges_for_scenario(
@@ -157,6 +306,8 @@ def simulate(req: SimRequest):
         scenario=req.scenario,
         severity=req.severity,
         seed=42,
+        betweenness_tolerance=req.betweenness_tolerance,
+        attack_rounds=req.attack_rounds,
     )
 
     # --- Run simulation metrics ---
@@ -165,7 +316,15 @@ def simulate(req: SimRequest):
         edge_ids_to_remove=edge_ids,
         n_pairs=req.n_pairs,
         seed=123,
+        n_origins=req.n_origins,
+        target_ratio_ci=req.target_ratio_ci,
+        target_disconnected_ci=req.target_disconnected_ci,
+        max_pairs=req.max_pairs,
+        time_budget=req.time_budget_s,
     )
+    if metrics["n_pairs"] == 0 and metrics["n_removed_edges"] > 0:
+        # Nothing was measured: report that instead of penalty metrics.
+        raise HTTPException(status_code=422, detail="No OD pairs could be evaluated.")
 
     # --- Build GeoJSON for Leaflet ---
     edges_geojson, removed_geojson = build_edges_geojson(G, edge_ids)
@@ -181,4 +340,95 @@ def simulate(req: SimRequest):
         n_pairs=metrics["n_pairs"],
         edges_geojson=edges_geojson,
         removed_edges_geojson=removed_geojson,
+        avg_ratio_ci=metrics.get("avg_ratio_ci"),
+        pct_disconnected_ci=metrics.get("pct_disconnected_ci"),
+        stop_reason=metrics.get("stop_reason"),
+        **_ranking_report(G, req),
+    )
+
+
+def _ranking_report(G: CompiledGraph, req: SimRequest) -> Dict[str, Any]:
+    """
+    Sources used and estimated error of the adaptive betweenness ranking
+    behind a Targeted Attack request (cached; empty for other requests).
+    """
+    if req.betweenness_tolerance is None or req.scenario != "Targeted Attack (Top k%)":
+        return {}
+    ranking = get_adaptive_betweenness_ranking(G, tolerance=req.betweenness_tolerance)
+    return {"betweenness_sources": ranking.n_sources, "betweenness_error": ranking.error}
+
+
+def _simulate_replicates(G: CompiledGraph, req: SimRequest) -> SimResponse:
+    """
+    `req.runs` replicates of the scenario run on `REPLICATE_WORKERS` threads
+    over the loaded graph, each with its own edge-selection seed and slice
+    of the city's API OD panel (see `_api_panel`). Metrics are means over
+    runs, with 95% intervals; the map shows the edges removed in the first
+    run.
+    """
+    replicates = run_scenario_replicates(
+        G,
+        req.scenario,
+        req.severity,
+        n_pairs=req.n_pairs,
+        runs=req.runs,
+        seed=42,
+        workers=REPLICATE_WORKERS,
+        betweenness_tolerance=req.betweenness_tolerance,
+        attack_rounds=req.attack_rounds,
+        od_panel=_api_panel(G, req.n_pairs * req.runs),
+    )
+    runs = [metrics for _, metrics in replicates]
+
+    def interval(
+        key: str, low: float, high: float
+    ) -> Tuple[float, Optional[List[float]]]:
+        mean, half = mean_ci([m[key] for m in runs])
+        # Non-finite bounds are not JSON compliant; report no interval.
+        if not np.isfinite(mean + half):
+            return mean, None
+        # The t-interval ignores the metric's range; clip it to that.
+        return mean, [max(low, mean - half), min(high, mean + half)]
+
+    # Removing edges never shortens a trip, so ratios are at least 1.
+    avg_ratio, avg_ratio_ci = interval("avg_ratio", 1.0, math.inf)
+    pct_disconnected, pct_disconnected_ci = interval("pct_disconnected", 0.0, 100.0)
+    edges_geojson, removed_geojson = build_edges_geojson(G, replicates[0][0])
+
+    return SimResponse(
+        city=req.city,
+        scenario=req.scenario,
+        severity=req.severity,
+        avg_ratio=avg_ratio,
+        median_ratio=float(np.mean([m["median_ratio"] for m in runs])),
+        pct_disconnected=pct_disconnected,
+        n_removed_edges=runs[0]["n_removed_edges"],
+        n_pairs=runs[0]["n_pairs"],
+        runs=req.runs,
+        avg_ratio_ci=avg_ratio_ci,
+        pct_disconnected_ci=pct_disconnected_ci,
+        edges_geojson=edges_geojson,
+        removed_edges_geojson=removed_geojson,
+        **_ranking_report(G, req),
+    )
+
+
+@app.post("/robustness-curve", response_model=CurveResponse)
+def robustness_curve(req: CurveRequest):
+    """
+    Whole severity curve for one scenario in a single pass: giant-component
+    fraction and OD disconnection (weak connectivity) at every removal
+    fraction, using the same removal ordering as /simulate.
+    """
+    if req.scenario not in ALL_SCENARIOS:
+        raise HTTPException(status_code=400, detail=f"Unknown scenario: {req.scenario}")
+
+    G = load_compiled_city_graph(req.city, cache_dir="graphs")
+    panel = _api_panel(G, req.n_pairs)
+    curve = scenario_robustness_curve(G, req.scenario, panel.pairs, seed=42)
+
+    return CurveResponse(
+        city=req.city,
+        scenario=req.scenario,
+        **sample_curve(curve, req.n_points),
     )
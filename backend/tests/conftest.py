@@ -0,0 +1,96 @@
+# backend/tests/conftest.py
+
+from __future__ import annotations
+import math
+import os
+import sys
+
+import networkx as nx
+import numpy as np
+import pytest
+
+# Import the package the way app.py does (backend/ on the path).
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+_EARTH_RADIUS_M = 6_371_008.8
+
+
+def _great_circle_m(lon1: float, lat1: float, lon2: float, lat2: float) -> float:
+    lon1, lat1, lon2, lat2 = map(math.radians, (lon1, lat1, lon2, lat2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * _EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def make_city(size: int = 7, seed: int = 0) -> nx.MultiDiGraph:
+    """
+    Small OSMnx-like street grid: lon/lat nodes, edges with length (never
+    shorter than the great-circle distance) and travel_time, some one-way
+    streets, a few parallel edges, bridge / tunnel / highway tags, and a
+    separate two-node island so some OD pairs are unreachable.
+    """
+    rng = np.random.default_rng(seed)
+    G = nx.MultiDiGraph(crs="epsg:4326")
+
+    def node(i: int, j: int) -> int:
+        return 1000 + i * size + j
+
+    for i in range(size):
+        for j in range(size):
+            G.add_node(node(i, j), x=-71.0 + 0.001 * j, y=42.0 + 0.001 * i)
+
+    def street(u: int, v: int, **tags) -> None:
+        gc = _great_circle_m(G.nodes[u]["x"], G.nodes[u]["y"], G.nodes[v]["x"], G.nodes[v]["y"])
+        length = gc * (1.0 + 0.5 * rng.random())
+        speed = float(rng.choice([8.0, 13.0, 20.0]))
+        G.add_edge(u, v, length=length, travel_time=length / speed, **tags)
+
+    highways = ["residential", "primary", "secondary", ["motorway", "trunk"]]
+    for i in range(size):
+        for j in range(size):
+            for di, dj in ((0, 1), (1, 0)):
+                if i + di >= size or j + dj >= size:
+                    continue
+                u, v = node(i, j), node(i + di, j + dj)
+                tags = {"highway": highways[int(rng.integers(len(highways)))]}
+                draw = rng.random()
+                if draw < 0.1:
+                    tags["bridge"] = "yes"
+                elif draw < 0.15:
+                    tags["tunnel"] = "yes"
+                street(u, v, **tags)
+                if rng.random() > 0.15:  # two-way street
+                    street(v, u, **tags)
+                if rng.random() < 0.05:  # parallel edge
+                    street(u, v, **tags)
+
+    island = (node(size, 0), node(size, 1))
+    G.add_node(island[0], x=-70.9, y=42.1)
+    G.add_node(island[1], x=-70.899, y=42.1)
+    street(island[0], island[1], highway="residential")
+    street(island[1], island[0], highway="residential")
+    return G
+
+
+@pytest.fixture
+def city() -> nx.MultiDiGraph:
+    return make_city()
+
+
+@pytest.fixture
+def compiled_city(city):
+    from urban_resilience.compiled_graph import compile_graph
+
+    return compile_graph(city, name="")
+
+
+def nx_lengths(G: nx.MultiDiGraph, weight: str = "travel_time") -> dict:
+    """All-pairs shortest-path lengths from NetworkX, the reference."""
+    return dict(nx.all_pairs_dijkstra_path_length(G, weight=weight))
+
+
+def all_pairs(cg) -> np.ndarray:
+    n = cg.n_nodes
+    return np.stack(np.meshgrid(np.arange(n), np.arange(n), indexing="ij"), -1).reshape(-1, 2)
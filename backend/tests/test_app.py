@@ -0,0 +1,78 @@
+# backend/tests/test_app.py
+
+import pytest
+
+pytest.importorskip("fastapi")
+# app.py mounts the ML routes, which need the model stack (joblib, shap, ...).
+pytest.importorskip("urban_resilience.ml_routes")
+
+import app  # noqa: E402
+from fastapi import HTTPException  # noqa: E402
+from pydantic import ValidationError  # noqa: E402
+
+
+@pytest.fixture
+def api(monkeypatch, compiled_city):
+    monkeypatch.setattr(app, "load_compiled_city_graph", lambda city, cache_dir: compiled_city)
+    return app
+
+
+def _request(**fields):
+    return app.SimRequest(
+        **{"city": "Test", "scenario": "Random Failure", "severity": 0.3, **fields}
+    )
+
+
+@pytest.mark.parametrize(
+    "fields",
+    [
+        {"max_pairs": 0},
+        {"max_pairs": -5, "target_ratio_ci": 0.1},
+        {"max_pairs": app.API_MAX_SEQUENTIAL_PAIRS + 1},
+        {"target_ratio_ci": 0.0},
+        {"target_disconnected_ci": -1.0},
+        {"time_budget_s": 0.0},
+        {"n_origins": -1},
+        {"n_origins": app.API_MAX_ORIGINS + 1},
+        {"n_origins": 5, "runs": 3},
+    ],
+)
+def test_request_fields_are_bounded(fields):
+    with pytest.raises(ValidationError):
+        _request(**fields)
+
+
+def test_sequential_request_reports_intervals(api):
+    out = api.simulate(_request(target_ratio_ci=0.01, max_pairs=100))
+    assert out.n_pairs == 100 and out.stop_reason == "max_pairs"
+    assert out.avg_ratio_ci is not None and out.pct_disconnected_ci is not None
+
+
+def test_no_evaluated_pairs_is_an_error(api, monkeypatch):
+    monkeypatch.setattr(
+        api,
+        "simulate_single_shock",
+        lambda *args, **kwargs: {
+            "avg_ratio": 5.0,
+            "median_ratio": 5.0,
+            "pct_disconnected": 100.0,
+            "n_removed_edges": 10,
+            "n_pairs": 0,
+        },
+    )
+    with pytest.raises(HTTPException) as err:
+        api.simulate(_request())
+    assert err.value.status_code == 422
+
+
+def test_batched_request(api):
+    out = api.simulate(_request(n_pairs=40, n_origins=4))
+    assert out.n_pairs == 40
+
+
+def test_replicate_intervals_stay_in_range(api):
+    out = api.simulate(_request(severity=0.1, runs=3, n_pairs=20))
+    assert out.runs == 3
+    low, high = out.pct_disconnected_ci
+    assert 0.0 <= low <= out.pct_disconnected <= high <= 100.0
+    assert out.avg_ratio_ci[0] >= 1.0
@@ -0,0 +1,119 @@
+# backend/tests/test_artifacts.py
+
+import gc
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import networkx as nx
+from shapely.geometry import LineString
+
+from conftest import make_city
+from urban_resilience.artifacts import REGISTRY, get_artifact, graph_fingerprint
+from urban_resilience.compiled_graph import as_compiled
+
+_names = itertools.count()
+
+
+class Builder:
+    def __init__(self):
+        self.calls = 0
+        self.name = ("test-artifact", next(_names))
+
+    def __call__(self):
+        self.calls += 1
+        return object()
+
+    def get(self, G):
+        return get_artifact(G, self.name, self)
+
+
+def _first_edge(G):
+    return next(iter(G.edges(keys=True)))
+
+
+def test_same_content_shares_artifacts():
+    a, b = make_city(), make_city()
+    build = Builder()
+    assert build.get(a) is build.get(b)
+    assert build.get(as_compiled(a)) is build.get(a)
+    assert build.calls == 1
+
+
+def test_tags_and_geometry_change_the_fingerprint():
+    base = make_city()
+    tagged, shaped = make_city(), make_city()
+    u, v, k = _first_edge(base)
+    tagged.edges[u, v, k]["bridge"] = "yes"
+    x = [base.nodes[n]["x"] for n in (u, v)]
+    y = [base.nodes[n]["y"] for n in (u, v)]
+    shaped.edges[u, v, k]["geometry"] = LineString(
+        [(x[0], y[0]), (x[0], y[1]), (x[1], y[1])]
+    )
+    prints = {graph_fingerprint(G) for G in (base, tagged, shaped)}
+    assert len(prints) == 3
+
+
+def test_size_changes_are_detected_and_attribute_edits_need_invalidate():
+    G = make_city()
+    before = graph_fingerprint(G)
+    u, v, k = _first_edge(G)
+
+    G.edges[u, v, k]["travel_time"] *= 2
+    REGISTRY.invalidate(G)
+    edited = graph_fingerprint(G)
+    assert edited != before
+
+    G.add_edge(u, v, length=1.0, travel_time=1.0)
+    assert graph_fingerprint(G) not in (before, edited)
+
+
+def test_artifacts_live_while_any_holder_does():
+    a, b = make_city(), make_city()
+    build = Builder()
+    build.get(a)
+    build.get(b)
+    del a
+    gc.collect()
+    build.get(b)
+    assert build.calls == 1
+
+    del b
+    gc.collect()
+    build.get(make_city())
+    assert build.calls == 2
+
+
+def test_invalidate_keeps_entries_of_other_holders():
+    a, b = make_city(), make_city()
+    build = Builder()
+    build.get(a)
+    build.get(b)
+    assert REGISTRY.invalidate(a) == 0
+    build.get(b)
+    assert build.calls == 1
+
+
+def test_simple_graphs_are_fingerprinted_by_edges():
+    G = make_city()
+    a, b = nx.Graph(G), nx.Graph(G)
+    assert graph_fingerprint(a) == graph_fingerprint(b)
+    b.remove_edge(*next(iter(b.edges())))
+    assert graph_fingerprint(a) != graph_fingerprint(b)
+
+
+def test_concurrent_lookups_build_once():
+    G = make_city()
+    gate = threading.Event()
+    build = Builder()
+
+    def slow():
+        gate.wait(1.0)
+        return build()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(get_artifact, G, build.name, slow) for _ in range(8)]
+        gate.set()
+        values = {id(f.result()) for f in futures}
+    assert len(values) == 1
+    assert build.calls == 1
@@ -0,0 +1,154 @@
+# backend/tests/test_betweenness.py
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from conftest import make_city
+from urban_resilience.betweenness import (
+    BrandesPool,
+    IncrementalEdgeBetweenness,
+    adaptive_attack_order,
+    adaptive_edge_betweenness,
+    betweenness_centrality,
+    edge_betweenness_scores,
+)
+from urban_resilience.config import BETWEENNESS_TOLERANCES
+from urban_resilience.edge_selection import snap_tolerance
+
+
+@pytest.fixture(params=["city", "random"])
+def simple_graph(request):
+    if request.param == "city":
+        return nx.Graph(make_city())
+    # Sparse enough to have several components.
+    return nx.gnm_random_graph(60, 70, seed=4)
+
+
+def _by_edge(edges, scores):
+    return {frozenset(e): s for e, s in zip(edges, scores)}
+
+
+@pytest.mark.parametrize("k", [None, 10])
+def test_edge_betweenness_matches_networkx(simple_graph, k):
+    edges, scores = edge_betweenness_scores(simple_graph, k=k, seed=11)
+    assert edges == list(simple_graph.edges())
+    expected = nx.edge_betweenness_centrality(simple_graph, k=k, seed=11)
+    got = _by_edge(edges, scores)
+    for edge, value in expected.items():
+        assert got[frozenset(edge)] == pytest.approx(value, rel=1e-9, abs=1e-12)
+
+
+@pytest.mark.parametrize("k", [None, 10])
+def test_node_betweenness_matches_networkx(simple_graph, k):
+    got = betweenness_centrality(simple_graph, k=k, seed=11)
+    expected = nx.betweenness_centrality(simple_graph, k=k, seed=11)
+    assert got.keys() == expected.keys()
+    for node, value in expected.items():
+        assert got[node] == pytest.approx(value, rel=1e-9, abs=1e-12)
+
+
+def test_scores_do_not_depend_on_workers(simple_graph):
+    _, serial = edge_betweenness_scores(simple_graph, k=40, seed=1, workers=1)
+    _, parallel = edge_betweenness_scores(simple_graph, k=40, seed=1, workers=2)
+    assert np.array_equal(serial, parallel)
+
+
+def test_adaptive_sampling_is_exact_when_every_node_is_a_source(simple_graph):
+    result = adaptive_edge_betweenness(simple_graph, [0.3, 0.7], tolerance=0.01, seed=0)
+    assert result.n_sources == simple_graph.number_of_nodes()
+    assert result.converged and result.error == 0.0
+    expected = nx.edge_betweenness_centrality(simple_graph)
+    got = _by_edge(result.edges, result.scores)
+    for edge, value in expected.items():
+        assert got[frozenset(edge)] == pytest.approx(value, rel=1e-9, abs=1e-12)
+
+
+def test_adaptive_sampling_finds_the_top_edges():
+    G = nx.Graph(make_city(size=16))
+    exact = nx.edge_betweenness_centrality(G)
+    result = adaptive_edge_betweenness(G, [0.3], tolerance=0.2, min_sources=32, seed=0)
+    assert result.n_sources < G.number_of_nodes()
+    assert result.converged
+
+    size = int(len(exact) * 0.3)
+    top = {frozenset(e) for e in sorted(exact, key=exact.get, reverse=True)[:size]}
+    order = np.argsort(-result.scores, kind="stable")[:size]
+    found = {frozenset(result.edges[i]) for i in order}
+    # Misplaced share of the sampled top set within the tolerance.
+    assert 1 - len(top & found) / size <= 0.2
+
+
+def test_adaptive_sampling_rejects_bad_tolerance(simple_graph):
+    with pytest.raises(ValueError):
+        adaptive_edge_betweenness(simple_graph, [0.3], tolerance=0.0)
+
+
+def test_tolerances_snap_down_to_the_grid():
+    assert snap_tolerance(0.05) == 0.05
+    assert snap_tolerance(0.07) == 0.05
+    assert snap_tolerance(max(BETWEENNESS_TOLERANCES)) == max(BETWEENNESS_TOLERANCES)
+    for bad in (min(BETWEENNESS_TOLERANCES) / 2, 2 * max(BETWEENNESS_TOLERANCES)):
+        with pytest.raises(ValueError):
+            snap_tolerance(bad)
+
+
+@pytest.mark.parametrize("k,workers", [(None, 1), (20, 1), (20, 2)])
+def test_incremental_removal_matches_recomputing(simple_graph, k, workers):
+    reduced = simple_graph.copy()
+    rng = np.random.default_rng(0)
+    with IncrementalEdgeBetweenness(simple_graph, k=k, seed=3, workers=workers) as tracker:
+        for _ in range(3):
+            alive = np.flatnonzero(~tracker.removed)
+            eids = rng.choice(alive, size=5, replace=False)
+            tracker.remove(eids)
+            reduced.remove_edges_from(tracker.edges[e] for e in eids.tolist())
+
+            edges, scores = edge_betweenness_scores(reduced, k=k, seed=3)
+            expected = _by_edge(edges, scores)
+            got = tracker.scores()
+            for e in np.flatnonzero(~tracker.removed).tolist():
+                assert got[e] == expected[frozenset(tracker.edges[e])]
+            assert not got[tracker.removed].any()
+
+
+def test_one_pool_serves_every_round(monkeypatch):
+    starts = []
+    start = BrandesPool._start
+
+    def counting_start(self):
+        starts.append(self)
+        start(self)
+
+    monkeypatch.setattr(BrandesPool, "_start", counting_start)
+    G = nx.Graph(make_city(size=10))
+    serial, _ = adaptive_attack_order(G, 60, 4, k=40, seed=2, workers=1)
+    assert starts == []
+    parallel, stats = adaptive_attack_order(G, 60, 4, k=40, seed=2, workers=2)
+    assert parallel == serial
+    assert stats["rounds"] == 4 and len(starts) == 1
+
+    adaptive_edge_betweenness(G, [0.3], tolerance=0.01, min_sources=32, seed=0, workers=2)
+    assert len(starts) == 2
+
+
+def test_attack_order_follows_recomputed_networkx_betweenness():
+    G = nx.Graph(make_city())
+    n_remove, rounds = 60, 4
+    order, stats = adaptive_attack_order(G, n_remove, rounds)
+    assert stats["rounds"] == rounds
+    assert len(order) == G.number_of_edges()
+    assert set(map(frozenset, order)) == set(map(frozenset, G.edges()))
+
+    # Every batch is a top batch of exact NetworkX betweenness on the graph
+    # left by the previous ones (up to ties).
+    reduced = G.copy()
+    batch = -(-n_remove // rounds)
+    for start in range(0, n_remove, batch):
+        taken = order[start : min(start + batch, n_remove)]
+        scores = {frozenset(e): s for e, s in nx.edge_betweenness_centrality(reduced).items()}
+        chosen = {frozenset(e) for e in taken}
+        lowest_taken = min(scores[e] for e in chosen)
+        highest_left = max((s for e, s in scores.items() if e not in chosen), default=0.0)
+        assert lowest_taken >= highest_left - 1e-12
+        reduced.remove_edges_from(taken)
@@ -0,0 +1,65 @@
+# backend/tests/test_compiled_graph.py
+
+import json
+
+import numpy as np
+import pytest
+
+from conftest import make_city
+from urban_resilience.compiled_graph import (
+    _ARRAY_FIELDS,
+    FORMAT_VERSION,
+    _content_fingerprint,
+    compile_graph,
+    is_compiled_graph_dir,
+    load_compiled_graph,
+    save_compiled_graph,
+)
+
+
+@pytest.fixture
+def bundle(tmp_path, compiled_city):
+    path = str(tmp_path / "Test_Town.cgraph")
+    save_compiled_graph(compiled_city, path)
+    return path
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_bundle_round_trip(bundle, compiled_city, mmap):
+    loaded = load_compiled_graph(bundle, mmap=mmap)
+    for f in _ARRAY_FIELDS:
+        assert np.array_equal(getattr(loaded, f), getattr(compiled_city, f)), f
+    assert loaded.weight == compiled_city.weight
+    assert loaded.edge_ids() == compiled_city.edge_ids()
+
+
+def test_mapped_bundle_is_read_only(bundle):
+    loaded = load_compiled_graph(bundle, mmap=True)
+    assert isinstance(loaded.travel_time, np.memmap)
+    with pytest.raises(ValueError):
+        loaded.travel_time[0] = 0.0
+
+
+def test_fingerprint_is_stable(bundle, compiled_city):
+    loaded = load_compiled_graph(bundle, mmap=True)
+    assert loaded.fingerprint == compiled_city.fingerprint
+    assert compile_graph(make_city()).fingerprint == compiled_city.fingerprint
+    arrays = {f: getattr(loaded, f) for f in _ARRAY_FIELDS}
+    assert _content_fingerprint(arrays, loaded.weight) == loaded.fingerprint
+    assert compile_graph(make_city(seed=1)).fingerprint != compiled_city.fingerprint
+
+
+def test_other_format_versions_are_rejected(bundle, compiled_city):
+    meta_path = f"{bundle}/meta.json"
+    with open(meta_path, encoding="utf-8") as fh:
+        meta = json.load(fh)
+    meta["format_version"] = FORMAT_VERSION - 1
+    with open(meta_path, "w", encoding="utf-8") as fh:
+        json.dump(meta, fh)
+
+    assert not is_compiled_graph_dir(bundle)
+    with pytest.raises(ValueError):
+        load_compiled_graph(bundle)
+    # Saving again replaces the stale bundle.
+    save_compiled_graph(compiled_city, bundle)
+    assert load_compiled_graph(bundle).fingerprint == compiled_city.fingerprint
@@ -0,0 +1,57 @@
+# backend/tests/test_contraction.py
+
+import math
+
+import numpy as np
+import pytest
+
+from conftest import all_pairs, nx_lengths
+from urban_resilience.contraction import (
+    ch_damaged_distances,
+    ch_pair_distances,
+    get_contraction_hierarchy,
+)
+from urban_resilience.routing import pair_distances
+
+
+@pytest.fixture
+def hierarchy(compiled_city):
+    return get_contraction_hierarchy(compiled_city, build=True)
+
+
+def test_unbuilt_hierarchy_is_not_built_at_request_time(compiled_city):
+    assert get_contraction_hierarchy(compiled_city) is None
+
+
+def test_ch_distances_match_networkx(city, compiled_city, hierarchy):
+    lengths = nx_lengths(city)
+    ids = compiled_city.node_ids
+    pairs = all_pairs(compiled_city)
+    got, paths = ch_pair_distances(compiled_city, hierarchy, pairs)
+    expected = [lengths[ids[u]].get(ids[v], math.inf) for u, v in pairs.tolist()]
+    np.testing.assert_allclose(got, expected, rtol=1e-12)
+    # Unpacked paths are real edges chaining origin to destination.
+    for (u, v), d, path in zip(pairs.tolist(), got, paths):
+        if math.isfinite(d) and u != v:
+            assert path[0][0] == u and path[-1][1] == v
+            assert all(a[1] == b[0] for a, b in zip(path, path[1:]))
+
+
+def test_ch_matches_csr_bit_for_bit(compiled_city, hierarchy):
+    pairs = all_pairs(compiled_city)
+    got, _ = ch_pair_distances(compiled_city, hierarchy, pairs)
+    assert np.array_equal(got, pair_distances(compiled_city, pairs))
+
+
+def test_ch_damaged_distances_match_networkx(city, compiled_city, hierarchy):
+    rng = np.random.default_rng(3)
+    removed = rng.choice(compiled_city.n_edges, size=40, replace=False)
+    damaged = city.copy()
+    damaged.remove_edges_from(compiled_city.edge_ids(removed))
+    lengths = nx_lengths(damaged)
+    ids = compiled_city.node_ids
+
+    pairs = all_pairs(compiled_city)
+    _, got = ch_damaged_distances(compiled_city, hierarchy, pairs, removed)
+    expected = [lengths[ids[u]].get(ids[v], math.inf) for u, v in pairs.tolist()]
+    np.testing.assert_allclose(got, expected, rtol=1e-12)
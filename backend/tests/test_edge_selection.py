@@ -0,0 +1,69 @@
+# backend/tests/test_edge_selection.py
+
+import glob
+
+import pytest
+
+from conftest import make_city
+from urban_resilience import edge_selection
+from urban_resilience.artifacts import REGISTRY
+from urban_resilience.compiled_graph import (
+    compile_graph,
+    load_compiled_graph,
+    save_compiled_graph,
+)
+from urban_resilience.edge_selection import (
+    get_adaptive_betweenness_ranking,
+    select_edges_for_scenario,
+)
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    # Larger than the default city so the adaptive run stops before exact.
+    path = str(tmp_path / "Test_Town.cgraph")
+    save_compiled_graph(compile_graph(make_city(size=16), name=""), path)
+    return path
+
+
+def _restart(bundle):
+    """
+    The bundle as a restarted process sees it: nothing in the registry.
+    """
+    cg = load_compiled_graph(bundle, mmap=True)
+    REGISTRY.discard(cg.fingerprint)
+    return cg
+
+
+def test_adaptive_ranking_round_trips_through_disk(bundle, monkeypatch):
+    cg = _restart(bundle)
+    built = get_adaptive_betweenness_ranking(cg, tolerance=0.2, seed=1)
+    files = glob.glob(bundle[: -len(".cgraph")] + ".betweenness_adaptive_*_1.npz")
+    assert len(files) == 1
+
+    def _no_rebuild(*args, **kwargs):
+        raise AssertionError("persisted ranking was not reused")
+
+    monkeypatch.setattr(edge_selection, "adaptive_edge_betweenness", _no_rebuild)
+    # 0.3 snaps down to the 0.2 entry of BETWEENNESS_TOLERANCES, so it
+    # reads the same file.
+    loaded = get_adaptive_betweenness_ranking(_restart(bundle), tolerance=0.3, seed=1)
+    assert loaded.ranked == built.ranked
+    assert (loaded.n_sources, loaded.error, loaded.converged) == (
+        built.n_sources,
+        built.error,
+        built.converged,
+    )
+    assert built.n_sources < cg.n_nodes
+
+
+def test_targeted_attack_order_survives_a_restart(bundle):
+    options = dict(seed=1, betweenness_tolerance=0.2)
+    first = select_edges_for_scenario(
+        _restart(bundle), "Targeted Attack (Top k%)", 0.3, **options
+    )
+    again = select_edges_for_scenario(
+        _restart(bundle), "Targeted Attack (Top k%)", 0.3, **options
+    )
+    assert len(first) > 0
+    assert again == first
@@ -0,0 +1,25 @@
+# backend/tests/test_experiments.py
+
+import pytest
+
+from urban_resilience.experiments import run_scenario_replicates
+from urban_resilience.od_panel import get_od_panel
+
+
+@pytest.mark.parametrize("scenario", ["Random Failure", "Targeted Attack (Top k%)"])
+def test_threaded_replicates_match_serial(compiled_city, scenario):
+    panel = get_od_panel(compiled_city, 4 * 15, seed=1)
+    serial, threaded = (
+        run_scenario_replicates(
+            compiled_city, scenario, 0.3, n_pairs=15, runs=4, seed=9,
+            workers=workers, od_panel=panel,
+        )
+        for workers in (1, 4)
+    )
+    assert threaded == serial
+
+
+def test_replicates_need_a_long_enough_panel(compiled_city):
+    panel = get_od_panel(compiled_city, 10, seed=1)
+    with pytest.raises(ValueError):
+        run_scenario_replicates(compiled_city, "Random Failure", 0.3, n_pairs=5, runs=3, od_panel=panel)
@@ -0,0 +1,135 @@
+# backend/tests/test_graph_loader.py
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import networkx as nx
+import osmnx as ox
+import pytest
+
+from conftest import make_city
+from urban_resilience import graph_loader
+from urban_resilience.config import DEFAULT_CITIES
+from urban_resilience.graph_loader import GraphCache, estimate_graph_bytes
+
+
+def _graph(n_nodes: int) -> nx.MultiDiGraph:
+    G = nx.MultiDiGraph()
+    G.add_nodes_from(range(n_nodes))
+    return G
+
+
+@pytest.fixture
+def evicted(monkeypatch):
+    dropped = []
+    monkeypatch.setattr(graph_loader, "_EVICTION_HOOKS", [dropped.append])
+    return dropped
+
+
+def test_least_recently_used_is_evicted_by_bytes(evicted):
+    size = estimate_graph_bytes(_graph(10))
+    cache = GraphCache(max_bytes=3 * size)
+    graphs = {key: _graph(10) for key in "abcd"}
+    for key in "abc":
+        cache.put(key, graphs[key])
+    assert cache.get("a") is graphs["a"]  # "b" is now the oldest
+
+    cache.put("d", graphs["d"])
+    assert "b" not in cache and len(cache) == 3
+    assert evicted == [graphs["b"]]
+    assert cache.total_bytes <= cache.max_bytes
+    assert cache.stats()["evictions"] == 1
+
+
+def test_pinned_keys_are_never_evicted(evicted):
+    size = estimate_graph_bytes(_graph(10))
+    cache = GraphCache(max_bytes=2 * size, pinned=["pinned"])
+    cache.put("pinned", _graph(10))
+    for key in "abcd":
+        cache.put(key, _graph(10))
+    assert "pinned" in cache
+    assert "d" in cache and len(cache) == 2
+    assert len(evicted) == 3
+
+
+def test_oversized_entry_is_kept_until_the_next_put(evicted):
+    cache = GraphCache(max_bytes=1)
+    big = _graph(100)
+    cache.put("big", big)
+    assert cache.get("big") is big
+    cache.put("next", _graph(1))
+    assert evicted == [big]
+
+
+def test_hooks_run_on_pop_clear_and_replacement(evicted):
+    cache = GraphCache(max_bytes=10**9)
+    first, second, third = _graph(1), _graph(1), _graph(1)
+    cache.put("a", first)
+    cache.put("a", first)  # same object: no hook
+    cache.put("a", second)
+    cache.put("b", third)
+    cache.pop("b")
+    cache.clear()
+    assert evicted == [first, third, second]
+    assert len(cache) == 0
+
+
+def test_default_cities_are_pinned():
+    for city in DEFAULT_CITIES:
+        for kind in ("graphml", "compiled"):
+            assert (kind, graph_loader._safe_name(city)) in graph_loader._GRAPH_CACHE.pinned
+
+
+def test_concurrent_loads_run_the_loader_once(monkeypatch):
+    monkeypatch.setattr(graph_loader, "_GRAPH_CACHE", GraphCache(max_bytes=10**9))
+    calls = []
+    gate = threading.Event()
+
+    def loader():
+        calls.append(1)
+        gate.wait(1.0)
+        return _graph(5)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [
+            pool.submit(graph_loader._load_once, ("compiled", "Test"), loader)
+            for _ in range(8)
+        ]
+        gate.set()
+        results = {id(f.result()) for f in futures}
+    assert len(calls) == 1 and len(results) == 1
+    # Lock entries are dropped once nobody is loading that key.
+    assert ("compiled", "Test") not in graph_loader._LOAD_LOCKS
+
+
+def test_failed_load_releases_its_lock(monkeypatch):
+    monkeypatch.setattr(graph_loader, "_GRAPH_CACHE", GraphCache(max_bytes=10**9))
+
+    def broken():
+        raise OSError("download failed")
+
+    with pytest.raises(OSError):
+        graph_loader._load_once(("compiled", "Broken"), broken)
+    assert ("compiled", "Broken") not in graph_loader._LOAD_LOCKS
+    assert graph_loader._load_once(("compiled", "Broken"), lambda: _graph(1)) is not None
+
+
+def test_graphml_write_is_atomic(tmp_path, monkeypatch):
+    path = tmp_path / "Test_Town.graphml"
+    G = make_city()
+    graph_loader._save_graphml_atomic(G, str(path))
+    loaded = ox.load_graphml(path)
+    assert loaded.number_of_edges() == G.number_of_edges()
+    before = path.read_bytes()
+
+    def torn_write(graph, filepath):
+        with open(filepath, "w", encoding="utf-8") as fh:
+            fh.write("<graphml")
+        raise OSError("disk full")
+
+    monkeypatch.setattr(graph_loader.ox, "save_graphml", torn_write)
+    with pytest.raises(OSError):
+        graph_loader._save_graphml_atomic(G, str(path))
+    # The old file is untouched and no temp file is left behind.
+    assert path.read_bytes() == before
+    assert [p.name for p in tmp_path.iterdir()] == [path.name]
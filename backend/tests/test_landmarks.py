@@ -0,0 +1,61 @@
+# backend/tests/test_landmarks.py
+
+import math
+
+import numpy as np
+
+from conftest import all_pairs, nx_lengths
+from urban_resilience.landmarks import (
+    alt_heuristic,
+    alt_pair_distances,
+    geo_heuristic,
+    get_landmarks,
+)
+from urban_resilience.routing import astar_search
+
+
+def _reference(cg, lengths, pairs):
+    ids = cg.node_ids
+    return np.asarray(
+        [lengths[ids[u]].get(ids[v], math.inf) for u, v in pairs.tolist()]
+    )
+
+
+def test_alt_distances_match_networkx(city, compiled_city):
+    pairs = all_pairs(compiled_city)
+    got = alt_pair_distances(compiled_city, pairs)
+    np.testing.assert_allclose(got, _reference(compiled_city, nx_lengths(city), pairs), rtol=1e-12)
+
+
+def test_alt_distances_on_damaged_graph(city, compiled_city):
+    rng = np.random.default_rng(2)
+    removed = rng.choice(compiled_city.n_edges, size=40, replace=False)
+    damaged = city.copy()
+    damaged.remove_edges_from(compiled_city.edge_ids(removed))
+
+    pairs = all_pairs(compiled_city)
+    got = alt_pair_distances(compiled_city, pairs, removed=removed)
+    np.testing.assert_allclose(
+        got, _reference(compiled_city, nx_lengths(damaged), pairs), rtol=1e-12
+    )
+
+
+def test_heuristics_are_admissible(city, compiled_city):
+    lengths = nx_lengths(city)
+    ids = compiled_city.node_ids
+    lm = get_landmarks(compiled_city)
+    for t in range(compiled_city.n_nodes):
+        alt, geo = alt_heuristic(lm, t), geo_heuristic(compiled_city, t)
+        for v in range(compiled_city.n_nodes):
+            d = lengths[ids[v]].get(ids[t], math.inf)
+            assert alt(v) <= d
+            assert geo(v) <= d
+
+
+def test_geo_heuristic_search_is_exact(city, compiled_city):
+    lengths = nx_lengths(city)
+    ids = compiled_city.node_ids
+    for u, v in all_pairs(compiled_city)[::5].tolist():
+        d, _ = astar_search(compiled_city, u, v, heuristic=geo_heuristic(compiled_city, v))
+        expected = lengths[ids[u]].get(ids[v], math.inf)
+        assert d == expected or math.isclose(d, expected, rel_tol=1e-12)
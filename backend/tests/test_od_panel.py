@@ -0,0 +1,65 @@
+# backend/tests/test_od_panel.py
+
+import os
+import shutil
+
+import numpy as np
+
+from conftest import make_city
+from urban_resilience.compiled_graph import (
+    artifact_path,
+    compile_graph,
+    load_compiled_graph,
+    save_compiled_graph,
+)
+from urban_resilience.od_panel import build_od_panel, get_od_panel
+
+
+def _panel_file(cg, n_pairs, seed):
+    return artifact_path(cg, f"od_panel_{n_pairs}_{seed}")
+
+
+def test_persisted_panel_reloads_identically(tmp_path, compiled_city):
+    bundle = str(tmp_path / "Test_Town.cgraph")
+    save_compiled_graph(compiled_city, bundle)
+
+    cg = load_compiled_graph(bundle, mmap=True)
+    panel = get_od_panel(cg, 40, seed=123)
+    assert os.path.exists(_panel_file(cg, 40, 123))
+    # Memoised on the graph object.
+    assert get_od_panel(cg, 40, seed=123) is panel
+
+    reloaded = get_od_panel(load_compiled_graph(bundle, mmap=True), 40, seed=123)
+    assert reloaded is not panel
+    assert np.array_equal(reloaded.pairs, panel.pairs)
+    assert np.array_equal(reloaded.baseline, panel.baseline)
+    assert reloaded.fingerprint == panel.fingerprint == cg.fingerprint
+
+    # Other sizes / seeds are separate files.
+    other = get_od_panel(cg, 40, seed=7)
+    assert os.path.exists(_panel_file(cg, 40, 7))
+    assert not np.array_equal(other.pairs, panel.pairs)
+
+
+def test_stale_panel_is_rebuilt(tmp_path, compiled_city):
+    bundle = str(tmp_path / "Test_Town.cgraph")
+    save_compiled_graph(compiled_city, bundle)
+    old = get_od_panel(load_compiled_graph(bundle), 40, seed=123)
+
+    # The city's bundle is rebuilt from different data; the panel next to
+    # it still carries the old fingerprint.
+    changed = compile_graph(make_city(seed=1), name="")
+    assert changed.fingerprint != compiled_city.fingerprint
+    shutil.rmtree(bundle)
+    save_compiled_graph(changed, bundle)
+
+    cg = load_compiled_graph(bundle)
+    panel = get_od_panel(cg, 40, seed=123)
+    expected = build_od_panel(cg, 40, seed=123)
+    assert panel.fingerprint == cg.fingerprint != old.fingerprint
+    assert np.array_equal(panel.pairs, expected.pairs)
+    assert np.array_equal(panel.baseline, expected.baseline)
+
+    # The rebuilt panel replaced the stale file.
+    with np.load(_panel_file(cg, 40, 123)) as data:
+        assert str(data["fingerprint"]) == cg.fingerprint
@@ -0,0 +1,39 @@
+# backend/tests/test_parallel.py
+
+import pandas as pd
+import pytest
+
+from conftest import make_city
+from urban_resilience.compiled_graph import compile_graph, save_compiled_graph
+from urban_resilience.config import SCENARIOS
+from urban_resilience.parallel import iter_sweep_jobs, make_sweep_jobs, run_sweep_jobs
+from urban_resilience.result_store import ResultStore
+
+CITIES = ["Sweep Town A", "Sweep Town B"]
+
+
+@pytest.fixture
+def sweep_jobs(tmp_path, monkeypatch):
+    # Jobs load cities from ./graphs, in the parent and in spawned workers.
+    monkeypatch.chdir(tmp_path)
+    for seed, city in enumerate(CITIES):
+        path = tmp_path / "graphs" / f"{city.replace(' ', '_')}.cgraph"
+        save_compiled_graph(compile_graph(make_city(seed=seed), name=city), str(path))
+    return make_sweep_jobs(CITIES, SCENARIOS, [0.3, 0.7], n_pairs=8, runs=2, seed=42)
+
+
+def test_results_do_not_depend_on_worker_count(sweep_jobs):
+    serial = pd.concat(run_sweep_jobs(sweep_jobs, workers=1), ignore_index=True)
+    pooled = pd.concat(run_sweep_jobs(sweep_jobs, workers=2), ignore_index=True)
+    pd.testing.assert_frame_equal(serial, pooled)
+
+
+def test_consolidated_csv_does_not_depend_on_worker_count(sweep_jobs, tmp_path):
+    csv = {}
+    for workers in (1, 2):
+        store = ResultStore(tmp_path / f"store-{workers}")
+        for _ in iter_sweep_jobs(sweep_jobs, workers=workers, store_root=str(store.root)):
+            pass
+        csv[workers] = tmp_path / f"results-{workers}.csv"
+        store.consolidate(csv_path=csv[workers])
+    assert csv[1].read_bytes() == csv[2].read_bytes()
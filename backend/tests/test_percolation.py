@@ -0,0 +1,44 @@
+# backend/tests/test_percolation.py
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from conftest import all_pairs
+from urban_resilience.config import SCENARIOS
+from urban_resilience.edge_selection import scenario_removal_order
+from urban_resilience.percolation import robustness_curve, sample_curve
+
+
+def _reference_point(city, cg, removed_edges, pairs):
+    damaged = city.copy()
+    damaged.remove_edges_from(cg.edge_ids(removed_edges))
+    components = list(nx.weakly_connected_components(damaged))
+    label = {node: i for i, comp in enumerate(components) for node in comp}
+    ids = cg.node_ids
+    split = [label[ids[u]] != label[ids[v]] for u, v in pairs.tolist()]
+    giant = max(len(c) for c in components) / damaged.number_of_nodes()
+    return giant, 100.0 * np.mean(split)
+
+
+@pytest.mark.parametrize("scenario", SCENARIOS)
+def test_curve_matches_networkx_components(city, compiled_city, scenario):
+    pairs = all_pairs(compiled_city)[::3]
+    order, unit_ends = scenario_removal_order(compiled_city, scenario, seed=5)
+    curve = robustness_curve(compiled_city, order, unit_ends, pairs)
+
+    assert len(curve["fraction_removed"]) == len(unit_ends) + 1
+    for i in range(len(unit_ends) + 1):
+        n_removed = int(curve["n_removed_edges"][i])
+        giant, pct = _reference_point(city, compiled_city, order[:n_removed], pairs)
+        assert curve["giant_component_fraction"][i] == pytest.approx(giant)
+        assert curve["pct_disconnected"][i] == pytest.approx(pct)
+
+
+def test_sample_curve_keeps_both_ends(compiled_city):
+    order, unit_ends = scenario_removal_order(compiled_city, "Random Failure", seed=0)
+    curve = robustness_curve(compiled_city, order, unit_ends)
+    sampled = sample_curve(curve, 11)
+    assert sampled["fraction_removed"][0] == 0.0
+    assert sampled["fraction_removed"][-1] == 1.0
+    assert len(sampled["fraction_removed"]) == 11
@@ -0,0 +1,74 @@
+# backend/tests/test_result_store.py
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from urban_resilience.result_store import ResultStore
+
+
+def _rows(city, runs, **extra):
+    return pd.DataFrame(
+        [
+            {"city": city, "scenario": "Random Failure", "severity": 0.5, "run": r,
+             "avg_ratio": 1.0 + r, **extra}
+            for r in runs
+        ]
+    )
+
+
+def test_append_resume_and_dedup(tmp_path):
+    store = ResultStore(tmp_path)
+    store.append(_rows("A", [0, 1]), tag="000")
+    assert store.is_complete([("A", "Random Failure", 0.5, 0)])
+
+    # A fresh store (a resumed batch) sees the finished keys, and rows
+    # already written are dropped on re-append.
+    resumed = ResultStore(tmp_path)
+    assert resumed.completed() == {
+        ("A", "Random Failure", 0.5, 0),
+        ("A", "Random Failure", 0.5, 1),
+    }
+    resumed.append(_rows("A", [1, 2]), tag="001")
+    out = tmp_path / "all.parquet"
+    assert resumed.consolidate(parquet_path=out) == 3
+    assert pq.read_table(out).to_pandas()["run"].tolist() == [0, 1, 2]
+
+
+def test_torn_manifest_line_is_ignored(tmp_path):
+    store = ResultStore(tmp_path)
+    store.append(_rows("A", [0]), tag="000")
+    with open(store.manifest_path, "a", encoding="utf-8") as fh:
+        fh.write('{"part": "torn')
+    resumed = ResultStore(tmp_path)
+    assert len(resumed.completed()) == 1
+    resumed.append(_rows("B", [0]), tag="001")
+    assert len(list(ResultStore(tmp_path).parts())) == 2
+
+
+def test_consolidate_parts_with_missing_columns(tmp_path):
+    store = ResultStore(tmp_path)
+    store.append(_rows("A", [0]), tag="000")
+    store.append(_rows("B", [0], n_pairs_used=40, label=None), tag="001")
+    store.append(_rows("C", [0], label="x"), tag="002")
+
+    parquet, csv = tmp_path / "all.parquet", tmp_path / "all.csv"
+    assert store.consolidate(parquet_path=parquet, csv_path=csv) == 3
+    df = pq.read_table(parquet).to_pandas()
+    assert df["city"].tolist() == ["A", "B", "C"]
+    assert df["n_pairs_used"].isna().tolist() == [True, False, True]
+    assert df["label"].tolist()[2] == "x"
+    assert pd.read_csv(csv)["city"].tolist() == ["A", "B", "C"]
+
+
+def test_clear_removes_the_store(tmp_path):
+    root = tmp_path / "run_parts"
+    store = ResultStore(root)
+    store.append(_rows("A", [0]), tag="000")
+    assert store.consolidate(csv_path=tmp_path / "all.csv") == 1
+
+    store.clear()
+    assert not root.exists()
+    assert not store.exists() and store.completed() == set()
+    # A fresh build can start over in the same place.
+    store.append(_rows("B", [0]), tag="000")
+    assert ResultStore(root).completed() == {("B", "Random Failure", 0.5, 0)}
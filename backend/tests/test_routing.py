@@ -0,0 +1,122 @@
+# backend/tests/test_routing.py
+
+import math
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from conftest import all_pairs, nx_lengths
+from urban_resilience.config import ALL_SCENARIOS, MAX_ADAPTIVE_ATTACK_ROUNDS, SCENARIOS
+from urban_resilience.edge_selection import (
+    scenario_removal_order,
+    select_edge_index,
+    select_edges_for_scenario,
+)
+from urban_resilience.routing import (
+    astar_search,
+    damaged_weak_labels,
+    pair_distances,
+    routing_matrix,
+)
+
+
+def _reference(cg, lengths, pairs):
+    ids = cg.node_ids
+    return np.asarray(
+        [lengths[ids[u]].get(ids[v], math.inf) for u, v in pairs.tolist()]
+    )
+
+
+def test_pair_distances_match_networkx(city, compiled_city):
+    pairs = all_pairs(compiled_city)
+    got = pair_distances(compiled_city, pairs)
+    np.testing.assert_allclose(got, _reference(compiled_city, nx_lengths(city), pairs), rtol=1e-12)
+    assert np.isinf(got).any()
+
+
+def test_pair_distances_on_damaged_graph(city, compiled_city):
+    rng = np.random.default_rng(1)
+    removed = rng.choice(compiled_city.n_edges, size=40, replace=False)
+    damaged = city.copy()
+    damaged.remove_edges_from(compiled_city.edge_ids(removed))
+
+    pairs = all_pairs(compiled_city)
+    got = pair_distances(compiled_city, pairs, removed=removed)
+    np.testing.assert_allclose(
+        got, _reference(compiled_city, nx_lengths(damaged), pairs), rtol=1e-12
+    )
+
+
+def test_damaged_weak_labels_match_networkx(city, compiled_city):
+    base = routing_matrix(compiled_city)
+    indices = base.indices.copy()
+    rng = np.random.default_rng(2)
+    # Heavy damage splits the grid; lighter damage after it must not reuse it.
+    for size in (40, 110, 40):
+        removed = rng.choice(compiled_city.n_edges, size=size, replace=False)
+        damaged = city.copy()
+        damaged.remove_edges_from(compiled_city.edge_ids(removed))
+        expected = {
+            frozenset(c) for c in nx.weakly_connected_components(damaged)
+        }
+
+        labels = damaged_weak_labels(compiled_city, removed)
+        got = {}
+        for node, label in zip(compiled_city.node_ids.tolist(), labels.tolist()):
+            got.setdefault(label, set()).add(node)
+        assert {frozenset(c) for c in got.values()} == expected
+        # The thread's scratch indices are restored, the shared matrix untouched.
+        assert np.array_equal(base.indices, indices)
+
+
+def test_astar_without_heuristic_is_dijkstra(city, compiled_city):
+    lengths = nx_lengths(city)
+    ids = compiled_city.node_ids
+    for u, v in all_pairs(compiled_city)[::7].tolist():
+        d, _ = astar_search(compiled_city, u, v)
+        assert d == pytest.approx(lengths[ids[u]].get(ids[v], math.inf), rel=1e-12)
+
+
+def test_travel_time_is_float64(compiled_city):
+    assert compiled_city.weights.dtype == np.float64
+
+
+@pytest.mark.parametrize("scenario", SCENARIOS)
+@pytest.mark.parametrize("seed", [0, 7])
+def test_selection_matches_networkx_path(city, compiled_city, scenario, seed):
+    for severity in (0.1, 0.5, 1.0):
+        assert select_edges_for_scenario(
+            city, scenario, severity, seed=seed
+        ) == select_edges_for_scenario(compiled_city, scenario, severity, seed=seed)
+
+
+@pytest.mark.parametrize("scenario", SCENARIOS)
+def test_removal_order_prefixes_are_selections(compiled_city, scenario):
+    order, unit_ends = scenario_removal_order(compiled_city, scenario, seed=3)
+    for severity in (0.1, 0.3, 0.7, 1.0):
+        if not len(unit_ends):
+            continue
+        prefix = order[: unit_ends[max(1, int(len(unit_ends) * severity)) - 1]]
+        selected = select_edge_index(compiled_city, scenario, severity, seed=3)
+        assert np.array_equal(np.sort(prefix), np.sort(selected))
+
+
+def test_adaptive_attack_is_opt_in_and_planned_once(city, compiled_city):
+    scenario = "Adaptive Targeted Attack"
+    assert scenario not in SCENARIOS and scenario in ALL_SCENARIOS
+
+    order, unit_ends = scenario_removal_order(compiled_city, scenario)
+    for severity in (0.1, 0.35, 0.7):
+        prefix = order[: unit_ends[max(1, int(len(unit_ends) * severity)) - 1]]
+        selected = select_edge_index(compiled_city, scenario, severity)
+        assert np.array_equal(np.sort(prefix), np.sort(selected))
+        assert select_edges_for_scenario(city, scenario, severity) == select_edges_for_scenario(
+            compiled_city, scenario, severity
+        )
+
+
+@pytest.mark.parametrize("rounds", [0, MAX_ADAPTIVE_ATTACK_ROUNDS + 1])
+def test_adaptive_attack_rounds_are_bounded(compiled_city, rounds):
+    with pytest.raises(ValueError):
+        select_edge_index(compiled_city, "Adaptive Targeted Attack", 0.3, attack_rounds=rounds)
@@ -0,0 +1,76 @@
+# backend/tests/test_shared_memory.py
+
+import multiprocessing as mp
+import os
+
+import numpy as np
+import pytest
+
+from conftest import make_city
+from urban_resilience.compiled_graph import (
+    _ARRAY_FIELDS,
+    compile_graph,
+    load_compiled_graph,
+    save_compiled_graph,
+)
+
+pytestmark = pytest.mark.skipif(
+    not os.path.exists("/proc/self/smaps"), reason="needs /proc/self/smaps (Linux)"
+)
+
+
+def _bundle_pss_kb(bundle_dir: str) -> int:
+    # Pss of the mappings backed by files of the bundle; Pss splits shared
+    # pages between the processes mapping them.
+    total, in_bundle = 0, False
+    with open("/proc/self/smaps", "r", encoding="utf-8") as fh:
+        for line in fh:
+            parts = line.split()
+            if not parts:
+                continue
+            if not parts[0].endswith(":"):
+                in_bundle = len(parts) >= 6 and parts[5].startswith(bundle_dir)
+            elif parts[0] == "Pss:" and in_bundle:
+                total += int(parts[1])
+    return total
+
+
+def _worker(bundle_dir: str, barrier, queue) -> None:
+    cg = load_compiled_graph(bundle_dir, mmap=True)
+    for f in _ARRAY_FIELDS:  # make the whole bundle resident
+        arr = getattr(cg, f)
+        if arr.dtype.kind in "iuf":
+            float(np.sum(arr, dtype=np.float64))
+    barrier.wait()
+    queue.put(_bundle_pss_kb(bundle_dir))
+    barrier.wait()  # keep the mappings alive until everyone has reported
+
+
+def _bundle_pss_of_workers(bundle_dir: str, n_workers: int) -> int:
+    ctx = mp.get_context("spawn")
+    barrier, queue = ctx.Barrier(n_workers), ctx.Queue()
+    procs = [
+        ctx.Process(target=_worker, args=(bundle_dir, barrier, queue))
+        for _ in range(n_workers)
+    ]
+    for p in procs:
+        p.start()
+    total = sum(queue.get(timeout=120) for _ in procs)
+    for p in procs:
+        p.join()
+    return total
+
+
+def test_mapped_bundle_is_shared_across_workers(tmp_path):
+    bundle_dir = str(tmp_path / "Big_Grid.cgraph")
+    cg = compile_graph(make_city(size=60), name="Big Grid")
+    save_compiled_graph(cg, bundle_dir)
+    numeric_kb = sum(
+        getattr(cg, f).nbytes for f in _ARRAY_FIELDS if getattr(cg, f).dtype.kind in "iuf"
+    ) / 1024
+
+    one = _bundle_pss_of_workers(bundle_dir, 1)
+    four = _bundle_pss_of_workers(bundle_dir, 4)
+    assert one >= 0.5 * numeric_kb
+    # Four workers together still hold about one copy, not four.
+    assert four <= 1.25 * one + 64
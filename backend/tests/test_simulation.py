@@ -0,0 +1,56 @@
+# backend/tests/test_simulation.py
+
+import pytest
+
+from urban_resilience.edge_selection import (
+    scenario_removal_order,
+    select_edges_for_scenario,
+)
+from urban_resilience.od_panel import build_od_panel
+from urban_resilience.simulation import (
+    sample_od_batch,
+    simulate_severity_sweep,
+    simulate_single_shock,
+)
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"target_ratio_ci": 0.0},
+        {"target_disconnected_ci": -1.0},
+        {"target_ratio_ci": 0.1, "time_budget": 0.0},
+        {"target_ratio_ci": 0.1, "max_pairs": 0},
+    ],
+)
+def test_sequential_mode_rejects_unreachable_targets(compiled_city, options):
+    edges = select_edges_for_scenario(compiled_city, "Random Failure", 0.3, seed=0)
+    with pytest.raises(ValueError):
+        simulate_single_shock(compiled_city, edges, seed=0, **options)
+
+
+def test_batched_sampling_needs_an_origin(compiled_city):
+    with pytest.raises(ValueError):
+        sample_od_batch(compiled_city, n_origins=-1, dests_per_origin=5)
+
+
+@pytest.mark.parametrize(
+    "scenario",
+    ["Random Failure", "Bridge Collapse", "Highway Flood", "Targeted Attack (Top k%)"],
+)
+def test_severity_sweep_matches_cold_single_shocks(compiled_city, scenario):
+    severities = [0.05, 0.1, 0.3, 0.5, 0.7, 1.0]
+    panel = build_od_panel(compiled_city, 60, seed=5)
+    order, unit_ends = scenario_removal_order(compiled_city, scenario, seed=3)
+    assert len(order) > 0
+    sweep = simulate_severity_sweep(
+        compiled_city, order, unit_ends, severities, od_panel=panel
+    )
+
+    for sev, warm in zip(severities, sweep):
+        assert warm["severity"] == sev
+        edges = select_edges_for_scenario(compiled_city, scenario, sev, seed=3)
+        cold = simulate_single_shock(compiled_city, edges, od_panel=panel)
+        assert warm["n_removed_edges"] == cold["n_removed_edges"] == len(edges)
+        for key in ("avg_ratio", "median_ratio", "pct_disconnected", "n_pairs"):
+            assert warm[key] == pytest.approx(cold[key]), (sev, key)
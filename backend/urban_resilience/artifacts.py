@@ -0,0 +1,239 @@
+# backend/urban_resilience/artifacts.py
+
+from __future__ import annotations
+import hashlib
+import threading
+import weakref
+from collections import Counter
+from typing import Any, Callable, Dict, Hashable, Set, Tuple
+
+import networkx as nx
+
+from .compiled_graph import (
+    CompiledGraph,
+    as_compiled,
+    forget_compiled_view,
+    peek_compiled_view,
+)
+from .graph_loader import register_eviction_hook
+
+
+class ArtifactRegistry:
+    """
+    Lazily built, memoised derived views of graphs (edge GeoDataFrame,
+    undirected projection, betweenness ranking, ...), shared by every module.
+
+    Entries are keyed by `(graph fingerprint, artifact name)`, so two loads
+    of the same city share their artifacts and an unrelated graph can never
+    hit them, unlike caches keyed by `id(G)`. Each artifact is built at most
+    once per key across threads. Artifacts are shared: treat them as
+    read-only.
+
+    Every graph that looks up an artifact holds its fingerprint's entries;
+    they are dropped once no holder is left, i.e. when the last one leaves
+    graph_loader's cache, is garbage collected or is released with
+    `invalidate`. Call `invalidate` after editing a NetworkX graph's edge
+    attributes in place (e.g. `ox.add_edge_travel_times`): only node and
+    edge count changes are detected automatically. `stats()` reports
+    per-artifact build and hit counts.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, Hashable], Any] = {}
+        self._locks: Dict[Tuple[str, Hashable], threading.Lock] = {}
+        self._guard = threading.Lock()
+        self.builds: Counter = Counter()
+        self.hits: Counter = Counter()
+        self.invalidations = 0
+
+    def get(self, G: Any, name: Hashable, build: Callable[[], Any]) -> Any:
+        """
+        Artifact `name` of graph `G`, calling `build()` on first use.
+        """
+        key = (graph_fingerprint(G), name)
+        kind = name[0] if isinstance(name, tuple) else name
+        with self._guard:
+            if key in self._entries:
+                self.hits[kind] += 1
+                return self._entries[key]
+            lock = self._locks.setdefault(key, threading.Lock())
+
+        with lock:
+            with self._guard:
+                if key in self._entries:
+                    self.hits[kind] += 1
+                    return self._entries[key]
+            value = build()
+            with self._guard:
+                self._entries[key] = value
+                self._locks.pop(key, None)
+                self.builds[kind] += 1
+            return value
+
+    def discard(self, fingerprint: str) -> int:
+        """
+        Drop every artifact of the graph with `fingerprint`; returns how many.
+        """
+        with self._guard:
+            stale = [key for key in self._entries if key[0] == fingerprint]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self.invalidations += 1
+            return len(stale)
+
+    def invalidate(self, G: Any) -> int:
+        """
+        Release `G`'s hold on its artifacts (and, for a NetworkX graph, drop
+        its compiled view and memoised fingerprint, so the next lookup
+        reflects in-place edits). Returns how many artifacts were dropped:
+        none while another live graph with the same content holds them.
+        """
+        dropped = 0
+        if not isinstance(G, CompiledGraph):
+            view = peek_compiled_view(G)
+            _forget_view(G)
+            if view is not None:
+                dropped += _release(id(view))
+        return dropped + _release(id(G))
+
+    def clear(self) -> None:
+        with self._guard:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._guard:
+            names = sorted(set(self.builds) | set(self.hits), key=str)
+            return {
+                "entries": len(self._entries),
+                "invalidations": self.invalidations,
+                "artifacts": {
+                    str(name): {"builds": self.builds[name], "hits": self.hits[name]}
+                    for name in names
+                },
+            }
+
+
+# NetworkX graph id -> (node count, edge count, fingerprint) when it was
+# fingerprinted. The counts catch the common in-place edits (adding /
+# removing edges or nodes) without rehashing the graph on every lookup.
+_NX_FINGERPRINTS: Dict[int, Tuple[int, int, str]] = {}
+
+# Holders: graph id -> fingerprint whose artifacts it uses, and the reverse.
+# Re-entrant because a finalizer may run (on GC) while the lock is held.
+_HELD: Dict[int, str] = {}
+_HOLDERS: Dict[str, Set[int]] = {}
+_FINALIZERS: Dict[int, weakref.finalize] = {}
+_NX_LOCK = threading.RLock()
+
+
+def _forget_view(G: nx.MultiDiGraph) -> None:
+    with _NX_LOCK:
+        _NX_FINGERPRINTS.pop(id(G), None)
+    forget_compiled_view(G)
+
+
+def graph_fingerprint(G: Any) -> str:
+    """
+    Content fingerprint of a graph, and registers `G` as a holder of its
+    artifacts. For a NetworkX multigraph it is the compiled view's hash of
+    topology, weights, tags and geometry (see `as_compiled`); derived simple
+    graphs hash their edge list. NetworkX fingerprints are memoised per
+    graph: if its node or edge count changed since, its compiled view is
+    dropped and it is fingerprinted afresh. Attribute edits keep the counts,
+    so they need `ArtifactRegistry.invalidate`.
+    """
+    if isinstance(G, CompiledGraph):
+        fingerprint = G.fingerprint
+    else:
+        fingerprint = _nx_fingerprint(G)
+    _hold(G, fingerprint)
+    return fingerprint
+
+
+def _nx_fingerprint(G: nx.Graph) -> str:
+    size = (G.number_of_nodes(), G.number_of_edges())
+    with _NX_LOCK:
+        entry = _NX_FINGERPRINTS.get(id(G))
+    if entry is not None and entry[:2] == size:
+        return entry[2]
+    if entry is not None:
+        _forget_view(G)
+
+    if G.is_multigraph():
+        fingerprint = as_compiled(G).fingerprint
+    else:
+        # Derived simple graphs (not compilable): hash their edge list.
+        h = hashlib.sha1(repr(sorted(G.edges(data=True), key=repr)).encode())
+        fingerprint = f"simple-{size[0]}-{size[1]}-{h.hexdigest()}"
+    with _NX_LOCK:
+        _NX_FINGERPRINTS[id(G)] = (*size, fingerprint)
+    return fingerprint
+
+
+def _hold(G: Any, fingerprint: str) -> None:
+    gid = id(G)
+    with _NX_LOCK:
+        previous = _HELD.get(gid)
+        if previous == fingerprint:
+            return
+        _HELD[gid] = fingerprint
+        _HOLDERS.setdefault(fingerprint, set()).add(gid)
+        finalizer = _FINALIZERS.get(gid)
+        if finalizer is None or not finalizer.alive:
+            _FINALIZERS[gid] = weakref.finalize(G, _graph_collected, gid)
+    if previous is not None:
+        _drop_holder(gid, previous)
+
+
+def _drop_holder(gid: int, fingerprint: str) -> int:
+    with _NX_LOCK:
+        holders = _HOLDERS.get(fingerprint)
+        if holders is None or gid not in holders:
+            return 0
+        holders.discard(gid)
+        if holders:
+            return 0
+        del _HOLDERS[fingerprint]
+    return REGISTRY.discard(fingerprint)
+
+
+def _release(gid: int) -> int:
+    with _NX_LOCK:
+        fingerprint = _HELD.pop(gid, None)
+    return _drop_holder(gid, fingerprint) if fingerprint is not None else 0
+
+
+def _graph_collected(gid: int) -> None:
+    with _NX_LOCK:
+        _NX_FINGERPRINTS.pop(gid, None)
+        _FINALIZERS.pop(gid, None)
+    _release(gid)
+
+
+REGISTRY = ArtifactRegistry()
+
+
+def get_artifact(G: Any, name: Hashable, build: Callable[[], Any]) -> Any:
+    """
+    Shared per-graph artifact `name`, built with `build()` on first use (see
+    `ArtifactRegistry`).
+    """
+    return REGISTRY.get(G, name, build)
+
+
+def artifact_stats() -> Dict[str, Any]:
+    return REGISTRY.stats()
+
+
+def _forget_graph(G: Any) -> None:
+    # Evicted from graph_loader's cache: stop holding its artifacts (and
+    # those of its compiled view); other live copies keep theirs.
+    if not isinstance(G, CompiledGraph):
+        view = peek_compiled_view(G)
+        if view is not None:
+            _release(id(view))
+    _release(id(G))
+
+
+register_eviction_hook(_forget_graph)
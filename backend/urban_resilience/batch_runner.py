@@ -2,11 +2,10 @@
 
 from __future__ import annotations
 
+import argparse
 from pathlib import Path
 from datetime import datetime
-from typing import List
-
-import pandas as pd
+from typing import List, Optional
 
 from backend.urban_resilience.config import (
     DEFAULT_CITIES,
@@ -15,89 +14,128 @@ from backend.urban_resilience.config import (
     N_PAIRS_PER_RUN,
     RUNS_PER_SETTING,
 )
-from backend.urban_resilience.experiments import run_single_scenario_for_city
+from backend.urban_resilience.parallel import (
+    SweepJob,
+    iter_sweep_jobs,
+    make_sweep_jobs,
+    sweep_job_keys,
+)
+from backend.urban_resilience.result_store import ResultStore
+
+
+def default_out_dir() -> Path:
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return Path("data/batch_results") / f"urban_resilience_batch_{ts}"
 
 
-def run_full_batch() -> pd.DataFrame:
+def run_full_batch(
+    workers: Optional[int] = None,
+    out_dir: Optional[Path] = None,
+    resume: bool = False,
+) -> ResultStore:
     """
-    Run all (city, scenario, severity) combinations and
-    return a single concatenated DataFrame.
+    Run all (city, scenario, severity) combinations, streaming results into
+    a `ResultStore` under `out_dir`, and return the store.
 
     Each row in the result is ONE run of:
         - one city
         - one scenario
         - one severity
         - with `N_PAIRS_PER_RUN` OD pairs
-    """
-    all_results: List[pd.DataFrame] = []
 
-    total_jobs = (
-        len(DEFAULT_CITIES)
-        * len(SCENARIOS)
-        * len(SEVERITIES)
+    Jobs (one severity sweep per city × scenario) run on `workers`
+    processes (default `BATCH_WORKERS`); each job draws its seed from
+    `SeedSequence(42).spawn`, so the result is identical for any worker
+    count. Every job is appended to the store as soon as it finishes, so
+    memory stays flat and an interrupted batch loses at most the jobs in
+    flight. With `resume`, jobs whose rows are all in the store's manifest
+    are skipped.
+    """
+    out_dir = Path(out_dir) if out_dir is not None else default_out_dir()
+    store = ResultStore(out_dir)
+    if store.exists() and not resume:
+        raise FileExistsError(
+            f"{out_dir} already holds batch results; pass resume=True (--resume) "
+            "to continue it or choose another output directory"
+        )
+
+    jobs = make_sweep_jobs(
+        DEFAULT_CITIES,
+        SCENARIOS,
+        SEVERITIES,
+        n_pairs=N_PAIRS_PER_RUN,
+        runs=RUNS_PER_SETTING,
+        seed=42,  # fixed root seed → reproducible RNG streams
     )
-    job_idx = 0
-
-    for city in DEFAULT_CITIES:
-        for scenario in SCENARIOS:
-            for severity in SEVERITIES:
-                job_idx += 1
+    todo: List[SweepJob] = [
+        job for job in jobs if not store.is_complete(sweep_job_keys(job))
+    ]
+    total_jobs = len(jobs)
+    finished = total_jobs - len(todo)
+    if finished:
+        print(f"[resume] {finished}/{total_jobs} jobs already in {out_dir}")
+
+    for job, df in iter_sweep_jobs(todo, workers=workers, store_root=str(out_dir)):
+        finished += 1
+        print(f"[{finished}/{total_jobs}] {job.city} | {job.scenario}")
+
+        # Sanity: make sure core columns exist
+        required_cols = {"city", "scenario", "severity", "run"}
+        missing = required_cols - set(df.columns)
+        if missing:
+            raise ValueError(
+                f"Missing expected columns from run_severity_sweep_for_city: {missing}"
+            )
+
+        # Quick debug print for top-level metrics if present
+        if "avg_ratio" in df.columns and "pct_disconnected" in df.columns:
+            for severity, sub in df.groupby("severity", sort=False):
                 print(
-                    f"[{job_idx}/{total_jobs}] "
-                    f"{city} | {scenario} | severity={severity}"
-                )
-
-                df = run_single_scenario_for_city(
-                    city=city,
-                    scenario=scenario,
-                    severity=severity,
-                    n_pairs=N_PAIRS_PER_RUN,
-                    runs=RUNS_PER_SETTING,
-                    seed=42,  # fixed seed → reproducible RNG stream
+                    f"    severity={severity}: mean avg_ratio={sub['avg_ratio'].mean():.3f}, "
+                    f"mean pct_disconnected={sub['pct_disconnected'].mean():.1f}"
                 )
 
-                # Sanity: make sure core columns exist
-                required_cols = {"city", "scenario", "severity", "run"}
-                missing = required_cols - set(df.columns)
-                if missing:
-                    raise ValueError(
-                        f"Missing expected columns from run_single_scenario_for_city: {missing}"
-                    )
+    return store
 
-                # Quick debug print for top-level metrics if present
-                if "delay_ratio" in df.columns and "disconnected_od_ratio" in df.columns:
-                    mean_delay = df["delay_ratio"].mean()
-                    mean_disc = df["disconnected_od_ratio"].mean()
-                    print(
-                        f"    -> mean delay_ratio={mean_delay:.3f}, "
-                        f"mean disconnected_od_ratio={mean_disc:.3f}"
-                    )
 
-                all_results.append(df)
-
-    full_df = pd.concat(all_results, ignore_index=True)
-    return full_df
-
-
-def save_batch_results(df: pd.DataFrame) -> Path:
+def save_batch_results(store: ResultStore) -> Path:
     """
-    Save the batch DataFrame to a timestamped CSV and return the path.
+    Consolidate the store's parts (in job order) into `results.parquet` and
+    `results.csv` next to them, and return the CSV path.
     """
-    out_dir = Path("data/batch_results")
-    out_dir.mkdir(parents=True, exist_ok=True)
-
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    out_path = out_dir / f"urban_resilience_batch_{ts}.csv"
-
-    df.to_csv(out_path, index=False)
-    print(f"\n[OK] Saved {len(df)} rows to {out_path}")
-    return out_path
+    parquet_path = store.root / "results.parquet"
+    csv_path = store.root / "results.csv"
+    n_rows = store.consolidate(parquet_path=parquet_path, csv_path=csv_path)
+    print(f"\n[OK] Saved {n_rows} rows to {parquet_path} and {csv_path}")
+    return csv_path
 
 
 def main() -> None:
-    df = run_full_batch()
-    save_batch_results(df)
+    parser = argparse.ArgumentParser(description="Run the full resilience batch.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="worker processes (default: URBAN_RESILIENCE_WORKERS or CPU count)",
+    )
+    parser.add_argument(
+        "--out-dir",
+        type=Path,
+        default=None,
+        help="result directory (default: data/batch_results/urban_resilience_batch_<timestamp>)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue the batch in --out-dir, skipping jobs already recorded",
+    )
+    args = parser.parse_args()
+    if args.resume and args.out_dir is None:
+        parser.error("--resume needs --out-dir")
+
+    store = run_full_batch(workers=args.workers, out_dir=args.out_dir, resume=args.resume)
+    save_batch_results(store)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
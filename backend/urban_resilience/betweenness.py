@@ -0,0 +1,698 @@
+# backend/urban_resilience/betweenness.py
+
+from __future__ import annotations
+import argparse
+import multiprocessing as mp
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import networkx as nx
+import numpy as np
+from scipy.stats import norm
+
+from .config import BETWEENNESS_WORKERS
+
+# Sources per task. Fixed, so the partial sums (and the float result) do
+# not depend on how many workers run them.
+CHUNK_SOURCES = 16
+
+
+class UndirectedCSR:
+    """
+    Symmetric CSR adjacency of a simple undirected graph: node `i` is the
+    i-th node of `list(G)` and undirected edge `e` the e-th of `G.edges()`;
+    both arcs of an edge carry its index in `eids`.
+    """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, eids: np.ndarray, n_edges: int):
+        self.indptr = indptr
+        self.indices = indices
+        self.eids = eids
+        self.n_nodes = len(indptr) - 1
+        self.n_edges = n_edges
+
+    @classmethod
+    def from_graph(cls, G: nx.Graph) -> "UndirectedCSR":
+        pos = {node: i for i, node in enumerate(G)}
+        edges = np.asarray(
+            [(pos[u], pos[v]) for u, v in G.edges()], dtype=np.int64
+        ).reshape(-1, 2)
+        m = len(edges)
+        # Self-loops never lie on a shortest path; keep one arc for them.
+        loops = edges[:, 0] == edges[:, 1]
+        src = np.concatenate([edges[:, 0], edges[~loops, 1]])
+        dst = np.concatenate([edges[:, 1], edges[~loops, 0]])
+        eid = np.concatenate([np.arange(m), np.flatnonzero(~loops)])
+        order = np.argsort(src, kind="stable")
+        indptr = np.zeros(len(pos) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=len(pos)), out=indptr[1:])
+        return cls(indptr, dst[order].astype(np.int32), eid[order].astype(np.int64), m)
+
+    def without(self, removed: np.ndarray) -> "UndirectedCSR":
+        """
+        Same nodes and edge numbering, minus the edges flagged in `removed`
+        (a boolean mask over undirected edges).
+        """
+        keep = ~removed[self.eids]
+        src = np.repeat(np.arange(self.n_nodes), np.diff(self.indptr))[keep]
+        indptr = np.zeros(self.n_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=self.n_nodes), out=indptr[1:])
+        return UndirectedCSR(indptr, self.indices[keep], self.eids[keep], self.n_edges)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {"indptr": self.indptr, "indices": self.indices, "eids": self.eids}
+
+
+def sample_sources(G: nx.Graph, k: Optional[int], seed: Optional[int]) -> np.ndarray:
+    """
+    Indices of the sampled source nodes, drawn exactly as NetworkX does
+    (`random.Random(seed).sample(list(G), k)`); all nodes when `k` is None.
+    """
+    if k is None:
+        return np.arange(G.number_of_nodes(), dtype=np.int64)
+    pos = {node: i for i, node in enumerate(G)}
+    return np.asarray(
+        [pos[s] for s in random.Random(seed).sample(list(G.nodes()), k)],
+        dtype=np.int64,
+    )
+
+
+def _brandes_chunk(
+    csr: UndirectedCSR,
+    sources: np.ndarray,
+    want_nodes: bool,
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Unscaled edge (and node, endpoints excluded) betweenness contributions
+    of `sources`, with level-synchronous vectorized BFS and accumulation.
+    """
+    n = csr.n_nodes
+    indptr, indices, eids = csr.indptr, csr.indices, csr.eids
+    edge_bc = np.zeros(csr.n_edges, dtype=np.float64)
+    node_bc = np.zeros(n, dtype=np.float64) if want_nodes else None
+
+    for s in sources.tolist():
+        dist = np.full(n, -1, dtype=np.int64)
+        sigma = np.zeros(n, dtype=np.float64)
+        dist[s] = 0
+        sigma[s] = 1.0
+        frontier = np.array([s], dtype=np.int64)
+        levels: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        depth = 0
+
+        # Forward: one BFS level at a time, recording shortest-path DAG arcs.
+        while frontier.size:
+            starts = indptr[frontier]
+            counts = indptr[frontier + 1] - starts
+            total = int(counts.sum())
+            if total == 0:
+                break
+            offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+            arc = offsets + np.arange(total)
+            v = np.repeat(frontier, counts)
+            w = indices[arc].astype(np.int64)
+
+            fresh = np.unique(w[dist[w] < 0])
+            dist[fresh] = depth + 1
+            on_dag = dist[w] == depth + 1
+            v, w, e = v[on_dag], w[on_dag], eids[arc[on_dag]]
+            np.add.at(sigma, w, sigma[v])
+            levels.append((v, w, e))
+            frontier = fresh
+            depth += 1
+
+        # Backward: dependency accumulation, deepest level first.
+        delta = np.zeros(n, dtype=np.float64)
+        for v, w, e in reversed(levels):
+            c = sigma[v] * ((1.0 + delta[w]) / sigma[w])
+            edge_bc[e] += c
+            np.add.at(delta, v, c)
+
+        if want_nodes:
+            reached = np.flatnonzero(dist > 0)
+            node_bc[reached] += delta[reached]
+
+    return edge_bc, node_bc
+
+
+# Graph arrays of the worker process, attached from shared memory: the
+# pool's graph, its shared removed-edge mask, and the reduced graph for the
+# mask generation seen last.
+_WORKER_CSR: Optional[UndirectedCSR] = None
+_WORKER_REMOVED: Optional[np.ndarray] = None
+_WORKER_VIEW: Tuple[int, Optional[UndirectedCSR]] = (0, None)
+_WORKER_SHM: List[shared_memory.SharedMemory] = []
+
+
+def _attach_worker(specs: Dict[str, Tuple[str, Tuple[int, ...], str]], n_edges: int) -> None:
+    global _WORKER_CSR, _WORKER_REMOVED, _WORKER_VIEW
+    arrays = {}
+    for key, (name, shape, dtype) in specs.items():
+        # Spawned workers share the parent's resource tracker, so the
+        # segments stay registered once and the parent unlinks them.
+        shm = shared_memory.SharedMemory(name=name)
+        _WORKER_SHM.append(shm)
+        arrays[key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    _WORKER_CSR = UndirectedCSR(arrays["indptr"], arrays["indices"], arrays["eids"], n_edges)
+    _WORKER_REMOVED = arrays["removed"]
+    _WORKER_VIEW = (0, _WORKER_CSR)
+
+
+def _worker_chunk(sources: np.ndarray, want_nodes: bool, generation: int):
+    global _WORKER_VIEW
+    if _WORKER_VIEW[0] != generation:
+        csr = _WORKER_CSR if generation == 0 else _WORKER_CSR.without(_WORKER_REMOVED)
+        _WORKER_VIEW = (generation, csr)
+    return _brandes_chunk(_WORKER_VIEW[1], sources, want_nodes)
+
+
+def default_workers() -> int:
+    """
+    `BETWEENNESS_WORKERS` if set; otherwise every CPU on the main thread of
+    a top-level process, and 1 in a pool worker process or a secondary
+    thread (an API request, a replicate), so nested pools do not
+    oversubscribe the machine or pay the spawn cost per call.
+    """
+    if BETWEENNESS_WORKERS is not None:
+        return BETWEENNESS_WORKERS
+    if mp.parent_process() is not None:
+        return 1
+    if threading.current_thread() is not threading.main_thread():
+        return 1
+    return os.cpu_count() or 1
+
+
+def brandes_partials(
+    csr: UndirectedCSR,
+    sources: np.ndarray,
+    want_nodes: bool = False,
+    workers: Optional[int] = None,
+) -> List[Tuple[np.ndarray, Optional[np.ndarray]]]:
+    """
+    Unscaled Brandes sums of each chunk of `CHUNK_SOURCES` consecutive
+    `sources`, in chunk order (see `run_chunks`).
+    """
+    return run_chunks(csr, source_chunks(sources), want_nodes, workers)
+
+
+def source_chunks(sources: np.ndarray) -> List[np.ndarray]:
+    """
+    `sources` split into chunks of `CHUNK_SOURCES` (the last may be short).
+    """
+    return [
+        sources[i : i + CHUNK_SOURCES] for i in range(0, len(sources), CHUNK_SOURCES)
+    ]
+
+
+class BrandesPool:
+    """
+    Runs chunks of Brandes sources on one graph, minus a set of removed
+    edges that may grow between calls (see `run`).
+
+    With more than one worker, the graph arrays and the removed-edge mask
+    are copied to shared memory and a spawned process pool is started on
+    the first call that has more than one chunk; both are kept until
+    `close()`, so callers that run many rounds on the same graph (adaptive
+    sampling, recalculated attacks) pay for them once. Each worker rebuilds
+    its reduced graph only when the mask changed. With one worker chunks
+    run in-process. Use as a context manager.
+    """
+
+    def __init__(self, csr: UndirectedCSR, workers: Optional[int] = None):
+        self.csr = csr
+        self.workers = default_workers() if workers is None else workers
+        self._view: Tuple[Optional[np.ndarray], UndirectedCSR] = (None, csr)
+        self._generation = 0
+        self._segments: List[shared_memory.SharedMemory] = []
+        self._removed: Optional[np.ndarray] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> "BrandesPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def run(
+        self,
+        chunks: Sequence[np.ndarray],
+        want_nodes: bool = False,
+        removed: Optional[np.ndarray] = None,
+    ) -> List[Tuple[np.ndarray, Optional[np.ndarray]]]:
+        """
+        Unscaled Brandes sums of each chunk of sources, in order, on the
+        pool's graph without the edges flagged in `removed` (a boolean mask
+        over undirected edges). Each chunk's result does not depend on
+        where it ran.
+        """
+        mask = None if removed is None or not removed.any() else removed
+        if self.workers <= 1 or len(chunks) <= 1:
+            csr = self._reduced(mask)
+            return [_brandes_chunk(csr, chunk, want_nodes) for chunk in chunks]
+
+        if self._pool is None:
+            self._start()
+        if mask is None:
+            generation = 0
+        else:
+            if not np.array_equal(self._removed, mask):
+                self._removed[...] = mask
+                self._generation += 1
+            generation = self._generation
+        n = len(chunks)
+        return list(
+            self._pool.map(_worker_chunk, chunks, [want_nodes] * n, [generation] * n)
+        )
+
+    def _reduced(self, mask: Optional[np.ndarray]) -> UndirectedCSR:
+        if mask is None:
+            return self.csr
+        cached_mask, csr = self._view
+        if cached_mask is None or not np.array_equal(cached_mask, mask):
+            csr = self.csr.without(mask)
+            self._view = (mask.copy(), csr)
+        return csr
+
+    def _start(self) -> None:
+        arrays = dict(self.csr.arrays(), removed=np.zeros(self.csr.n_edges, dtype=bool))
+        specs = {}
+        try:
+            for key, arr in arrays.items():
+                shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+                self._segments.append(shm)
+                view = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)
+                view[...] = arr
+                specs[key] = (shm.name, arr.shape, arr.dtype.str)
+                if key == "removed":
+                    self._removed = view
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=mp.get_context("spawn"),
+                initializer=_attach_worker,
+                initargs=(specs, self.csr.n_edges),
+            )
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        self._removed = None
+        for shm in self._segments:
+            shm.close()
+            shm.unlink()
+        self._segments = []
+
+
+def run_chunks(
+    csr: UndirectedCSR,
+    chunks: Sequence[np.ndarray],
+    want_nodes: bool = False,
+    workers: Optional[int] = None,
+) -> List[Tuple[np.ndarray, Optional[np.ndarray]]]:
+    """
+    Unscaled Brandes sums of each chunk of sources, in order, on a
+    `BrandesPool` of `workers` processes (default `default_workers()`; 1
+    runs in-process) that lives for this call only.
+    """
+    workers = default_workers() if workers is None else workers
+    with BrandesPool(csr, min(workers, len(chunks))) as pool:
+        return pool.run(chunks, want_nodes)
+
+
+def brandes_scores(
+    csr: UndirectedCSR,
+    sources: np.ndarray,
+    want_nodes: bool = False,
+    workers: Optional[int] = None,
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Unscaled Brandes sums over `sources` (see `brandes_partials`). Partial
+    sums are added in chunk order, so the result is bit-identical for any
+    worker count.
+    """
+    edge_bc = np.zeros(csr.n_edges, dtype=np.float64)
+    node_bc = np.zeros(csr.n_nodes, dtype=np.float64) if want_nodes else None
+    for edge_part, node_part in brandes_partials(csr, sources, want_nodes, workers):
+        edge_bc += edge_part
+        if want_nodes:
+            node_bc += node_part
+    return edge_bc, node_bc
+
+
+def edge_betweenness_scores(
+    G: nx.Graph,
+    k: Optional[int] = None,
+    seed: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> Tuple[List[Tuple[Hashable, Hashable]], np.ndarray]:
+    """
+    Normalized edge betweenness of a simple undirected graph, computed like
+    `nx.edge_betweenness_centrality(G, k=k, seed=seed)` (unweighted, same
+    sampled sources) but with vectorized, parallel Brandes.
+
+    Returns (edges, scores) with edges in `G.edges()` order.
+    """
+    n = G.number_of_nodes()
+    csr = UndirectedCSR.from_graph(G)
+    sources = sample_sources(G, k, seed)
+    edge_bc, _ = brandes_scores(csr, sources, workers=workers)
+    if n >= 2:
+        edge_bc *= 1 / (len(sources) * (n - 1))
+    return list(G.edges()), edge_bc
+
+
+def betweenness_centrality(
+    G: nx.Graph,
+    k: Optional[int] = None,
+    seed: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> Dict[Hashable, float]:
+    """
+    Normalized node betweenness (endpoints excluded) of a simple undirected
+    graph, computed like `nx.betweenness_centrality(G, k=k, seed=seed)` but
+    with vectorized, parallel Brandes.
+    """
+    nodes = list(G)
+    n = len(nodes)
+    if k == n:
+        k = None
+    csr = UndirectedCSR.from_graph(G)
+    sources = sample_sources(G, k, seed)
+    _, node_bc = brandes_scores(csr, sources, want_nodes=True, workers=workers)
+
+    big_n = n - 1
+    if big_n >= 2:
+        if k is None:
+            node_bc *= 1 / (big_n * (big_n - 1))
+        else:
+            scale = np.full(n, 1 / (k * (big_n - 1)))
+            scale[sources] = 1 / ((k - 1) * (big_n - 1)) if k > 1 else np.nan
+            node_bc *= scale
+    return dict(zip(nodes, node_bc.tolist()))
+
+
+@dataclass(frozen=True)
+class AdaptiveBetweenness:
+    """
+    Result of `adaptive_edge_betweenness`. `error` is the estimated expected
+    fraction of a top set that is misplaced by sampling error, and `churn`
+    the fraction of it that changed in the last round (both: worst over the
+    requested fractions; 0 when every node was a source).
+    """
+
+    edges: List[Tuple[Hashable, Hashable]]
+    scores: np.ndarray
+    n_sources: int
+    error: float
+    churn: float
+    converged: bool
+
+
+def _top_sets(scores: np.ndarray, sizes: Sequence[int]) -> List[np.ndarray]:
+    ranked = np.argsort(-scores, kind="stable")
+    return [ranked[:t] for t in sizes]
+
+
+def _top_set_error(
+    scores: np.ndarray, stderr: np.ndarray, sizes: Sequence[int]
+) -> float:
+    """
+    Expected fraction of a top set that is misplaced: with normal errors,
+    an edge whose estimate sits `d` above (below) the cut between the t-th
+    and (t+1)-th score truly belongs below (above) it with probability
+    `Phi(-d / stderr)`. Worst over the top-set sizes.
+    """
+    ranked = np.sort(scores)[::-1]
+    error = 0.0
+    for t in sizes:
+        if t >= len(scores):
+            continue
+        cut = 0.5 * (ranked[t - 1] + ranked[t])
+        d = np.abs(scores - cut)
+        noisy = stderr > 0
+        p = np.zeros(len(scores))
+        p[noisy] = norm.sf(d[noisy] / stderr[noisy])
+        error = max(error, float(p.sum()) / t)
+    return error
+
+
+def adaptive_edge_betweenness(
+    G: nx.Graph,
+    top_fractions: Sequence[float],
+    tolerance: float = 0.05,
+    min_sources: int = 64,
+    max_sources: Optional[int] = None,
+    seed: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> AdaptiveBetweenness:
+    """
+    Sampled edge betweenness (scaled like `edge_betweenness_scores`) with as
+    many sources as it takes to pin down the top `f` share of edges for
+    every `f` in `top_fractions`.
+
+    Sources are drawn in one random order for `seed` and added in rounds
+    that double the sample, starting at `min_sources`. Per-chunk means give
+    each edge score a standard error, from which the expected misplaced
+    share of each top set follows (see `_top_set_error`). Sampling stops
+    once that error and the share of the top set that changed since the
+    last round are both at most `tolerance` for every fraction, or when
+    `max_sources` (default: all nodes, i.e. exact) is reached. All rounds
+    share one `BrandesPool`. The result does not depend on `workers`.
+    """
+    if not 0 < tolerance < 1:
+        raise ValueError(f"tolerance must be in (0, 1), got {tolerance}")
+    n = G.number_of_nodes()
+    csr = UndirectedCSR.from_graph(G)
+    m = csr.n_edges
+    limit = n if max_sources is None else min(max_sources, n)
+    order = sample_sources(G, limit, seed)
+    sizes = [min(m, max(1, int(m * f))) for f in top_fractions]
+
+    total = np.zeros(m, dtype=np.float64)
+    total_sq = np.zeros(m, dtype=np.float64)
+    n_chunks = 0
+    used = 0
+    # Whole chunks per round, so chunk means are comparable.
+    target = min(-(-max(min_sources, 2 * CHUNK_SOURCES) // CHUNK_SOURCES) * CHUNK_SOURCES, limit)
+    tops: Optional[List[np.ndarray]] = None
+    error = churn = 1.0
+
+    with BrandesPool(csr, workers) as pool:
+        while used < limit:
+            for edge_part, _ in pool.run(source_chunks(order[used:target])):
+                # Chunk means are (nearly) equal-sized i.i.d. samples of the score.
+                chunk_mean = edge_part / CHUNK_SOURCES
+                total += edge_part
+                total_sq += chunk_mean * chunk_mean
+                n_chunks += 1
+            used = target
+            mean = total / used
+
+            previous, tops = tops, _top_sets(mean, sizes)
+            if used == n:
+                # Every node is a source: exact betweenness.
+                error = churn = 0.0
+                break
+            var = np.maximum(total_sq / n_chunks - (total / (n_chunks * CHUNK_SOURCES)) ** 2, 0.0)
+            stderr = np.sqrt(var / max(n_chunks - 1, 1))
+            error = _top_set_error(mean, stderr, sizes)
+            if previous is not None:
+                churn = max(
+                    (
+                        np.setdiff1d(cur, prev, assume_unique=True).size / max(len(cur), 1)
+                        for cur, prev in zip(tops, previous)
+                    ),
+                    default=0.0,
+                )
+                if error <= tolerance and churn <= tolerance:
+                    break
+            target = min(2 * used, limit)
+
+    scores = total / (used * (n - 1)) if n >= 2 else total
+    return AdaptiveBetweenness(
+        edges=list(G.edges()),
+        scores=scores,
+        n_sources=used,
+        error=float(error),
+        churn=float(churn),
+        converged=bool(error <= tolerance and churn <= tolerance),
+    )
+
+
+class IncrementalEdgeBetweenness:
+    """
+    Sampled edge betweenness (scaled like `edge_betweenness_scores`, same
+    sources) of a graph that loses edges over time.
+
+    The sources are kept in fixed chunks with one partial score vector per
+    chunk. An edge with a positive partial lies on a shortest-path DAG of
+    some source in the chunk, so after `remove(edges)` only chunks whose
+    partials touch a removed edge are recomputed on the reduced graph; the
+    others cannot have changed. Scores are summed in chunk order, so they
+    equal a from-scratch computation on the reduced graph bit for bit.
+    Memory: one float vector per chunk (`k / CHUNK_SOURCES` x n_edges).
+
+    Every computation runs on one `BrandesPool` over the intact graph
+    (removals travel as its edge mask); use as a context manager, or call
+    `close()`, to release it.
+    """
+
+    def __init__(
+        self,
+        G: nx.Graph,
+        k: Optional[int] = None,
+        seed: Optional[int] = None,
+        workers: Optional[int] = None,
+    ):
+        n = G.number_of_nodes()
+        self.edges = list(G.edges())
+        self.csr = UndirectedCSR.from_graph(G)
+        self.removed = np.zeros(self.csr.n_edges, dtype=bool)
+        sources = sample_sources(G, k, seed)
+        self.scale = 1 / (len(sources) * (n - 1)) if n >= 2 else 1.0
+        self.chunks = source_chunks(sources)
+        self.pool = BrandesPool(self.csr, workers)
+        try:
+            self.partials = [p for p, _ in self.pool.run(self.chunks)]
+        except BaseException:
+            self.pool.close()
+            raise
+        self.recomputed = 0
+
+    def __enter__(self) -> "IncrementalEdgeBetweenness":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.pool.close()
+
+    def scores(self) -> np.ndarray:
+        total = np.zeros(self.csr.n_edges, dtype=np.float64)
+        for part in self.partials:
+            total += part
+        return total * self.scale
+
+    def remove(self, eids: np.ndarray) -> int:
+        """
+        Drop undirected edges `eids` and update the scores; returns how many
+        source chunks had to be recomputed.
+        """
+        eids = np.asarray(eids, dtype=np.int64)
+        self.removed[eids] = True
+        stale = [i for i, part in enumerate(self.partials) if (part[eids] > 0).any()]
+        fresh = self.pool.run([self.chunks[i] for i in stale], removed=self.removed)
+        for i, (part, _) in zip(stale, fresh):
+            self.partials[i] = part
+        self.recomputed += len(stale)
+        return len(stale)
+
+
+def adaptive_attack_order(
+    G: nx.Graph,
+    n_remove: int,
+    rounds: int,
+    k: Optional[int] = None,
+    seed: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> Tuple[List[Tuple[Hashable, Hashable]], Dict[str, int]]:
+    """
+    Recalculated targeted attack: remove `n_remove` edges of `G` in
+    `rounds` equal batches, each batch being the highest-betweenness edges
+    still present, with betweenness updated (`IncrementalEdgeBetweenness`)
+    after every batch. Ties go to the earlier edge in `G.edges()`.
+
+    Returns every edge of `G` in attack order (the `n_remove` attacked
+    edges first, then the rest by the last scores computed) and counts of
+    rounds run and of source chunks computed initially and recomputed.
+    """
+    with IncrementalEdgeBetweenness(G, k=k, seed=seed, workers=workers) as tracker:
+        n_remove = min(n_remove, tracker.csr.n_edges)
+        batch = -(-n_remove // max(rounds, 1)) if n_remove else 0
+
+        removed: List[int] = []
+        n_rounds = 0
+        while True:
+            scores = tracker.scores()
+            alive = np.flatnonzero(~tracker.removed)
+            ranked = alive[np.argsort(-scores[alive], kind="stable")]
+            if len(removed) >= n_remove:
+                removed.extend(ranked.tolist())
+                break
+            take = ranked[: min(batch, n_remove - len(removed))]
+            removed.extend(take.tolist())
+            n_rounds += 1
+            if len(removed) >= n_remove:
+                removed.extend(ranked[len(take) :].tolist())
+                break
+            tracker.remove(take)
+
+    stats = {
+        "rounds": n_rounds,
+        "chunks": len(tracker.chunks),
+        "chunks_recomputed": tracker.recomputed,
+    }
+    return [tracker.edges[i] for i in removed], stats
+
+
+def benchmark(
+    city: str,
+    k: int = 300,
+    max_workers: Optional[int] = None,
+    seed: int = 0,
+    cache_dir: str = "graphs",
+) -> None:
+    """
+    Time `edge_betweenness_scores` on one city with 1 .. `max_workers`
+    processes and check every result is identical to the serial one.
+    """
+    from .edge_selection import undirected_graph
+    from .graph_loader import load_compiled_city_graph
+
+    G = undirected_graph(load_compiled_city_graph(city, cache_dir=cache_dir))
+    max_workers = max_workers or default_workers()
+    print(f"{city}: {G.number_of_nodes()} nodes, {G.number_of_edges()} edges, k={k}")
+
+    reference = None
+    base = None
+    for workers in range(1, max_workers + 1):
+        t0 = time.perf_counter()
+        _, scores = edge_betweenness_scores(G, k=k, seed=seed, workers=workers)
+        elapsed = time.perf_counter() - t0
+        if reference is None:
+            reference, base = scores, elapsed
+        same = np.array_equal(scores, reference)
+        print(
+            f"  workers={workers}: {elapsed:.2f} s "
+            f"(x{base / elapsed:.2f}) identical={same}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Betweenness scaling benchmark.")
+    parser.add_argument("cities", nargs="*")
+    parser.add_argument("--k", type=int, default=300)
+    parser.add_argument("--max-workers", type=int, default=None)
+    parser.add_argument("--cache-dir", default="graphs")
+    args = parser.parse_args()
+
+    from .config import DEFAULT_CITIES
+
+    for city in args.cities or DEFAULT_CITIES[:1]:
+        benchmark(
+            city, k=args.k, max_workers=args.max_workers, cache_dir=args.cache_dir
+        )
+
+
+if __name__ == "__main__":
+    main()
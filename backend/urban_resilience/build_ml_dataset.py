@@ -1,16 +1,19 @@
 from __future__ import annotations
 
+import argparse
 import os
 from typing import List, Dict, Any
 
 import pandas as pd
 
 from .config import DEFAULT_CITIES, SCENARIOS
-from .graph_loader import load_city_graph
+from .graph_loader import load_city_graph, load_compiled_city_graph
 from .edge_selection import select_edges_for_scenario
 from .simulation import simulate_single_shock
+from .od_panel import get_od_panel
 from .usgs_flood import download_usgs_flood_features_for_city
 from .ml_features import compute_city_features
+from .result_store import ResultStore
 
 REPORT_CITIES = [
     "Chicago, Illinois, USA",
@@ -33,24 +36,54 @@ SEVERITIES = [0.05, 0.1, 0.2, 0.3]
 N_OD_PAIRS = 60
 
 
-def build_dataset(output_path: str = "data/resilience_dataset.csv") -> None:
+def build_dataset(
+    output_path: str = "data/resilience_dataset.csv",
+    resume: bool = False,
+) -> None:
     """
     Build a tabular dataset across cities × scenarios × severities.
 
     Each row: city, scenario, severity, structural features, resilience metrics.
+
+    Rows of every finished (city, scenario) are checkpointed to a
+    `ResultStore` in `<output_path stem>_parts/` and only consolidated into
+    `output_path` at the end; with `resume`, combinations already in the
+    store are skipped. The store is removed once the dataset is written, so
+    only an interrupted build leaves it behind.
     """
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-    rows: List[Dict[str, Any]] = []
-
-    for city in REPORT_CITIES:
+    store = ResultStore(
+        os.path.splitext(output_path)[0] + "_parts",
+        key_columns=("city", "scenario", "severity"),
+    )
+    if store.exists() and not resume:
+        raise FileExistsError(
+            f"{store.root} holds a previous build; pass resume=True (--resume) "
+            "or remove it"
+        )
+
+    def done(city: str, scenario: str) -> bool:
+        return store.is_complete((city, scenario, float(sev)) for sev in SEVERITIES)
+
+    for city_idx, city in enumerate(REPORT_CITIES):
+        if all(done(city, scenario) for scenario in SCENARIOS_FOR_ML):
+            print(f"\n=== Skipping city (done): {city} ===")
+            continue
         print(f"\n=== Processing city: {city} ===")
         G = load_city_graph(city, cache_dir="graphs")
 
         base_feats = compute_city_features(G)
-
-        for scenario in SCENARIOS_FOR_ML:
+        # Same OD pairs and baseline distances for every scenario/severity.
+        cg = load_compiled_city_graph(city, cache_dir="graphs")
+        panel = get_od_panel(cg, N_OD_PAIRS, seed=123)
+
+        for scenario_idx, scenario in enumerate(SCENARIOS_FOR_ML):
+            if done(city, scenario):
+                print(f"  Scenario (done): {scenario}")
+                continue
             print(f"  Scenario: {scenario}")
+            rows: List[Dict[str, Any]] = []
 
             use_usgs = scenario == "Highway Flood"
 
@@ -67,7 +100,7 @@ def build_dataset(output_path: str = "data/resilience_dataset.csv") -> None:
 
                 try:
                     edge_ids = select_edges_for_scenario(
-                        G,
+                        cg,
                         scenario=scenario,
                         severity=sev,
                         usgs_flood_polygons=flood_polys,
@@ -79,10 +112,9 @@ def build_dataset(output_path: str = "data/resilience_dataset.csv") -> None:
 
                 try:
                     metrics = simulate_single_shock(
-                        G,
+                        cg,
                         edge_ids_to_remove=edge_ids,
-                        n_pairs=N_OD_PAIRS,
-                        seed=123,
+                        od_panel=panel,
                     )
                 except Exception as e:
                     print(f"    [ERROR] simulation failed: {e}")
@@ -107,11 +139,28 @@ def build_dataset(output_path: str = "data/resilience_dataset.csv") -> None:
 
                 rows.append(row)
 
-    df = pd.DataFrame(rows)
-    print(f"\nSaving dataset with {len(df)} rows to: {output_path}")
-    df.to_csv(output_path, index=False)
-    print("Done.")
+            if rows:
+                store.append(
+                    pd.DataFrame(rows), tag=f"{city_idx:03d}-{scenario_idx:03d}"
+                )
+
+    print(f"\nSaving dataset to: {output_path}")
+    n_rows = store.consolidate(csv_path=output_path)
+    store.clear()
+    print(f"Done ({n_rows} rows).")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the ML resilience dataset.")
+    parser.add_argument("--output", default="data/resilience_dataset.csv")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="skip (city, scenario) combinations already checkpointed",
+    )
+    args = parser.parse_args()
+    build_dataset(args.output, resume=args.resume)
 
 
 if __name__ == "__main__":
-    build_dataset()
+    main()
@@ -0,0 +1,564 @@
+# backend/urban_resilience/compiled_graph.py
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import networkx as nx
+
+EdgeId = Tuple[int, int, int]
+
+# Bump whenever the on-disk layout changes so stale bundles get rebuilt.
+# v2: float64 weights and the `source_order` array.
+# v3: fingerprint covers every array (tags, geometry, ...) and the weight.
+FORMAT_VERSION = 3
+
+MAJOR_HIGHWAYS = {
+    "motorway",
+    "motorway_link",
+    "trunk",
+    "trunk_link",
+    "primary",
+    "primary_link",
+}
+
+# Bit positions inside the packed per-edge flag array.
+FLAG_BRIDGE = 0
+FLAG_TUNNEL = 1
+FLAG_MAJOR_HIGHWAY = 2
+_N_FLAGS = 3
+
+_ARRAY_FIELDS = (
+    "node_ids",
+    "x",
+    "y",
+    "indptr",
+    "targets",
+    "keys",
+    "travel_time",
+    "length",
+    "flags_packed",
+    "highway_codes",
+    "highway_labels",
+    "geom_offsets",
+    "geom_coords",
+    "source_order",
+)
+
+
+@dataclass
+class CompiledGraph:
+    """
+    Array-only representation of a city road network.
+
+    Nodes keep the order of the source NetworkX graph. Edges are stored in
+    CSR layout sorted by (source index, target index, key), so edge `i` runs
+    from `edge_sources[i]` to `targets[i]` and parallel edges are contiguous.
+    `source_order` lists the edge indices in the order `G.edges(keys=True)`
+    yielded them, so seeded selections can draw from the same sequence the
+    NetworkX code paths do.
+    """
+
+    node_ids: np.ndarray        # int64 OSM node ids, shape (n,)
+    x: np.ndarray               # float64 longitude, shape (n,)
+    y: np.ndarray               # float64 latitude, shape (n,)
+    indptr: np.ndarray          # int64 CSR offsets, shape (n + 1,)
+    targets: np.ndarray         # int32 target node index, shape (m,)
+    keys: np.ndarray            # int32 MultiDiGraph edge key, shape (m,)
+    travel_time: np.ndarray     # float64 seconds
+    length: np.ndarray          # float64 metres
+    flags_packed: np.ndarray    # uint8 packbits of (m, _N_FLAGS) booleans
+    highway_codes: np.ndarray   # int16 index into highway_labels (-1 = none)
+    highway_labels: np.ndarray  # unicode labels, list values joined by ";"
+    geom_offsets: np.ndarray    # int64 offsets into geom_coords, shape (m + 1,)
+    geom_coords: np.ndarray     # float64 (lon, lat) vertices, shape (k, 2)
+    source_order: np.ndarray    # int64 edge indices in NetworkX edge order, shape (m,)
+    weight: str = "travel_time"
+    fingerprint: str = ""
+    name: str = ""
+    path: str = ""              # bundle directory, if loaded from disk
+    _derived: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    # ---- sizes ----
+
+    @property
+    def n_nodes(self) -> int:
+        return int(self.node_ids.shape[0])
+
+    @property
+    def n_edges(self) -> int:
+        return int(self.targets.shape[0])
+
+    def number_of_nodes(self) -> int:
+        return self.n_nodes
+
+    def number_of_edges(self) -> int:
+        return self.n_edges
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(getattr(self, f).nbytes for f in _ARRAY_FIELDS))
+
+    # ---- derived views (computed lazily, never written to disk) ----
+
+    @property
+    def edge_sources(self) -> np.ndarray:
+        """
+        Source node index of every edge (the CSR row expanded to length m).
+        """
+        if "edge_sources" not in self._derived:
+            counts = np.diff(self.indptr)
+            self._derived["edge_sources"] = np.repeat(
+                np.arange(self.n_nodes, dtype=np.int32), counts
+            )
+        return self._derived["edge_sources"]
+
+    @property
+    def weights(self) -> np.ndarray:
+        """
+        Edge weights used for routing, as float64.
+        """
+        if "weights" not in self._derived:
+            w = self.travel_time if self.weight == "travel_time" else self.length
+            self._derived["weights"] = np.asarray(w, dtype=np.float64)
+        return self._derived["weights"]
+
+    @property
+    def source_rank(self) -> np.ndarray:
+        """
+        Position of every edge in the source graph's edge order (the inverse
+        permutation of `source_order`).
+        """
+        if "source_rank" not in self._derived:
+            rank = np.empty(self.n_edges, dtype=np.int64)
+            rank[self.source_order] = np.arange(self.n_edges, dtype=np.int64)
+            self._derived["source_rank"] = rank
+        return self._derived["source_rank"]
+
+    def in_source_order(self, edge_idx: np.ndarray) -> np.ndarray:
+        """
+        Reorder edge indices to follow the source graph's edge order.
+        """
+        edge_idx = np.asarray(edge_idx, dtype=np.int64)
+        return edge_idx[np.argsort(self.source_rank[edge_idx], kind="stable")]
+
+    def _flags(self) -> np.ndarray:
+        if "flags" not in self._derived:
+            bits = np.unpackbits(self.flags_packed, count=self.n_edges * _N_FLAGS)
+            self._derived["flags"] = bits.reshape(self.n_edges, _N_FLAGS).astype(bool)
+        return self._derived["flags"]
+
+    @property
+    def is_bridge(self) -> np.ndarray:
+        return self._flags()[:, FLAG_BRIDGE]
+
+    @property
+    def is_tunnel(self) -> np.ndarray:
+        return self._flags()[:, FLAG_TUNNEL]
+
+    @property
+    def is_major_highway(self) -> np.ndarray:
+        return self._flags()[:, FLAG_MAJOR_HIGHWAY]
+
+    def highway_value(self, edge_idx: int):
+        """
+        Highway tag of one edge in the same shape osmnx uses (str, list or None).
+        """
+        code = int(self.highway_codes[edge_idx])
+        if code < 0:
+            return None
+        label = str(self.highway_labels[code])
+        return label.split(";") if ";" in label else label
+
+    def edge_coords(self, edge_idx: int) -> np.ndarray:
+        """
+        (lon, lat) vertices of one edge's geometry.
+        """
+        start = int(self.geom_offsets[edge_idx])
+        stop = int(self.geom_offsets[edge_idx + 1])
+        return self.geom_coords[start:stop]
+
+    # ---- id <-> index lookups ----
+
+    def _node_sort(self) -> Tuple[np.ndarray, np.ndarray]:
+        if "node_sort" not in self._derived:
+            order = np.argsort(self.node_ids, kind="stable")
+            self._derived["node_sort"] = (order, self.node_ids[order])
+        return self._derived["node_sort"]
+
+    def node_index(self, node_ids) -> np.ndarray:
+        """
+        Map OSM node ids to node indices. Raises KeyError for unknown ids.
+        """
+        ids = np.asarray(node_ids, dtype=np.int64)
+        order, sorted_ids = self._node_sort()
+        pos = np.searchsorted(sorted_ids, ids)
+        pos = np.clip(pos, 0, max(len(sorted_ids) - 1, 0))
+        if ids.size and (len(sorted_ids) == 0 or np.any(sorted_ids[pos] != ids)):
+            raise KeyError("Unknown node id(s) for this graph.")
+        return order[pos]
+
+    def _edge_codes(self) -> np.ndarray:
+        if "edge_codes" not in self._derived:
+            kmax = int(self.keys.max()) + 1 if self.n_edges else 1
+            self._derived["edge_kmax"] = kmax
+            self._derived["edge_codes"] = (
+                self.edge_sources.astype(np.int64) * self.n_nodes
+                + self.targets.astype(np.int64)
+            ) * kmax + self.keys.astype(np.int64)
+        return self._derived["edge_codes"]
+
+    def edge_index(self, edge_ids: Iterable[EdgeId]) -> np.ndarray:
+        """
+        Map (u, v, key) edge ids to edge indices. Edges that do not exist in
+        the graph are dropped, mirroring `G.has_edge(u, v, k)` checks.
+        """
+        if isinstance(edge_ids, np.ndarray) and edge_ids.ndim == 1:
+            return edge_ids.astype(np.int64)
+        arr = np.asarray(list(edge_ids), dtype=np.int64).reshape(-1, 3)
+        if arr.shape[0] == 0 or self.n_edges == 0:
+            return np.empty(0, dtype=np.int64)
+
+        order, sorted_ids = self._node_sort()
+        pu = np.clip(np.searchsorted(sorted_ids, arr[:, 0]), 0, len(sorted_ids) - 1)
+        pv = np.clip(np.searchsorted(sorted_ids, arr[:, 1]), 0, len(sorted_ids) - 1)
+        known = (sorted_ids[pu] == arr[:, 0]) & (sorted_ids[pv] == arr[:, 1])
+
+        codes = self._edge_codes()
+        kmax = self._derived["edge_kmax"]
+        keys = arr[:, 2]
+        known &= (keys >= 0) & (keys < kmax)
+        wanted = (order[pu].astype(np.int64) * self.n_nodes + order[pv]) * kmax + keys
+        pos = np.clip(np.searchsorted(codes, wanted), 0, len(codes) - 1)
+        found = known & (codes[pos] == wanted)
+        return pos[found]
+
+    def edge_ids(self, edge_idx: Optional[np.ndarray] = None) -> List[EdgeId]:
+        """
+        Map edge indices back to (u, v, key) tuples of OSM ids.
+        """
+        if edge_idx is None:
+            edge_idx = np.arange(self.n_edges)
+        edge_idx = np.asarray(edge_idx, dtype=np.int64)
+        u = self.node_ids[self.edge_sources[edge_idx]]
+        v = self.node_ids[self.targets[edge_idx]]
+        k = self.keys[edge_idx]
+        return list(zip(u.tolist(), v.tolist(), k.tolist()))
+
+
+def _is_major_highway(val) -> bool:
+    vals = val if isinstance(val, (list, tuple, set)) else [val]
+    return any(x in MAJOR_HIGHWAYS for x in vals if isinstance(x, str))
+
+
+def _content_fingerprint(arrays: Dict[str, np.ndarray], weight: str) -> str:
+    """
+    Hash of every array (topology, weights, tags, geometry, source edge
+    order) and the routing weight: everything artifacts are derived from.
+    """
+    h = hashlib.sha1(weight.encode())
+    for name in _ARRAY_FIELDS:
+        h.update(name.encode())
+        h.update(np.ascontiguousarray(arrays[name]).tobytes())
+    return h.hexdigest()
+
+
+def compile_graph(
+    G: nx.MultiDiGraph,
+    name: str = "",
+) -> CompiledGraph:
+    """
+    Flatten an OSMnx MultiDiGraph into a CompiledGraph.
+
+    Missing weights default to 1.0, matching how NetworkX treats edges
+    without the weight attribute during shortest-path searches. Weights stay
+    float64 so distances on bundles and in-memory views match NetworkX bit
+    for bit.
+    """
+    nodes = list(G.nodes())
+    n = len(nodes)
+    pos = {nid: i for i, nid in enumerate(nodes)}
+
+    node_ids = np.asarray(nodes, dtype=np.int64)
+    x = np.asarray([G.nodes[nid].get("x", np.nan) for nid in nodes], dtype=np.float64)
+    y = np.asarray([G.nodes[nid].get("y", np.nan) for nid in nodes], dtype=np.float64)
+
+    src: List[int] = []
+    tgt: List[int] = []
+    keys: List[int] = []
+    travel_time: List[float] = []
+    length: List[float] = []
+    flags: List[Tuple[bool, bool, bool]] = []
+    hw_codes: List[int] = []
+    hw_labels: Dict[str, int] = {}
+    geoms: List[Optional[np.ndarray]] = []
+    has_travel_time = False
+
+    for u, v, k, data in G.edges(keys=True, data=True):
+        src.append(pos[u])
+        tgt.append(pos[v])
+        keys.append(int(k))
+        if "travel_time" in data:
+            has_travel_time = True
+        travel_time.append(float(data.get("travel_time", 1.0)))
+        length.append(float(data.get("length", 1.0)))
+
+        hw = data.get("highway")
+        if hw is None:
+            hw_codes.append(-1)
+        else:
+            label = ";".join(hw) if isinstance(hw, (list, tuple)) else str(hw)
+            hw_codes.append(hw_labels.setdefault(label, len(hw_labels)))
+
+        flags.append(
+            (
+                data.get("bridge") is not None,
+                data.get("tunnel") is not None,
+                _is_major_highway(hw),
+            )
+        )
+
+        geom = data.get("geometry")
+        geoms.append(np.asarray(geom.coords, dtype=np.float64) if geom is not None else None)
+
+    m = len(src)
+    src_arr = np.asarray(src, dtype=np.int64)
+    tgt_arr = np.asarray(tgt, dtype=np.int64)
+    key_arr = np.asarray(keys, dtype=np.int64)
+    order = np.lexsort((key_arr, tgt_arr, src_arr)) if m else np.empty(0, dtype=np.int64)
+
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    if m:
+        np.cumsum(np.bincount(src_arr, minlength=n), out=indptr[1:])
+
+    # Edges without an explicit geometry are straight segments u -> v.
+    coords: List[np.ndarray] = []
+    geom_offsets = np.zeros(m + 1, dtype=np.int64)
+    for out_i, in_i in enumerate(order.tolist()):
+        g = geoms[in_i]
+        if g is None:
+            g = np.array(
+                [[x[src[in_i]], y[src[in_i]]], [x[tgt[in_i]], y[tgt[in_i]]]],
+                dtype=np.float64,
+            )
+        coords.append(g)
+        geom_offsets[out_i + 1] = geom_offsets[out_i] + len(g)
+
+    flag_arr = np.asarray(flags, dtype=bool).reshape(m, _N_FLAGS)[order]
+    source_order = np.empty(m, dtype=np.int64)
+    source_order[order] = np.arange(m, dtype=np.int64)
+
+    arrays = {
+        "node_ids": node_ids,
+        "x": x,
+        "y": y,
+        "indptr": indptr,
+        "targets": tgt_arr[order].astype(np.int32),
+        "keys": key_arr[order].astype(np.int32),
+        "travel_time": np.asarray(travel_time, dtype=np.float64)[order],
+        "length": np.asarray(length, dtype=np.float64)[order],
+        "flags_packed": np.packbits(flag_arr.ravel()),
+        "highway_codes": np.asarray(hw_codes, dtype=np.int16)[order],
+        "highway_labels": np.asarray(list(hw_labels), dtype=str),
+        "geom_offsets": geom_offsets,
+        "geom_coords": (
+            np.concatenate(coords) if coords else np.empty((0, 2), dtype=np.float64)
+        ),
+        "source_order": source_order,
+    }
+
+    weight = "travel_time" if has_travel_time else "length"
+    return CompiledGraph(
+        **arrays,
+        weight=weight,
+        fingerprint=_content_fingerprint(arrays, weight),
+        name=name,
+    )
+
+
+# Compiled views of in-memory NetworkX graphs, keyed by id(G). Entries are
+# dropped by a weakref finalizer when G is garbage collected, so a new graph
+# that reuses the id never sees a stale view.
+_COMPILED_VIEWS: Dict[int, CompiledGraph] = {}
+_COMPILED_VIEWS_LOCK = threading.Lock()
+
+
+def as_compiled(G: nx.MultiDiGraph | CompiledGraph) -> CompiledGraph:
+    """
+    Return `G` itself if it is already compiled, else a memoised compiled
+    view of the NetworkX graph (built on first use).
+
+    The view is a snapshot: mutating `G` afterwards is not reflected.
+    """
+    if isinstance(G, CompiledGraph):
+        return G
+    with _COMPILED_VIEWS_LOCK:
+        cg = _COMPILED_VIEWS.get(id(G))
+    if cg is None:
+        cg = compile_graph(G)
+        with _COMPILED_VIEWS_LOCK:
+            _COMPILED_VIEWS[id(G)] = cg
+        weakref.finalize(G, _COMPILED_VIEWS.pop, id(G), None)
+    return cg
+
+
+def peek_compiled_view(G: nx.MultiDiGraph) -> Optional[CompiledGraph]:
+    """
+    The memoised compiled view of `G`, if one has been built (never builds).
+    """
+    with _COMPILED_VIEWS_LOCK:
+        return _COMPILED_VIEWS.get(id(G))
+
+
+def forget_compiled_view(G: nx.MultiDiGraph) -> None:
+    """
+    Drop the memoised compiled view of `G` (e.g. after editing it in place),
+    so the next `as_compiled(G)` recompiles it.
+    """
+    with _COMPILED_VIEWS_LOCK:
+        _COMPILED_VIEWS.pop(id(G), None)
+
+
+def save_compiled_graph(cg: CompiledGraph, path: str) -> None:
+    """
+    Write a CompiledGraph as a directory of raw `.npy` arrays plus `meta.json`.
+
+    The bundle is written to a temporary sibling directory and renamed into
+    place, so readers never see a half-written bundle. If another writer
+    got there first, its bundle is kept and ours is discarded.
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(prefix=os.path.basename(path) + ".", dir=parent)
+    try:
+        for f in _ARRAY_FIELDS:
+            np.save(
+                os.path.join(tmp_path, f"{f}.npy"), getattr(cg, f), allow_pickle=False
+            )
+        meta = {
+            "format_version": FORMAT_VERSION,
+            "name": cg.name,
+            "weight": cg.weight,
+            "fingerprint": cg.fingerprint,
+            "n_nodes": cg.n_nodes,
+            "n_edges": cg.n_edges,
+        }
+        with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as fh:
+            json.dump(meta, fh, indent=2)
+
+        if os.path.isdir(path) and not is_compiled_graph_dir(path):
+            # Stale format or leftover from an old crash: replace it.
+            shutil.rmtree(path, ignore_errors=True)
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            if not is_compiled_graph_dir(path):
+                raise
+    finally:
+        if os.path.isdir(tmp_path):
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def is_compiled_graph_dir(path: str) -> bool:
+    """
+    True if `path` holds a compiled graph bundle in the current format.
+    """
+    meta_path = os.path.join(path, "meta.json")
+    if not os.path.exists(meta_path):
+        return False
+    try:
+        with open(meta_path, "r", encoding="utf-8") as fh:
+            meta = json.load(fh)
+    except (OSError, ValueError):
+        return False
+    return meta.get("format_version") == FORMAT_VERSION
+
+
+def artifact_path(cg: CompiledGraph, suffix: str) -> Optional[str]:
+    """
+    Path of a derived artifact stored next to the graph's bundle, e.g.
+    `graphs/<city>.landmarks.npz` for suffix "landmarks". None for graphs
+    that were not loaded from disk.
+    """
+    if not cg.path:
+        return None
+    stem = os.path.splitext(os.path.normpath(cg.path))[0]
+    return f"{stem}.{suffix}.npz"
+
+
+def save_npz_atomic(path: str, **arrays: np.ndarray) -> None:
+    """
+    `np.savez` to a temp file in the same directory, then rename into place.
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=os.path.basename(path) + ".", suffix=".tmp", dir=parent
+    )
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            np.savez(fh, **arrays)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_npz_artifact(
+    path: Optional[str], fingerprint: str, **expected
+) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Load an artifact written with `save_npz_atomic` if it exists and was
+    built for this graph (`fingerprint`) with the same parameters
+    (`expected`, compared against scalar entries). Returns None otherwise.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {k: data[k] for k in data.files}
+    except (OSError, ValueError):
+        return None
+    if str(arrays.get("fingerprint", "")) != fingerprint:
+        return None
+    for key, value in expected.items():
+        if key not in arrays or arrays[key].item() != value:
+            return None
+    return arrays
+
+
+def load_compiled_graph(path: str, mmap: bool = False) -> CompiledGraph:
+    """
+    Load a bundle written by `save_compiled_graph`.
+
+    With `mmap=True` every array is memory-mapped read-only, so processes
+    that open the same bundle share one physical copy through the OS page
+    cache instead of each holding a private one.
+    """
+    with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as fh:
+        meta = json.load(fh)
+    if meta.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported compiled graph format in {path}")
+
+    mmap_mode = "r" if mmap else None
+    arrays = {
+        f: np.load(
+            os.path.join(path, f"{f}.npy"), mmap_mode=mmap_mode, allow_pickle=False
+        )
+        for f in _ARRAY_FIELDS
+    }
+    return CompiledGraph(
+        **arrays,
+        weight=meta["weight"],
+        fingerprint=meta["fingerprint"],
+        name=meta.get("name", ""),
+        path=path,
+    )
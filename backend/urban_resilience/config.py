@@ -1,5 +1,7 @@
 # backend/urban_resilience/config.py
 
+import os
+
 DEFAULT_CITIES = [
     "Chicago, Illinois, USA",
     "Pittsburgh, Pennsylvania, USA",
@@ -16,6 +18,70 @@ SCENARIOS = [
     "Random Failure",
 ]
 
+# Scenarios served by the API and accepted by edge selection, but left out
+# of the default batch sweeps (batch_runner, run_multi_city, percolation,
+# generate_maps), which run SCENARIOS unless given these explicitly.
+OPT_IN_SCENARIOS = [
+    "Adaptive Targeted Attack",
+]
+
+ALL_SCENARIOS = SCENARIOS + OPT_IN_SCENARIOS
+
+# Betweenness recalculations (removal rounds) of the Adaptive Targeted Attack,
+# planned over the whole curve (severity 1.0), and the most a caller may ask for.
+ADAPTIVE_ATTACK_ROUNDS = 10
+MAX_ADAPTIVE_ATTACK_ROUNDS = 50
+
 SEVERITIES = [0.3, 0.5, 0.7]  # ~30%, 50%, 70% disruption
+
+# Expected top-set errors the adaptive Targeted Attack ranking is built for
+# (always for the SEVERITIES grid). Requested tolerances must lie in this
+# range and are rounded down to one of these, so a city has at most this
+# many adaptive rankings, whatever requests ask for.
+BETWEENNESS_TOLERANCES = [0.01, 0.02, 0.05, 0.1, 0.2, 0.5]
+
 N_PAIRS_PER_RUN = 30          # OD pairs per run for richer stats
 RUNS_PER_SETTING = 5          # how many times to repeat each config
+
+# OD pairs in the one panel per city that API requests draw from: requests
+# use its leading rows, so request sizes never create panels of their own.
+API_OD_PANEL_PAIRS = 1000
+
+# Most OD pairs a sequential /simulate request may probe (`max_pairs`).
+API_MAX_SEQUENTIAL_PAIRS = 5000
+
+# Most origins of a batched /simulate request (`n_origins`): each one costs
+# a baseline and a damaged single-source search on the request thread.
+API_MAX_ORIGINS = 200
+
+# Seed of the persisted OD panels (`<city>.od_panel_<n>_<seed>.npz`). Kept
+# apart from the edge-selection seeds so new seeds reuse the same panels.
+OD_PANEL_SEED = 123
+
+# Memory-map compiled graph bundles read-only so uvicorn workers and batch
+# subprocesses share one physical copy per city (set to "0" to disable).
+MMAP_COMPILED_GRAPHS = os.environ.get("URBAN_RESILIENCE_MMAP_GRAPHS", "1") != "0"
+
+# Upper bound (bytes) for graphs held by graph_loader's in-process cache.
+# Least-recently-used cities are evicted past this; DEFAULT_CITIES are pinned.
+GRAPH_CACHE_MAX_BYTES = int(
+    os.environ.get("URBAN_RESILIENCE_GRAPH_CACHE_BYTES", str(6 * 1024**3))
+)
+
+# Worker processes for batch_runner / run_multi_city (1 = run in-process).
+BATCH_WORKERS = int(os.environ.get("URBAN_RESILIENCE_WORKERS", str(os.cpu_count() or 1)))
+
+# Threads for the replicates of one interactive /simulate request.
+REPLICATE_WORKERS = int(
+    os.environ.get("URBAN_RESILIENCE_REPLICATE_WORKERS", str(os.cpu_count() or 1))
+)
+
+# Processes for sampled-source betweenness (edge ranking, ML features).
+# Unset: every CPU for callers on the main thread of a top-level process
+# (offline builds), 1 inside batch worker processes and API / replicate
+# threads, which are parallel already (see `betweenness.default_workers`).
+BETWEENNESS_WORKERS = (
+    int(os.environ["URBAN_RESILIENCE_BETWEENNESS_WORKERS"])
+    if os.environ.get("URBAN_RESILIENCE_BETWEENNESS_WORKERS")
+    else None
+)
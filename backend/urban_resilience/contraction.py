@@ -0,0 +1,433 @@
+# backend/urban_resilience/contraction.py
+
+from __future__ import annotations
+import heapq
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .compiled_graph import (
+    CompiledGraph,
+    artifact_path,
+    load_npz_artifact,
+    save_npz_atomic,
+)
+from .routing import (
+    _pair_structure,
+    damaged_pair_weights,
+    pair_distances,
+    routing_matrix,
+)
+
+# Witness searches give up after settling this many nodes; a failed search
+# only costs an unnecessary shortcut, never a wrong distance. Priority
+# estimates use the cheaper limit, the actual contraction the larger one.
+_WITNESS_SETTLE_LIMIT = 60
+_ESTIMATE_SETTLE_LIMIT = 20
+
+_FORMAT_VERSION = 1
+
+
+@dataclass
+class ContractionHierarchy:
+    """
+    Contraction-hierarchy index over the (u, v) pairs of a CompiledGraph.
+
+    Arcs (original pairs and shortcuts) are stored sorted by
+    `src * n + tgt`; `mid` is the contracted node a shortcut bypasses
+    (-1 for original pairs). `up_out` / `up_in` are CSR lists of arc ids
+    leading to higher-ranked nodes, for the forward and backward searches.
+    """
+
+    rank: np.ndarray
+    arc_src: np.ndarray
+    arc_tgt: np.ndarray
+    arc_w: np.ndarray
+    arc_mid: np.ndarray
+    up_out_indptr: np.ndarray
+    up_out_arcs: np.ndarray
+    up_in_indptr: np.ndarray
+    up_in_arcs: np.ndarray
+
+    def _lists(self):
+        # Plain lists make the Python query loop several times faster.
+        if not hasattr(self, "_cache"):
+            self._cache = (
+                self.up_out_indptr.tolist(),
+                self.up_out_arcs.tolist(),
+                self.up_in_indptr.tolist(),
+                self.up_in_arcs.tolist(),
+                self.arc_src.tolist(),
+                self.arc_tgt.tolist(),
+                self.arc_w.tolist(),
+                self.arc_mid.tolist(),
+                {
+                    (a, b): i
+                    for i, (a, b) in enumerate(
+                        zip(self.arc_src.tolist(), self.arc_tgt.tolist())
+                    )
+                },
+            )
+        return self._cache
+
+
+def _witness_exists(
+    out_adj: List[Dict[int, float]],
+    source: int,
+    skip: int,
+    targets: Dict[int, float],
+    settle_limit: int,
+) -> Set[int]:
+    """
+    Bounded Dijkstra from `source` avoiding `skip`. Returns the targets that
+    already have a path no longer than their via-`skip` length.
+    """
+    limit = max(targets.values())
+    best = {source: 0.0}
+    queue = [(0.0, source)]
+    settled = 0
+    found: Set[int] = set()
+    while queue and settled < settle_limit:
+        d, node = heapq.heappop(queue)
+        if d > limit:
+            break
+        if d > best.get(node, math.inf):
+            continue
+        settled += 1
+        if node in targets and d <= targets[node]:
+            found.add(node)
+            if len(found) == len(targets):
+                break
+        for nbr, w in out_adj[node].items():
+            if nbr == skip:
+                continue
+            nd = d + w
+            if nd < best.get(nbr, math.inf):
+                best[nbr] = nd
+                heapq.heappush(queue, (nd, nbr))
+    return found
+
+
+def _shortcuts(
+    out_adj: List[Dict[int, float]],
+    in_adj: List[Dict[int, float]],
+    v: int,
+    settle_limit: int = _WITNESS_SETTLE_LIMIT,
+) -> List[Tuple[int, int, float]]:
+    """
+    Shortcuts (u, w, weight) needed if `v` is contracted now.
+    """
+    result: List[Tuple[int, int, float]] = []
+    for u, w_in in in_adj[v].items():
+        targets = {w: w_in + w_out for w, w_out in out_adj[v].items() if w != u}
+        if not targets:
+            continue
+        witnessed = _witness_exists(out_adj, u, v, targets, settle_limit)
+        result.extend((u, w, d) for w, d in targets.items() if w not in witnessed)
+    return result
+
+
+def build_contraction_hierarchy(cg: CompiledGraph, verbose: bool = False) -> ContractionHierarchy:
+    """
+    Contract nodes in edge-difference order (lazy updates) and collect the
+    upward arcs of every node. Pure Python; meant to be run offline.
+    """
+    n = cg.n_nodes
+    base = routing_matrix(cg)
+    indptr, indices, data = base.indptr, base.indices, base.data
+
+    out_adj: List[Dict[int, float]] = [dict() for _ in range(n)]
+    in_adj: List[Dict[int, float]] = [dict() for _ in range(n)]
+    for u in range(n):
+        for j in range(indptr[u], indptr[u + 1]):
+            v = int(indices[j])
+            if v != u and math.isfinite(data[j]):
+                out_adj[u][v] = float(data[j])
+                in_adj[v][u] = float(data[j])
+
+    arcs: Dict[Tuple[int, int], Tuple[float, int]] = {
+        (u, v): (w, -1) for u in range(n) for v, w in out_adj[u].items()
+    }
+    contracted_nbrs = np.zeros(n, dtype=np.int64)
+
+    def priority(v: int) -> int:
+        degree = len(in_adj[v]) + len(out_adj[v])
+        n_shortcuts = len(_shortcuts(out_adj, in_adj, v, _ESTIMATE_SETTLE_LIMIT))
+        return n_shortcuts - degree + int(contracted_nbrs[v])
+
+    heap = [(priority(v), v) for v in range(n)]
+    heapq.heapify(heap)
+    rank = np.full(n, -1, dtype=np.int64)
+    up_out: List[List[Tuple[int, int]]] = [[] for _ in range(n)]
+    up_in: List[List[Tuple[int, int]]] = [[] for _ in range(n)]
+    next_rank = 0
+    t0 = time.perf_counter()
+
+    while heap:
+        _, v = heapq.heappop(heap)
+        if rank[v] >= 0:
+            continue
+        current = priority(v)
+        if heap and current > heap[0][0]:
+            heapq.heappush(heap, (current, v))
+            continue
+
+        for u, w, d in _shortcuts(out_adj, in_adj, v):
+            if d < out_adj[u].get(w, math.inf):
+                out_adj[u][w] = d
+                in_adj[w][u] = d
+                arcs[(u, w)] = (d, v)
+
+        rank[v] = next_rank
+        next_rank += 1
+        up_out[v] = [(v, w) for w in out_adj[v]]
+        up_in[v] = [(u, v) for u in in_adj[v]]
+        for w in out_adj[v]:
+            del in_adj[w][v]
+            contracted_nbrs[w] += 1
+        for u in in_adj[v]:
+            del out_adj[u][v]
+            contracted_nbrs[u] += 1
+        out_adj[v] = {}
+        in_adj[v] = {}
+
+        if verbose and next_rank % 10_000 == 0:
+            print(
+                f"  [CH] contracted {next_rank}/{n} nodes "
+                f"({len(arcs)} arcs, {time.perf_counter() - t0:.1f} s)"
+            )
+
+    keys = sorted(arcs)
+    arc_src = np.asarray([a for a, _ in keys], dtype=np.int64)
+    arc_tgt = np.asarray([b for _, b in keys], dtype=np.int64)
+    arc_w = np.asarray([arcs[k][0] for k in keys], dtype=np.float64)
+    arc_mid = np.asarray([arcs[k][1] for k in keys], dtype=np.int64)
+    arc_id = {k: i for i, k in enumerate(keys)}
+
+    def to_csr(lists: List[List[Tuple[int, int]]]) -> Tuple[np.ndarray, np.ndarray]:
+        ptr = np.zeros(n + 1, dtype=np.int64)
+        ptr[1:] = np.cumsum([len(x) for x in lists])
+        ids = np.asarray([arc_id[a] for x in lists for a in x], dtype=np.int64)
+        return ptr, ids
+
+    up_out_indptr, up_out_arcs = to_csr(up_out)
+    up_in_indptr, up_in_arcs = to_csr(up_in)
+    return ContractionHierarchy(
+        rank=rank,
+        arc_src=arc_src,
+        arc_tgt=arc_tgt,
+        arc_w=arc_w,
+        arc_mid=arc_mid,
+        up_out_indptr=up_out_indptr,
+        up_out_arcs=up_out_arcs,
+        up_in_indptr=up_in_indptr,
+        up_in_arcs=up_in_arcs,
+    )
+
+
+_CH_FIELDS = (
+    "rank",
+    "arc_src",
+    "arc_tgt",
+    "arc_w",
+    "arc_mid",
+    "up_out_indptr",
+    "up_out_arcs",
+    "up_in_indptr",
+    "up_in_arcs",
+)
+
+
+def get_contraction_hierarchy(
+    cg: CompiledGraph,
+    build: bool = False,
+    verbose: bool = False,
+) -> Optional[ContractionHierarchy]:
+    """
+    The CH index for `cg`, memoised on the graph and persisted as
+    `<city>.ch.npz` next to its bundle. With `build=False` (the default for
+    request-time callers) a missing index returns None instead of running
+    the slow offline build.
+    """
+    if "contraction_hierarchy" in cg._derived:
+        return cg._derived["contraction_hierarchy"]
+
+    path = artifact_path(cg, "ch")
+    data = load_npz_artifact(path, cg.fingerprint, format_version=_FORMAT_VERSION)
+    if data is not None:
+        ch = ContractionHierarchy(**{f: data[f] for f in _CH_FIELDS})
+    elif build:
+        ch = build_contraction_hierarchy(cg, verbose=verbose)
+        if path:
+            save_npz_atomic(
+                path,
+                fingerprint=np.asarray(cg.fingerprint),
+                format_version=np.asarray(_FORMAT_VERSION),
+                **{f: getattr(ch, f) for f in _CH_FIELDS},
+            )
+    else:
+        return None
+
+    cg._derived["contraction_hierarchy"] = ch
+    return ch
+
+
+def ch_query(
+    ch: ContractionHierarchy,
+    source: int,
+    target: int,
+) -> Tuple[float, List[int]]:
+    """
+    Bidirectional upward Dijkstra. Returns (distance, arc ids of the
+    shortest path in the hierarchy); `inf` and [] if unreachable.
+
+    A pure-Python heap search: it settles far fewer nodes than a full
+    search, but each one costs interpreter time.
+    """
+    out_ptr, out_arcs, in_ptr, in_arcs, src, tgt, w, _, _ = ch._lists()
+    if source == target:
+        return 0.0, []
+
+    dist = ({source: 0.0}, {target: 0.0})
+    parent: Tuple[Dict[int, int], Dict[int, int]] = ({}, {})
+    queues = ([(0.0, source)], [(0.0, target)])
+    best, meet = math.inf, -1
+
+    while queues[0] or queues[1]:
+        fwd, bwd = queues
+        side = 0 if fwd and (not bwd or fwd[0][0] <= bwd[0][0]) else 1
+        d, node = heapq.heappop(queues[side])
+        if d >= best:
+            # Every remaining key on this side is no better either.
+            queues[side].clear()
+            continue
+        if d > dist[side].get(node, math.inf):
+            continue
+        other = dist[1 - side].get(node)
+        if other is not None and d + other < best:
+            best, meet = d + other, node
+
+        ptr, arcs = (out_ptr, out_arcs) if side == 0 else (in_ptr, in_arcs)
+        for i in range(ptr[node], ptr[node + 1]):
+            a = arcs[i]
+            nbr = tgt[a] if side == 0 else src[a]
+            nd = d + w[a]
+            if nd < dist[side].get(nbr, math.inf):
+                dist[side][nbr] = nd
+                parent[side][nbr] = a
+                heapq.heappush(queues[side], (nd, nbr))
+
+    if meet < 0:
+        return math.inf, []
+
+    path: List[int] = []
+    node = meet
+    while node != source:
+        a = parent[0][node]
+        path.append(a)
+        node = src[a]
+    path.reverse()
+    node = meet
+    while node != target:
+        a = parent[1][node]
+        path.append(a)
+        node = tgt[a]
+    return best, path
+
+
+def unpack_pairs(ch: ContractionHierarchy, arcs: Sequence[int]) -> List[Tuple[int, int]]:
+    """
+    Expand hierarchy arcs (shortcuts included) into original (u, v) pairs.
+    """
+    _, _, _, _, src, tgt, _, mid, arc_id = ch._lists()
+    out: List[Tuple[int, int]] = []
+    stack = list(reversed(arcs))
+    while stack:
+        a = stack.pop()
+        if mid[a] < 0:
+            out.append((src[a], tgt[a]))
+        else:
+            m = mid[a]
+            stack.append(arc_id[(m, tgt[a])])
+            stack.append(arc_id[(src[a], m)])
+    return out
+
+
+def ch_pair_distances(
+    cg: CompiledGraph,
+    ch: ContractionHierarchy,
+    pairs: Sequence[Tuple[int, int]],
+) -> Tuple[np.ndarray, List[List[Tuple[int, int]]]]:
+    """
+    Baseline distance and unpacked shortest path (as (u, v) pairs) for each
+    OD pair, answered from the hierarchy.
+
+    Distances are re-summed along the unpacked path from the origin, the
+    same order a Dijkstra search accumulates them in, so they match the
+    CSR engine bit for bit rather than up to shortcut rounding.
+    """
+    w, arc_id = ch._lists()[6], ch._lists()[8]
+    od = np.asarray(pairs, dtype=np.int64).reshape(-1, 2).tolist()
+    dists = np.empty(len(od), dtype=np.float64)
+    paths: List[List[Tuple[int, int]]] = []
+    for i, (u, v) in enumerate(od):
+        d, arcs = ch_query(ch, u, v)
+        path = unpack_pairs(ch, arcs)
+        if math.isfinite(d):
+            d = 0.0
+            for p in path:
+                d += w[arc_id[p]]
+        dists[i] = d
+        paths.append(path)
+    return dists, paths
+
+
+def ch_damaged_distances(
+    cg: CompiledGraph,
+    ch: ContractionHierarchy,
+    pairs: Sequence[Tuple[int, int]],
+    removed: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Baseline and damaged distances for each OD pair.
+
+    A pair whose baseline shortest path uses none of the (u, v) pairs
+    changed by the damage keeps its baseline distance, since removing
+    edges never shortens a path. Only the remaining pairs fall back to the
+    masked single-source search.
+    """
+    od = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    baseline, paths = ch_pair_distances(cg, ch, od)
+    touched = touched_node_pairs(cg, removed)
+    damaged = baseline.copy()
+    redo = np.asarray(
+        [
+            math.isfinite(d) and any(p in touched for p in path)
+            for d, path in zip(baseline.tolist(), paths)
+        ],
+        dtype=bool,
+    )
+    if redo.any():
+        damaged[redo] = pair_distances(cg, od[redo], removed=removed)
+    return baseline, damaged
+
+
+def touched_node_pairs(cg: CompiledGraph, removed: np.ndarray) -> Set[Tuple[int, int]]:
+    """
+    (u, v) node pairs whose cheapest surviving weight changes when
+    `removed` edges are taken out.
+    """
+    pairs, new_w = damaged_pair_weights(cg, removed)
+    old_w = routing_matrix(cg).data[pairs]
+    changed = pairs[new_w != old_w]
+    pair_starts = _pair_structure(cg)[0]
+    first_edge = pair_starts[changed]
+    return set(
+        zip(
+            cg.edge_sources[first_edge].tolist(),
+            cg.targets[first_edge].tolist(),
+        )
+    )
@@ -1,25 +1,52 @@
 # backend/urban_resilience/edge_selection.py
 
 from __future__ import annotations
-from typing import Iterable, List, Tuple, Optional, Dict
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Iterable, List, Sequence, Tuple, Optional
 
 import numpy as np
 import networkx as nx
 import osmnx as ox
+import shapely
 from shapely.geometry.base import BaseGeometry
 
-from .config import SCENARIOS
+from .config import (
+    ADAPTIVE_ATTACK_ROUNDS,
+    ALL_SCENARIOS,
+    BETWEENNESS_TOLERANCES,
+    MAX_ADAPTIVE_ATTACK_ROUNDS,
+    SEVERITIES,
+)
+from .compiled_graph import (
+    CompiledGraph,
+    artifact_path,
+    load_npz_artifact,
+    save_npz_atomic,
+)
+from .artifacts import get_artifact
+from .betweenness import (
+    adaptive_attack_order,
+    adaptive_edge_betweenness,
+    edge_betweenness_scores,
+)
 
 EdgeId = Tuple[int, int, int]
 
-# In-memory cache: id(G) -> list of ((u, v), betweenness)
-_EDGE_BETWEENNESS_CACHE: Dict[int, List[Tuple[Tuple[int, int], float]]] = {}
-
 
 def graph_to_edges_gdf(G: nx.MultiDiGraph):
     """
     Convert graph edges to a GeoDataFrame with (u, v, key, geometry, tags).
 
+    Built once per graph and shared through the artifact registry (see
+    `artifacts.py`), so callers must not modify the returned frame.
+    """
+    return get_artifact(G, "edges_gdf", lambda: _build_edges_gdf(G))
+
+
+def _build_edges_gdf(G: nx.MultiDiGraph):
+    """
     Compatible with both older and newer osmnx versions.
     Ensures 'u', 'v', 'key' are actual columns (not just index levels).
     """
@@ -49,10 +76,76 @@ def graph_to_edges_gdf(G: nx.MultiDiGraph):
     return gdf_edges
 
 
-def select_bridge_edges(G: nx.MultiDiGraph) -> List[EdgeId]:
+@dataclass(frozen=True)
+class CandidateIndex:
+    """
+    Scenario candidates of a CompiledGraph as edge-index arrays, built once
+    per graph (see `candidate_index`): the bridge / tunnel / major-highway
+    edges in the source graph's edge order (the order the NetworkX code
+    paths see them in, so seeded shuffles pick the same edges), and the
+    undirected (u, v) pairs that Targeted Attack rankings are expressed in.
+    Pair `p` has node-index code `min(u, v) * n_nodes + max(u, v)` =
+    `pair_codes[p]`, and its edges (both directions, parallel keys) are
+    `pair_edges[pair_ptr[p]:pair_ptr[p + 1]]`.
+    """
+
+    bridge: np.ndarray
+    tunnel: np.ndarray
+    major_highway: np.ndarray
+    edge_pair: np.ndarray
+    pair_codes: np.ndarray
+    pair_ptr: np.ndarray
+    pair_edges: np.ndarray
+
+    def pair_index(self, cg: CompiledGraph, pairs: Sequence[Tuple[int, int]]) -> np.ndarray:
+        """
+        Pair indices of undirected (u, v) pairs of OSM node ids.
+        """
+        nodes = cg.node_index(np.asarray(pairs, dtype=np.int64).reshape(-1)).reshape(-1, 2)
+        codes = nodes.min(axis=1) * cg.n_nodes + nodes.max(axis=1)
+        return np.searchsorted(self.pair_codes, codes)
+
+    def edges_of_pairs(self, pair_idx: np.ndarray) -> np.ndarray:
+        """
+        Edge indices (ascending) of the given pairs.
+        """
+        starts = self.pair_ptr[pair_idx]
+        counts = self.pair_ptr[pair_idx + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        return np.sort(self.pair_edges[offsets + np.arange(int(counts.sum()))])
+
+
+def candidate_index(cg: CompiledGraph) -> CandidateIndex:
+    """
+    Shared `CandidateIndex` of a CompiledGraph (artifact registry); read-only.
+    """
+    return get_artifact(cg, "candidate_index", lambda: _build_candidate_index(cg))
+
+
+def _build_candidate_index(cg: CompiledGraph) -> CandidateIndex:
+    u = cg.edge_sources.astype(np.int64)
+    v = cg.targets.astype(np.int64)
+    codes = np.minimum(u, v) * cg.n_nodes + np.maximum(u, v)
+    pair_codes, edge_pair = np.unique(codes, return_inverse=True)
+    pair_ptr = np.zeros(len(pair_codes) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(edge_pair, minlength=len(pair_codes)), out=pair_ptr[1:])
+    return CandidateIndex(
+        bridge=cg.source_order[cg.is_bridge[cg.source_order]],
+        tunnel=cg.source_order[cg.is_tunnel[cg.source_order]],
+        major_highway=cg.source_order[cg.is_major_highway[cg.source_order]],
+        edge_pair=edge_pair.astype(np.int64),
+        pair_codes=pair_codes,
+        pair_ptr=pair_ptr,
+        pair_edges=np.argsort(edge_pair, kind="stable"),
+    )
+
+
+def select_bridge_edges(G: nx.MultiDiGraph | CompiledGraph) -> List[EdgeId]:
     """
     Select edges tagged as bridges in OSM.
     """
+    if isinstance(G, CompiledGraph):
+        return G.edge_ids(candidate_index(G).bridge)
     edges = graph_to_edges_gdf(G)
     if "bridge" not in edges.columns:
         return []
@@ -63,10 +156,12 @@ def select_bridge_edges(G: nx.MultiDiGraph) -> List[EdgeId]:
     return list(map(tuple, sub[["u", "v", "key"]].values.tolist()))
 
 
-def select_tunnel_edges(G: nx.MultiDiGraph) -> List[EdgeId]:
+def select_tunnel_edges(G: nx.MultiDiGraph | CompiledGraph) -> List[EdgeId]:
     """
     Select edges tagged as tunnels in OSM.
     """
+    if isinstance(G, CompiledGraph):
+        return G.edge_ids(candidate_index(G).tunnel)
     edges = graph_to_edges_gdf(G)
     if "tunnel" not in edges.columns:
         return []
@@ -77,11 +172,13 @@ def select_tunnel_edges(G: nx.MultiDiGraph) -> List[EdgeId]:
     return list(map(tuple, sub[["u", "v", "key"]].values.tolist()))
 
 
-def select_highway_edges(G: nx.MultiDiGraph) -> List[EdgeId]:
+def select_highway_edges(G: nx.MultiDiGraph | CompiledGraph) -> List[EdgeId]:
     """
     Select major highway-type edges (motorway, trunk, primary, etc.)
     as generic 'important' road segments.
     """
+    if isinstance(G, CompiledGraph):
+        return G.edge_ids(candidate_index(G).major_highway)
     edges = graph_to_edges_gdf(G)
     if "highway" not in edges.columns:
         return []
@@ -109,27 +206,169 @@ def select_highway_edges(G: nx.MultiDiGraph) -> List[EdgeId]:
     return list(map(tuple, sub[["u", "v", "key"]].values.tolist()))
 
 
-def _get_edge_betweenness_ranking(
-    G: nx.MultiDiGraph,
-    approx_k: int = 300,
+def _undirected_projection(cg: CompiledGraph) -> nx.Graph:
+    """
+    Simple undirected graph over a CompiledGraph's nodes, equivalent to
+    `nx.Graph(G)` on the original MultiDiGraph (same node order, so sampled
+    betweenness sources match).
+    """
+    undirected = nx.Graph()
+    undirected.add_nodes_from(cg.node_ids.tolist())
+    u = cg.node_ids[cg.edge_sources]
+    v = cg.node_ids[cg.targets]
+    undirected.add_edges_from(zip(u.tolist(), v.tolist()))
+    return undirected
+
+
+def undirected_graph(G: nx.MultiDiGraph | CompiledGraph) -> nx.Graph:
+    """
+    Shared simple undirected projection of G (`nx.Graph(G)`); read-only.
+    """
+    if isinstance(G, CompiledGraph):
+        return get_artifact(G, "undirected", lambda: _undirected_projection(G))
+    return get_artifact(G, "undirected", lambda: nx.Graph(G))
+
+
+def _flooded_edges(
+    G: nx.MultiDiGraph | CompiledGraph,
+    polys: List[BaseGeometry],
+) -> List[EdgeId]:
+    """
+    Edges whose geometry intersects any of the flood polygons.
+    """
+    if isinstance(G, CompiledGraph):
+        return G.edge_ids(_flooded_edge_index(G, polys))
+
+    edges_gdf = graph_to_edges_gdf(G)
+    mask = edges_gdf.geometry.apply(
+        lambda geom: any(geom.intersects(p) for p in polys)
+    )
+    flooded = edges_gdf[mask]
+    return list(map(tuple, flooded[["u", "v", "key"]].values.tolist()))
+
+
+def _flooded_edge_index(cg: CompiledGraph, polys: List[BaseGeometry]) -> np.ndarray:
+    lines = shapely.linestrings(
+        cg.geom_coords,
+        indices=np.repeat(np.arange(cg.n_edges), np.diff(cg.geom_offsets)),
+    )
+    tree = shapely.STRtree(lines)
+    hits = tree.query(polys, predicate="intersects")
+    return cg.in_source_order(np.unique(hits[1]))
+
+
+def get_edge_betweenness_ranking(
+    G: nx.MultiDiGraph | CompiledGraph,
+    approx_k: Optional[int] = 300,
+    seed: int = 0,
 ) -> List[Tuple[Tuple[int, int], float]]:
     """
-    Compute (or retrieve cached) edge betweenness centrality ranking
-    on an undirected projection of G.
+    Compute (or retrieve from the artifact registry) edge betweenness
+    centrality ranking on an undirected projection of G.
 
     To keep things fast, we use *approximate* betweenness by sampling
     up to `approx_k` source nodes. For large graphs (like Chicago),
     this is dramatically faster than exact betweenness while still
     correctly surfacing the main "backbone" corridors.
 
+    For graphs loaded from a compiled bundle the ranking is also persisted
+    next to it (see `load_betweenness_ranking`), so a restarted process
+    does not recompute it.
+
     Returns:
         list of ((u, v), score) sorted by descending score.
     """
-    gid = id(G)
-    if gid in _EDGE_BETWEENNESS_CACHE:
-        return _EDGE_BETWEENNESS_CACHE[gid]
+    return get_artifact(
+        G,
+        ("edge_betweenness", approx_k, seed),
+        lambda: _load_or_build_ranking(G, approx_k, seed),
+    )
+
+
+def _ranking_path(cg: CompiledGraph, approx_k: Optional[int], seed: int) -> Optional[str]:
+    k = "exact" if approx_k is None else approx_k
+    return artifact_path(cg, f"betweenness_{k}_{seed}")
+
 
-    undirected = nx.Graph(G)
+def load_betweenness_ranking(
+    cg: CompiledGraph,
+    approx_k: Optional[int] = 300,
+    seed: int = 0,
+) -> Optional[List[Tuple[Tuple[int, int], float]]]:
+    """
+    Ranking persisted as `<city>.betweenness_<k>_<seed>.npz`: node-index
+    pairs and scores in rank order, valid only for the same graph content
+    (fingerprint) and parameters. None if there is no valid file.
+    """
+    data = load_npz_artifact(
+        _ranking_path(cg, approx_k, seed),
+        cg.fingerprint,
+        approx_k=-1 if approx_k is None else approx_k,
+        seed=seed,
+    )
+    if data is None:
+        return None
+    return _decode_ranking(cg, data)
+
+
+def _decode_ranking(cg: CompiledGraph, data) -> List[Tuple[Tuple[int, int], float]]:
+    u = cg.node_ids[data["u"]].tolist()
+    v = cg.node_ids[data["v"]].tolist()
+    return list(zip(zip(u, v), data["score"].tolist()))
+
+
+def _encode_ranking(cg: CompiledGraph, ranked: List[Tuple[Tuple[int, int], float]]):
+    """
+    Node-index pairs and scores of a ranking, as saved by `save_npz_atomic`.
+    """
+    pairs = np.asarray([p for p, _ in ranked], dtype=np.int64).reshape(-1, 2)
+    order, sorted_ids = cg._node_sort()
+    return {
+        "u": order[np.searchsorted(sorted_ids, pairs[:, 0])].astype(np.int32),
+        "v": order[np.searchsorted(sorted_ids, pairs[:, 1])].astype(np.int32),
+        "score": np.asarray([s for _, s in ranked], dtype=np.float64),
+    }
+
+
+def save_betweenness_ranking(
+    cg: CompiledGraph,
+    ranked: List[Tuple[Tuple[int, int], float]],
+    approx_k: Optional[int] = 300,
+    seed: int = 0,
+) -> None:
+    path = _ranking_path(cg, approx_k, seed)
+    if not path:
+        return
+    save_npz_atomic(
+        path,
+        fingerprint=np.asarray(cg.fingerprint),
+        approx_k=np.asarray(-1 if approx_k is None else approx_k),
+        seed=np.asarray(seed),
+        **_encode_ranking(cg, ranked),
+    )
+
+
+def _load_or_build_ranking(
+    G: nx.MultiDiGraph | CompiledGraph,
+    approx_k: Optional[int],
+    seed: int,
+) -> List[Tuple[Tuple[int, int], float]]:
+    if isinstance(G, CompiledGraph):
+        ranked = load_betweenness_ranking(G, approx_k, seed)
+        if ranked is not None:
+            return ranked
+    ranked = _edge_betweenness_ranking(G, approx_k, seed)
+    if isinstance(G, CompiledGraph):
+        save_betweenness_ranking(G, ranked, approx_k, seed)
+    return ranked
+
+
+def _edge_betweenness_ranking(
+    G: nx.MultiDiGraph | CompiledGraph,
+    approx_k: Optional[int],
+    seed: int = 0,
+) -> List[Tuple[Tuple[int, int], float]]:
+    undirected = undirected_graph(G)
     n_nodes = undirected.number_of_nodes()
 
     if approx_k is not None:
@@ -138,32 +377,214 @@ def _get_edge_betweenness_ranking(
             f"[Targeted Attack] Computing *approximate* edge betweenness "
             f"with k={k} sampled nodes (n_nodes={n_nodes})..."
         )
-        bet = nx.edge_betweenness_centrality(
-            undirected,
-            k=k,
-            seed=0,
-        )
+        edges, scores = edge_betweenness_scores(undirected, k=k, seed=seed)
     else:
         print(
             "[Targeted Attack] Computing *exact* edge betweenness "
             "(this may be slow for large cities)..."
         )
-        bet = nx.edge_betweenness_centrality(undirected)
+        edges, scores = edge_betweenness_scores(undirected)
 
-    ranked = sorted(bet.items(), key=lambda kv: kv[1], reverse=True)
-    _EDGE_BETWEENNESS_CACHE[gid] = ranked
+    ranked = _rank_edges(edges, scores)
     print(
         f"[Targeted Attack] Betweenness computed and cached for {len(ranked)} edges."
     )
     return ranked
 
 
+def _rank_edges(
+    edges: List[Tuple[int, int]], scores: np.ndarray
+) -> List[Tuple[Tuple[int, int], float]]:
+    # Stable sort on -score: ties keep edge order, as sorted() on nx's dict.
+    return [(edges[i], float(scores[i])) for i in np.argsort(-scores, kind="stable")]
+
+
+@dataclass(frozen=True)
+class AdaptiveRanking:
+    """
+    Edge-betweenness ranking sampled until its top sets are stable (see
+    `get_adaptive_betweenness_ranking`), with the number of sources it used
+    and its estimated error: the expected fraction of a requested top set
+    misplaced by sampling (0 when exact).
+    """
+
+    ranked: List[Tuple[Tuple[int, int], float]]
+    n_sources: int
+    error: float
+    converged: bool
+
+
+def get_adaptive_betweenness_ranking(
+    G: nx.MultiDiGraph | CompiledGraph,
+    top_fractions: Sequence[float] = tuple(SEVERITIES),
+    tolerance: float = 0.05,
+    seed: int = 0,
+) -> AdaptiveRanking:
+    """
+    Edge-betweenness ranking with as many sampled sources as it takes for
+    the top `f` share of edges, for each `f` in `top_fractions` (default:
+    the SEVERITIES grid), to be right within `tolerance` (see
+    `betweenness.adaptive_edge_betweenness`), instead of a fixed `approx_k`.
+    Small cities stop early or end up exact; large ones sample more where
+    a fixed k would be too coarse. Cached and persisted like
+    `get_edge_betweenness_ranking`.
+
+    `tolerance` is rounded down to one of `BETWEENNESS_TOLERANCES` (see
+    `snap_tolerance`), so arbitrary request values never start new runs.
+    """
+    tolerance = snap_tolerance(tolerance)
+    fractions = tuple(sorted({float(f) for f in top_fractions}))
+    return get_artifact(
+        G,
+        ("edge_betweenness_adaptive", fractions, tolerance, seed),
+        lambda: _load_or_build_adaptive_ranking(G, fractions, tolerance, seed),
+    )
+
+
+def snap_tolerance(tolerance: float) -> float:
+    """
+    The largest of `BETWEENNESS_TOLERANCES` not above `tolerance` (at least
+    as strict). Raises ValueError outside their range.
+    """
+    lo, hi = min(BETWEENNESS_TOLERANCES), max(BETWEENNESS_TOLERANCES)
+    if not lo <= tolerance <= hi:
+        raise ValueError(f"betweenness tolerance must be in [{lo}, {hi}], got {tolerance}")
+    return max(t for t in BETWEENNESS_TOLERANCES if t <= tolerance)
+
+
+def _adaptive_params(fractions: Tuple[float, ...], tolerance: float) -> str:
+    return json.dumps([tolerance, list(fractions)])
+
+
+def _adaptive_ranking_path(
+    cg: CompiledGraph, fractions: Tuple[float, ...], tolerance: float, seed: int
+) -> Optional[str]:
+    tag = hashlib.sha1(_adaptive_params(fractions, tolerance).encode()).hexdigest()[:10]
+    return artifact_path(cg, f"betweenness_adaptive_{tag}_{seed}")
+
+
+def _load_or_build_adaptive_ranking(
+    G: nx.MultiDiGraph | CompiledGraph,
+    fractions: Tuple[float, ...],
+    tolerance: float,
+    seed: int,
+) -> AdaptiveRanking:
+    params = _adaptive_params(fractions, tolerance)
+    path = _adaptive_ranking_path(G, fractions, tolerance, seed) if isinstance(
+        G, CompiledGraph
+    ) else None
+    data = load_npz_artifact(path, G.fingerprint, params=params, seed=seed) if path else None
+    if data is not None:
+        return AdaptiveRanking(
+            ranked=_decode_ranking(G, data),
+            n_sources=int(data["n_sources"]),
+            error=float(data["error"]),
+            converged=bool(data["converged"]),
+        )
+
+    print(
+        f"[Targeted Attack] Computing *adaptive* edge betweenness for top "
+        f"fractions {list(fractions)} (tolerance={tolerance})..."
+    )
+    result = adaptive_edge_betweenness(
+        undirected_graph(G), fractions, tolerance=tolerance, seed=seed
+    )
+    ranking = AdaptiveRanking(
+        ranked=_rank_edges(result.edges, result.scores),
+        n_sources=result.n_sources,
+        error=result.error,
+        converged=result.converged,
+    )
+    print(
+        f"[Targeted Attack] Betweenness from {ranking.n_sources} sources, "
+        f"estimated top-set error {ranking.error:.3f}"
+        f"{'' if ranking.converged else ' (source limit reached)'}."
+    )
+    if path:
+        save_npz_atomic(
+            path,
+            fingerprint=np.asarray(G.fingerprint),
+            params=np.asarray(params),
+            seed=np.asarray(seed),
+            n_sources=np.asarray(ranking.n_sources),
+            error=np.asarray(ranking.error),
+            converged=np.asarray(ranking.converged),
+            **_encode_ranking(G, ranking.ranked),
+        )
+    return ranking
+
+
+def _get_adaptive_attack_order(
+    G: nx.MultiDiGraph | CompiledGraph,
+    attack_rounds: Optional[int] = None,
+    approx_k: Optional[int] = 300,
+    seed: int = 0,
+) -> List[Tuple[int, int]]:
+    """
+    Undirected (u, v) pairs in Adaptive Targeted Attack order: every pair,
+    removed in `attack_rounds` (default ADAPTIVE_ATTACK_ROUNDS) batches of
+    highest recalculated betweenness (same sampled sources as
+    `get_edge_betweenness_ranking`). The attack is planned once for
+    severity 1.0 and each severity takes a prefix, so the result does not
+    depend on the severity asked for. Cached in the artifact registry.
+    """
+    rounds = ADAPTIVE_ATTACK_ROUNDS if attack_rounds is None else attack_rounds
+    if not 1 <= rounds <= MAX_ADAPTIVE_ATTACK_ROUNDS:
+        raise ValueError(
+            f"attack_rounds must be in [1, {MAX_ADAPTIVE_ATTACK_ROUNDS}], got {rounds}"
+        )
+    n_remove = undirected_graph(G).number_of_edges()
+    return get_artifact(
+        G,
+        ("adaptive_attack", rounds, approx_k, seed),
+        lambda: _adaptive_attack(G, n_remove, rounds, approx_k, seed),
+    )
+
+
+def _adaptive_attack(
+    G: nx.MultiDiGraph | CompiledGraph,
+    n_remove: int,
+    rounds: int,
+    approx_k: Optional[int],
+    seed: int,
+) -> List[Tuple[int, int]]:
+    undirected = undirected_graph(G)
+    n_nodes = undirected.number_of_nodes()
+    k = None if approx_k is None else min(approx_k, n_nodes)
+    print(
+        f"[Adaptive Attack] Removing {n_remove} edges in {rounds} rounds "
+        f"(k={k if k is not None else n_nodes} sampled nodes)..."
+    )
+    order, stats = adaptive_attack_order(undirected, n_remove, rounds, k=k, seed=seed)
+    print(
+        f"[Adaptive Attack] {stats['rounds']} rounds, "
+        f"{stats['chunks_recomputed']} of {stats['chunks'] * max(stats['rounds'] - 1, 0)} "
+        f"source chunks recomputed."
+    )
+    return order
+
+
+def _edges_of_pairs(
+    G: nx.MultiDiGraph, pairs: Iterable[Tuple[int, int]]
+) -> List[EdgeId]:
+    """
+    Every (u, v, key) edge, in either direction, of the undirected `pairs`
+    (NetworkX graphs; see `CandidateIndex` for compiled ones).
+    """
+    wanted = {tuple(sorted(p)) for p in pairs}
+    return [
+        (u, v, k) for u, v, k in G.edges(keys=True) if tuple(sorted((u, v))) in wanted
+    ]
+
+
 def select_edges_for_scenario(
-    G: nx.MultiDiGraph,
+    G: nx.MultiDiGraph | CompiledGraph,
     scenario: str,
     severity: float,
     usgs_flood_polygons: Optional[Iterable[BaseGeometry]] = None,
     seed: Optional[int] = None,
+    betweenness_tolerance: Optional[float] = None,
+    attack_rounds: Optional[int] = None,
 ) -> List[EdgeId]:
     """
     Central dispatcher: scenario name → list of (u, v, key) edges to remove.
@@ -171,11 +592,33 @@ def select_edges_for_scenario(
     IMPORTANT:
     - For all scenarios, `severity` is a *fraction* in [0, 1].
       We use it to scale how many candidate edges we actually remove.
+    - `G` may be a NetworkX graph or a CompiledGraph; both return OSM
+      (u, v, key) ids.
+    - With `betweenness_tolerance`, Targeted Attack ranks edges with
+      adaptive sampling planned for the SEVERITIES grid (see
+      `get_adaptive_betweenness_ranking`) instead of the fixed-k ranking.
+    - Adaptive Targeted Attack removes the first `severity` share of
+      undirected pairs of one attack over the whole graph in
+      `attack_rounds` (default ADAPTIVE_ATTACK_ROUNDS) batches,
+      recalculating betweenness after each one (see
+      `_get_adaptive_attack_order`).
     """
-    if scenario not in SCENARIOS:
+    if scenario not in ALL_SCENARIOS:
         raise ValueError(f"Unknown scenario: {scenario}")
 
-    edges_gdf = graph_to_edges_gdf(G)
+    if isinstance(G, CompiledGraph):
+        return G.edge_ids(
+            select_edge_index(
+                G,
+                scenario,
+                severity,
+                usgs_flood_polygons=usgs_flood_polygons,
+                seed=seed,
+                betweenness_tolerance=betweenness_tolerance,
+                attack_rounds=attack_rounds,
+            )
+        )
+
     rng = np.random.default_rng(seed)
 
     def take_fraction(candidates: List[EdgeId]) -> List[EdgeId]:
@@ -203,13 +646,7 @@ def select_edges_for_scenario(
         if usgs_flood_polygons:
             polys = list(usgs_flood_polygons)
             if polys:
-                mask = edges_gdf.geometry.apply(
-                    lambda geom: any(geom.intersects(p) for p in polys)
-                )
-                flooded = edges_gdf[mask]
-                all_flooded_edges = list(
-                    map(tuple, flooded[["u", "v", "key"]].values.tolist())
-                )
+                all_flooded_edges = _flooded_edges(G, polys)
             else:
                 all_flooded_edges = select_highway_edges(G)
         else:
@@ -221,20 +658,22 @@ def select_edges_for_scenario(
         # Use cached approximate edge-betweenness ranking for this graph.
         # This preserves the "hit the main backbone first" behavior while
         # not freezing your laptop on the first call.
-        ranked = _get_edge_betweenness_ranking(G)
+        if betweenness_tolerance is not None:
+            ranked = get_adaptive_betweenness_ranking(
+                G, tolerance=betweenness_tolerance
+            ).ranked
+        else:
+            ranked = get_edge_betweenness_ranking(G)
 
         n_top = max(1, int(len(ranked) * severity))
 
         # Take the top n_top undirected edge pairs (u, v), ignoring the score.
-        top_pairs = {
-            tuple(sorted((u, v)))
-            for (u, v), _ in ranked[:n_top]
-        }
+        candidates = _edges_of_pairs(G, (pair for pair, _ in ranked[:n_top]))
 
-        candidates: List[EdgeId] = []
-        for u, v, k in G.edges(keys=True):
-            if tuple(sorted((u, v))) in top_pairs:
-                candidates.append((u, v, k))
+    elif scenario == "Adaptive Targeted Attack":
+        order = _get_adaptive_attack_order(G, attack_rounds)
+        n_top = max(1, int(len(order) * severity))
+        candidates = _edges_of_pairs(G, order[:n_top])
 
     elif scenario == "Random Failure":
         all_edges = list(G.edges(keys=True))
@@ -246,3 +685,146 @@ def select_edges_for_scenario(
         candidates = []
 
     return candidates
+
+
+def select_edge_index(
+    G: CompiledGraph,
+    scenario: str,
+    severity: float,
+    usgs_flood_polygons: Optional[Iterable[BaseGeometry]] = None,
+    seed: Optional[int] = None,
+    betweenness_tolerance: Optional[float] = None,
+    attack_rounds: Optional[int] = None,
+) -> np.ndarray:
+    """
+    `select_edges_for_scenario` on a CompiledGraph, as edge indices (same
+    edges, same order). Candidates come from the graph's `CandidateIndex`,
+    so a call is a permutation and slice of an index array (plus the
+    top-pair lookup for the attacks) instead of a scan over every edge.
+    """
+    if scenario not in ALL_SCENARIOS:
+        raise ValueError(f"Unknown scenario: {scenario}")
+
+    rng = np.random.default_rng(seed)
+    index = candidate_index(G)
+
+    def take_fraction(candidates: np.ndarray) -> np.ndarray:
+        if len(candidates) == 0:
+            return np.empty(0, dtype=np.int64)
+        n_remove = max(1, int(len(candidates) * severity))
+        # Same draws as shuffling the (u, v, key) list.
+        return candidates[rng.permutation(len(candidates))[:n_remove]]
+
+    if scenario == "Bridge Collapse":
+        return take_fraction(index.bridge)
+    if scenario == "Tunnel Closure":
+        return take_fraction(index.tunnel)
+    if scenario == "Highway Flood":
+        polys = list(usgs_flood_polygons or [])
+        return take_fraction(_flooded_edge_index(G, polys) if polys else index.major_highway)
+    if scenario == "Targeted Attack (Top k%)":
+        if betweenness_tolerance is not None:
+            ranked = get_adaptive_betweenness_ranking(
+                G, tolerance=betweenness_tolerance
+            ).ranked
+        else:
+            ranked = get_edge_betweenness_ranking(G)
+        n_top = max(1, int(len(ranked) * severity))
+        top = index.pair_index(G, [pair for pair, _ in ranked[:n_top]])
+        return G.in_source_order(index.edges_of_pairs(top))
+    if scenario == "Adaptive Targeted Attack":
+        order = _get_adaptive_attack_order(G, attack_rounds)
+        n_top = max(1, int(len(order) * severity))
+        return G.in_source_order(index.edges_of_pairs(index.pair_index(G, order[:n_top])))
+    if scenario == "Random Failure":
+        n_remove = max(1, int(G.n_edges * severity))
+        return G.source_order[rng.permutation(G.n_edges)[:n_remove]]
+    return np.empty(0, dtype=np.int64)
+
+
+def scenario_removal_order(
+    G: CompiledGraph,
+    scenario: str,
+    usgs_flood_polygons: Optional[Iterable[BaseGeometry]] = None,
+    seed: Optional[int] = None,
+    edge_keys: Optional[np.ndarray] = None,
+    betweenness_tolerance: Optional[float] = None,
+    attack_rounds: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Complete removal ordering of a scenario on a CompiledGraph, from which
+    every severity is a prefix.
+
+    Returns (order, unit_ends): edge indices in removal order, and the
+    cumulative edge count after each removal unit (one candidate edge, or
+    one undirected (u, v) pair for Targeted Attack). With the same `seed`,
+    `select_edges_for_scenario(G, scenario, s, ...)` removes exactly the
+    edges `order[:unit_ends[max(1, int(len(unit_ends) * s)) - 1]]`.
+
+    With `edge_keys` (one uniform random key per edge) the random scenarios
+    remove their candidates in increasing key order instead of shuffling
+    with `seed`. Scenarios given the same keys then share their randomness
+    (common random numbers): a candidate edge of two scenarios falls at the
+    same relative point in both, which makes paired comparisons far less
+    noisy.
+
+    With `betweenness_tolerance`, Targeted Attack uses the same adaptive
+    ranking as `select_edges_for_scenario` (planned for the SEVERITIES
+    grid), and Adaptive Targeted Attack the same attack over the whole
+    curve, so both match `select_edges_for_scenario` at every severity.
+    """
+    if scenario not in ALL_SCENARIOS:
+        raise ValueError(f"Unknown scenario: {scenario}")
+
+    rng = np.random.default_rng(seed)
+
+    index = candidate_index(G)
+
+    def shuffled(idx: np.ndarray) -> np.ndarray:
+        if edge_keys is not None:
+            return idx[np.argsort(edge_keys[idx], kind="stable")]
+        return idx[rng.permutation(len(idx))]
+
+    if scenario == "Bridge Collapse":
+        order = shuffled(index.bridge)
+    elif scenario == "Tunnel Closure":
+        order = shuffled(index.tunnel)
+    elif scenario == "Highway Flood":
+        polys = list(usgs_flood_polygons or [])
+        order = shuffled(_flooded_edge_index(G, polys) if polys else index.major_highway)
+    elif scenario == "Targeted Attack (Top k%)":
+        if betweenness_tolerance is not None:
+            ranked = get_adaptive_betweenness_ranking(
+                G, tolerance=betweenness_tolerance
+            ).ranked
+        else:
+            ranked = get_edge_betweenness_ranking(G)
+        return _pair_order(G, [pair for pair, _ in ranked])
+    elif scenario == "Adaptive Targeted Attack":
+        return _pair_order(G, _get_adaptive_attack_order(G, attack_rounds))
+    elif scenario == "Random Failure":
+        if edge_keys is not None:
+            order = np.argsort(edge_keys, kind="stable")
+        else:
+            order = G.source_order[rng.permutation(G.n_edges)]
+    else:
+        order = np.empty(0, dtype=np.int64)
+
+    return order, np.arange(1, len(order) + 1)
+
+
+def _pair_order(
+    G: CompiledGraph, pairs: List[Tuple[int, int]]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (order, unit_ends) removing the edges of undirected `pairs` in order,
+    one pair per unit.
+    """
+    index = candidate_index(G)
+    pair_rank = np.empty(len(index.pair_codes), dtype=np.int64)
+    pair_rank[index.pair_index(G, pairs)] = np.arange(len(pairs))
+    edge_rank = pair_rank[index.edge_pair]
+    # Ties (the edges of one pair) keep the source graph's edge order.
+    order = G.source_order[np.argsort(edge_rank[G.source_order], kind="stable")]
+    units = np.bincount(edge_rank, minlength=len(pairs))
+    return order, np.cumsum(units)
@@ -1,48 +1,117 @@
 # backend/urban_resilience/experiments.py
 
 from __future__ import annotations
-from typing import List, Optional
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
 
-from .graph_loader import load_city_graph
-from .edge_selection import select_edges_for_scenario
-from .simulation import simulate_single_shock
+from .graph_loader import load_compiled_city_graph
+from .edge_selection import scenario_removal_order, select_edges_for_scenario
+from .compiled_graph import CompiledGraph
+from .simulation import (
+    EdgeId,
+    mean_ci,
+    simulate_severity_sweep,
+    simulate_single_shock,
+)
+from .od_panel import ODPanel, get_od_panel
 
 
-def run_single_scenario_for_city(
-    city: str,
+def run_scenario_replicates(
+    G: CompiledGraph,
     scenario: str,
     severity: float,
     n_pairs: int = 20,
     runs: int = 3,
     seed: Optional[int] = None,
-) -> pd.DataFrame:
+    panel_seed: Optional[int] = None,
+    workers: int = 1,
+    betweenness_tolerance: Optional[float] = None,
+    attack_rounds: Optional[int] = None,
+    od_panel: Optional[ODPanel] = None,
+) -> List[Tuple[List[EdgeId], Dict]]:
     """
-    Run the same scenario & severity multiple times for one city.
-    Returns a DataFrame with one row per run.
+    `runs` independent replicates of one scenario & severity on an already
+    loaded graph; returns `(removed edge ids, metrics)` per run, in run order.
+
+    Run seeds are drawn up front from `default_rng(seed)`, and run `r` uses
+    rows `r * n_pairs` onwards of the OD panel for `panel_seed` (default:
+    `seed`), so replicates are independent of each other and of scheduling.
+    Pass `od_panel` (at least `n_pairs * runs` rows) to slice an existing
+    panel instead. With `workers > 1` they run on a thread pool sharing
+    `G`: the results are identical to the serial path.
+    `betweenness_tolerance` and `attack_rounds` are passed to
+    `select_edges_for_scenario`.
     """
-    G = load_city_graph(city, cache_dir="graphs")
+    if od_panel is None:
+        panel = get_od_panel(
+            G, n_pairs * runs, seed=seed if panel_seed is None else panel_seed
+        )
+    elif len(od_panel) < n_pairs * runs:
+        raise ValueError(
+            f"OD panel has {len(od_panel)} pairs; "
+            f"{runs} runs of {n_pairs} need {n_pairs * runs}."
+        )
+    else:
+        panel = od_panel
     rng = np.random.default_rng(seed)
+    run_seeds = [int(rng.integers(0, 1_000_000_000)) for _ in range(runs)]
 
-    rows: List[dict] = []
-    for run in range(runs):
-        run_seed = int(rng.integers(0, 1_000_000_000))
-
+    def replicate(run: int) -> Tuple[List[EdgeId], Dict]:
         edge_ids = select_edges_for_scenario(
             G,
             scenario=scenario,
             severity=severity,
-            seed=run_seed,
+            seed=run_seeds[run],
+            betweenness_tolerance=betweenness_tolerance,
+            attack_rounds=attack_rounds,
         )
         metrics = simulate_single_shock(
             G,
             edge_ids_to_remove=edge_ids,
-            n_pairs=n_pairs,
-            seed=run_seed,
+            od_panel=panel.take(run * n_pairs, (run + 1) * n_pairs),
         )
+        return edge_ids, metrics
+
+    if workers <= 1 or runs <= 1:
+        return [replicate(run) for run in range(runs)]
+    # Run 0 alone first: it fills the graph's lazy caches (routing matrix,
+    # betweenness ranking, ...) once instead of once per thread.
+    first = replicate(0)
+    with ThreadPoolExecutor(max_workers=min(workers, runs - 1)) as pool:
+        return [first, *pool.map(replicate, range(1, runs))]
+
 
+def run_single_scenario_for_city(
+    city: str,
+    scenario: str,
+    severity: float,
+    n_pairs: int = 20,
+    runs: int = 3,
+    seed: Optional[int] = None,
+    workers: int = 1,
+) -> pd.DataFrame:
+    """
+    Run the same scenario & severity multiple times for one city.
+    Returns a DataFrame with one row per run.
+
+    OD pairs come from the city's baseline panel for `seed` (see
+    `od_panel.get_od_panel`), run `r` using rows `r * n_pairs` onwards, so
+    every scenario and severity with the same seed shares the same pairs
+    and their baseline searches are done once. `workers > 1` runs the
+    replicates on threads (see `run_scenario_replicates`) with the same
+    results.
+    """
+    G = load_compiled_city_graph(city, cache_dir="graphs")
+    replicates = run_scenario_replicates(
+        G, scenario, severity, n_pairs=n_pairs, runs=runs, seed=seed, workers=workers
+    )
+
+    rows: List[dict] = []
+    for run, (_, metrics) in enumerate(replicates):
         row = {
             "city": city,
             "scenario": scenario,
@@ -52,4 +121,186 @@ def run_single_scenario_for_city(
         }
         rows.append(row)
 
-    return pd.DataFrame(rows)
\ No newline at end of file
+    return pd.DataFrame(rows)
+
+
+def run_severity_sweep_for_city(
+    city: str,
+    scenario: str,
+    severities: Sequence[float],
+    n_pairs: int = 20,
+    runs: int = 3,
+    seed: Optional[int] = None,
+    panel_seed: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Same rows as calling `run_single_scenario_for_city` once per severity
+    (ordered by severity, then run), but each run walks the nested removal
+    sets incrementally with `simulate_severity_sweep` instead of starting
+    every severity cold.
+
+    `panel_seed` (default: `seed`) picks the OD panel separately from the
+    per-run edge-selection seeds, so jobs with different seeds can still
+    share one panel per city.
+    """
+    G = load_compiled_city_graph(city, cache_dir="graphs")
+    panel = get_od_panel(
+        G, n_pairs * runs, seed=seed if panel_seed is None else panel_seed
+    )
+    rng = np.random.default_rng(seed)
+
+    per_run: List[List[dict]] = []
+    for run in range(runs):
+        run_seed = int(rng.integers(0, 1_000_000_000))
+        order, unit_ends = scenario_removal_order(G, scenario, seed=run_seed)
+        per_run.append(
+            simulate_severity_sweep(
+                G,
+                order,
+                unit_ends,
+                severities,
+                od_panel=panel.take(run * n_pairs, (run + 1) * n_pairs),
+            )
+        )
+
+    rows: List[dict] = []
+    for i, severity in enumerate(severities):
+        for run in range(runs):
+            metrics = dict(per_run[run][i])
+            metrics.pop("severity")
+            rows.append(
+                {
+                    "city": city,
+                    "scenario": scenario,
+                    "severity": severity,
+                    "run": run,
+                    **metrics,
+                }
+            )
+
+    return pd.DataFrame(rows)
+
+
+def _paired_difference(
+    a: np.ndarray, b: np.ndarray, confidence: float
+) -> Dict[str, float]:
+    """
+    Mean of the per-pair differences `a - b` with the variance of that mean,
+    its CI, and the variance the same estimate would have from independent
+    samples of the same size (for the variance-reduction factor).
+    """
+    d = a - b
+    n = len(d)
+    mean, half = mean_ci(d, confidence)
+    var = float(d.var(ddof=1)) / n if n > 1 else math.inf
+    unpaired = float(a.var(ddof=1) + b.var(ddof=1)) / n if n > 1 else math.inf
+    return {
+        "diff": mean,
+        "diff_var": var,
+        "diff_ci_low": mean - half,
+        "diff_ci_high": mean + half,
+        "unpaired_var": unpaired,
+        "variance_reduction": (
+            unpaired / var if var > 0 else (math.inf if unpaired > 0 else math.nan)
+        ),
+    }
+
+
+def compare_scenarios_for_city(
+    city: str,
+    scenarios: Sequence[str],
+    severities: Sequence[float],
+    n_pairs: int = 20,
+    runs: int = 3,
+    seed: Optional[int] = None,
+    penalty_ratio: float = 5.0,
+    confidence: float = 0.95,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Compare scenarios on one city with common random numbers.
+
+    In every run all scenarios and severities see the same slice of the
+    city's OD panel and the same random edge keys (see
+    `edge_selection.scenario_removal_order`), so differences between them
+    come from the scenarios and not from sampling. Per-pair ratios are
+    pooled over runs (`n_pairs * runs` pairs per setting).
+
+    Returns (levels, differences):
+      - levels: one row per (scenario, severity) with avg_ratio and
+        pct_disconnected and their CIs;
+      - differences: one row per severity and scenario pair (a, b), with
+        the paired difference a - b of both metrics, the variance of that
+        difference, its CI, and the variance reduction over unpaired
+        sampling of the same size.
+    """
+    G = load_compiled_city_graph(city, cache_dir="graphs")
+    panel = get_od_panel(G, n_pairs * runs, seed=seed)
+    rng = np.random.default_rng(seed)
+
+    per_setting: Dict[Tuple[str, float], List[np.ndarray]] = {}
+    for run in range(runs):
+        edge_keys = rng.random(G.n_edges)
+        run_panel = panel.take(run * n_pairs, (run + 1) * n_pairs)
+        for scenario in scenarios:
+            order, unit_ends = scenario_removal_order(G, scenario, edge_keys=edge_keys)
+            results = simulate_severity_sweep(
+                G,
+                order,
+                unit_ends,
+                severities,
+                penalty_ratio=penalty_ratio,
+                od_panel=run_panel,
+                with_pair_ratios=True,
+            )
+            for severity, metrics in zip(severities, results):
+                per_setting.setdefault((scenario, severity), []).append(
+                    metrics["pair_ratios"]
+                )
+
+    # Pairs without a finite baseline are dropped from every setting alike,
+    # so the per-pair arrays stay aligned.
+    raw = {key: np.concatenate(parts) for key, parts in per_setting.items()}
+    valid = ~np.isnan(next(iter(raw.values()))) if raw else np.empty(0, dtype=bool)
+    ratio = {k: np.where(np.isinf(r), penalty_ratio, r)[valid] for k, r in raw.items()}
+    lost = {k: 100.0 * np.isinf(r[valid]) for k, r in raw.items()}
+
+    levels: List[dict] = []
+    for scenario in scenarios:
+        for severity in severities:
+            key = (scenario, severity)
+            avg, avg_half = mean_ci(ratio[key], confidence)
+            pct, pct_half = mean_ci(lost[key], confidence)
+            levels.append(
+                {
+                    "city": city,
+                    "scenario": scenario,
+                    "severity": severity,
+                    "avg_ratio": avg,
+                    "avg_ratio_ci_low": avg - avg_half,
+                    "avg_ratio_ci_high": avg + avg_half,
+                    "pct_disconnected": pct,
+                    "pct_disconnected_ci_low": pct - pct_half,
+                    "pct_disconnected_ci_high": pct + pct_half,
+                    "n_pairs": int(valid.sum()),
+                }
+            )
+
+    differences: List[dict] = []
+    for severity in severities:
+        for i, a in enumerate(scenarios):
+            for b in scenarios[i + 1 :]:
+                row = {
+                    "city": city,
+                    "severity": severity,
+                    "scenario_a": a,
+                    "scenario_b": b,
+                    "n_pairs": int(valid.sum()),
+                }
+                for metric, values in (("avg_ratio", ratio), ("pct_disconnected", lost)):
+                    stats = _paired_difference(
+                        values[(a, severity)], values[(b, severity)], confidence
+                    )
+                    row.update({f"{metric}_{k}": v for k, v in stats.items()})
+                differences.append(row)
+
+    return pd.DataFrame(levels), pd.DataFrame(differences)
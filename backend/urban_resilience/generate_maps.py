@@ -2,16 +2,15 @@
 
 from __future__ import annotations
 
+import zlib
 from pathlib import Path
 
 import osmnx as ox
 import matplotlib.pyplot as plt
 
 from backend.urban_resilience.config import DEFAULT_CITIES, SCENARIOS, SEVERITIES
-from backend.urban_resilience.experiments import (
-    load_city_graph,
-    select_edges_for_scenario,
-)
+from backend.urban_resilience.edge_selection import scenario_removal_order
+from backend.urban_resilience.graph_loader import load_city_graph, load_compiled_city_graph
 
 
 def _clean_label(text: str) -> str:
@@ -130,22 +129,22 @@ def generate_all_maps(image_root: str = "data/maps") -> None:
         save_baseline_map(G, city, image_dir)
 
         # 2) scenarios × severities
+        cg = load_compiled_city_graph(city, cache_dir="graphs")
         for scenario in SCENARIOS:
+            # One removal ordering per (city, scenario); every severity is a
+            # prefix of it, so the maps show nested damage.
+            seed = zlib.crc32(f"{city}|{scenario}".encode())
+            order, unit_ends = scenario_removal_order(cg, scenario, seed=seed)
+
             for severity in SEVERITIES:
                 job_idx += 1
                 print(
                     f"[{job_idx}/{total_jobs}] {city} | {scenario} | severity={severity}"
                 )
 
-                # deterministic seed per (city, scenario, severity)
-                seed = abs(hash((city, scenario, severity))) % (10**9)
-
-                edge_ids = select_edges_for_scenario(
-                    G,
-                    scenario=scenario,
-                    severity=severity,
-                    seed=seed,
-                )
+                n_units = max(1, int(len(unit_ends) * severity))
+                n_edges = int(unit_ends[n_units - 1]) if len(unit_ends) else 0
+                edge_ids = cg.edge_ids(order[:n_edges])
 
                 save_scenario_map(
                     G,
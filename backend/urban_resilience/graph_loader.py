@@ -1,11 +1,248 @@
 # backend/urban_resilience/graph_loader.py
 
 from __future__ import annotations
+import contextlib
 import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional
+
 import osmnx as ox
 import networkx as nx
+import numpy as np
+
+from .config import DEFAULT_CITIES, GRAPH_CACHE_MAX_BYTES, MMAP_COMPILED_GRAPHS
+from .compiled_graph import (
+    CompiledGraph,
+    compile_graph,
+    is_compiled_graph_dir,
+    load_compiled_graph,
+    save_compiled_graph,
+)
+
+# Rough per-element footprint of an OSMnx MultiDiGraph (attribute dicts,
+# shapely geometries, adjacency dicts). Only used to budget the cache.
+_NX_BYTES_PER_NODE = 600
+_NX_BYTES_PER_EDGE = 1_500
+
+# Called with every graph object the cache drops, so modules holding
+# derived per-graph caches can release them at the same time.
+_EVICTION_HOOKS: List[Callable[[Any], None]] = []
+
+
+def register_eviction_hook(hook: Callable[[Any], None]) -> None:
+    """
+    Register `hook(graph)` to run whenever a graph leaves the cache.
+    """
+    if hook not in _EVICTION_HOOKS:
+        _EVICTION_HOOKS.append(hook)
+
+
+def estimate_graph_bytes(G: Any) -> int:
+    """
+    Estimated resident size of a cached graph, in bytes.
+    """
+    if isinstance(G, CompiledGraph):
+        derived = sum(
+            v.nbytes for v in G._derived.values() if isinstance(v, np.ndarray)
+        )
+        return G.nbytes + derived
+    return (
+        G.number_of_nodes() * _NX_BYTES_PER_NODE
+        + G.number_of_edges() * _NX_BYTES_PER_EDGE
+    )
+
+
+class GraphCache:
+    """
+    LRU cache of loaded graphs bounded by their estimated size in bytes.
+
+    Pinned keys are never evicted (they still count toward the budget).
+    Evicted graphs are handed to every registered eviction hook.
+    """
+
+    def __init__(self, max_bytes: int, pinned: Iterable[Hashable] = ()):
+        self.max_bytes = max_bytes
+        self.pinned = set(pinned)
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.RLock()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """
+        Like `get`, but without touching LRU order or counters.
+        """
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key: Hashable, G: Any) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._drop(key, run_hooks=self._entries[key] is not G)
+            self._entries[key] = G
+            # Derived arrays grow after insertion, so refresh every estimate.
+            for k, v in self._entries.items():
+                self._sizes[k] = estimate_graph_bytes(v)
+            self._evict(protect=key)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                self._drop(key)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return self._stats()
+
+    def _stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _evict(self, protect: Hashable) -> None:
+        # Oldest first; the entry just inserted survives even if oversized.
+        for key in list(self._entries):
+            if self.total_bytes <= self.max_bytes:
+                break
+            if key == protect or key in self.pinned:
+                continue
+            self._drop(key)
+            self.evictions += 1
+
+    def _drop(self, key: Hashable, run_hooks: bool = True) -> None:
+        G = self._entries.pop(key)
+        self._sizes.pop(key, None)
+        if run_hooks:
+            for hook in _EVICTION_HOOKS:
+                hook(G)
+
+
+def _safe_name(city: str) -> str:
+    return city.replace(",", "").replace(" ", "_")
+
 
-_GRAPH_CACHE: dict[str, nx.MultiDiGraph] = {}
+# One budget for both representations; keys are (kind, safe_name).
+_GRAPH_CACHE = GraphCache(
+    GRAPH_CACHE_MAX_BYTES,
+    pinned=[
+        (kind, _safe_name(city))
+        for city in DEFAULT_CITIES
+        for kind in ("graphml", "compiled")
+    ],
+)
+
+
+# Per-key locks for single-flight loading: concurrent requests for the same
+# uncached city wait for one loader instead of each parsing / downloading.
+# Entries are [lock, users] and are dropped when their last user leaves, so
+# the table only holds keys being loaded right now.
+_LOAD_LOCKS: Dict[Hashable, List[Any]] = {}
+_LOAD_LOCKS_GUARD = threading.Lock()
+
+
+@contextlib.contextmanager
+def _key_lock(key: Hashable) -> Iterator[None]:
+    with _LOAD_LOCKS_GUARD:
+        entry = _LOAD_LOCKS.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _LOAD_LOCKS_GUARD:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _LOAD_LOCKS[key]
+
+
+def _load_once(key: Hashable, loader: Callable[[], Any]) -> Any:
+    """
+    Return the cached graph for `key`, or run `loader` exactly once across
+    threads and cache its result. Other threads asking for the same key
+    block until it finishes and then share the result.
+    """
+    cached = _GRAPH_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    with _key_lock(key):
+        cached = _GRAPH_CACHE.peek(key)
+        if cached is not None:
+            return cached
+        G = loader()
+        _GRAPH_CACHE.put(key, G)
+        return G
+
+
+def graph_cache_stats() -> Dict[str, int]:
+    """
+    Size and hit / miss / eviction counters of the in-process graph cache.
+    """
+    return _GRAPH_CACHE.stats()
+
+
+def _read_or_download_graphml(city: str, cache_path: str) -> nx.MultiDiGraph:
+    # Serialise per file so only one thread downloads / writes it.
+    with _key_lock(("graphml-file", os.path.abspath(cache_path))):
+        if os.path.exists(cache_path):
+            return ox.load_graphml(cache_path)
+        G = ox.graph_from_place(city, network_type="drive")
+        G = ox.add_edge_speeds(G)
+        G = ox.add_edge_travel_times(G)
+        _save_graphml_atomic(G, cache_path)
+        return G
+
+
+def _save_graphml_atomic(G: nx.MultiDiGraph, cache_path: str) -> None:
+    """
+    Write GraphML to a temp file in the same directory, then rename it into
+    place, so other processes never read a partially written file.
+    """
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=os.path.basename(cache_path) + ".",
+        suffix=".tmp",
+        dir=os.path.dirname(os.path.abspath(cache_path)),
+    )
+    os.close(fd)
+    try:
+        ox.save_graphml(G, tmp_path)
+        os.replace(tmp_path, cache_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
 
 def load_city_graph(city: str, cache_dir: str = "graphs") -> nx.MultiDiGraph:
@@ -14,21 +251,46 @@ def load_city_graph(city: str, cache_dir: str = "graphs") -> nx.MultiDiGraph:
     and an in-memory cache so repeated calls reuse the same NetworkX object.
     """
     os.makedirs(cache_dir, exist_ok=True)
-    safe_name = city.replace(",", "").replace(" ", "_")
+    safe_name = _safe_name(city)
     cache_path = os.path.join(cache_dir, f"{safe_name}.graphml")
 
-    # --- NEW: in-memory cache first ---
-    if safe_name in _GRAPH_CACHE:
-        return _GRAPH_CACHE[safe_name]
+    # --- NEW: in-memory cache first, single-flight load otherwise ---
+    return _load_once(
+        ("graphml", safe_name),
+        lambda: _read_or_download_graphml(city, cache_path),
+    )
 
-    # Otherwise load from disk or download
-    if os.path.exists(cache_path):
-        G = ox.load_graphml(cache_path)
-    else:
-        G = ox.graph_from_place(city, network_type="drive")
-        G = ox.add_edge_speeds(G)
-        G = ox.add_edge_travel_times(G)
-        ox.save_graphml(G, cache_path)
 
-    _GRAPH_CACHE[safe_name] = G
-    return G
\ No newline at end of file
+def load_compiled_city_graph(
+    city: str,
+    cache_dir: str = "graphs",
+    mmap: bool | None = None,
+) -> CompiledGraph:
+    """
+    Load a city's road network as a CompiledGraph (flat NumPy arrays).
+
+    The compiled bundle lives next to the GraphML cache as `<city>.cgraph/`.
+    If it is missing it is built once from the GraphML graph (downloading
+    that first if needed), so later cold starts never parse GraphML.
+
+    `mmap` (default: config.MMAP_COMPILED_GRAPHS) memory-maps the bundle
+    read-only, so every process loading the same city shares its pages.
+    """
+    if mmap is None:
+        mmap = MMAP_COMPILED_GRAPHS
+    os.makedirs(cache_dir, exist_ok=True)
+    safe_name = _safe_name(city)
+    bundle_path = os.path.join(cache_dir, f"{safe_name}.cgraph")
+
+    def _load() -> CompiledGraph:
+        if not is_compiled_graph_dir(bundle_path):
+            # Read GraphML without caching the NetworkX object: it is only
+            # needed once, to build the bundle.
+            graphml_path = os.path.join(cache_dir, f"{safe_name}.graphml")
+            G = _read_or_download_graphml(city, graphml_path)
+            save_compiled_graph(compile_graph(G, name=city), bundle_path)
+
+        # Always reload from disk so a freshly built bundle is mapped as well.
+        return load_compiled_graph(bundle_path, mmap=mmap)
+
+    return _load_once(("compiled", safe_name), _load)
@@ -0,0 +1,250 @@
+# backend/urban_resilience/landmarks.py
+
+from __future__ import annotations
+import math
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+from .compiled_graph import (
+    CompiledGraph,
+    artifact_path,
+    load_npz_artifact,
+    save_npz_atomic,
+)
+from .routing import (
+    astar_search,
+    connected_mask,
+    largest_strong_component,
+    reverse_routing_matrix,
+    routing_matrix,
+)
+
+N_LANDMARKS = 16
+
+# Same mean Earth radius osmnx uses for great-circle edge lengths.
+_EARTH_RADIUS_M = 6_371_009.0
+
+
+@dataclass
+class Landmarks:
+    """
+    ALT preprocessing for one graph: distances from and to each landmark.
+
+    Arrays are node-major, shape (n_nodes, n_landmarks), float32. `slack`
+    is subtracted from every bound to absorb float32 rounding, so the
+    heuristic stays admissible.
+    """
+
+    nodes: np.ndarray
+    dist_from: np.ndarray   # dist_from[v, i] = d(landmark_i, v)
+    dist_to: np.ndarray     # dist_to[v, i]   = d(v, landmark_i)
+    slack: float
+
+
+def select_landmarks(
+    cg: CompiledGraph,
+    n_landmarks: int = N_LANDMARKS,
+    seed: int = 0,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Farthest-point landmark selection inside the largest strongly connected
+    component, so every landmark reaches (and is reached by) the bulk of
+    the network.
+
+    Returns (landmarks, dist_from, dist_to) with distance rows of shape
+    (n_landmarks, n_nodes), float64.
+    """
+    rng = np.random.default_rng(seed)
+    candidates = largest_strong_component(cg)
+    forward = routing_matrix(cg)
+    backward = reverse_routing_matrix(cg)
+
+    in_scc = np.zeros(cg.n_nodes, dtype=bool)
+    in_scc[candidates] = True
+
+    start = int(rng.choice(candidates))
+    d0 = dijkstra(forward, directed=True, indices=start)
+    current = int(np.argmax(np.where(in_scc, d0, -1.0)))
+
+    chosen: List[int] = []
+    rows_from: List[np.ndarray] = []
+    rows_to: List[np.ndarray] = []
+    closest = np.full(cg.n_nodes, np.inf)
+
+    for _ in range(min(n_landmarks, len(candidates))):
+        chosen.append(current)
+        d_from = dijkstra(forward, directed=True, indices=current)
+        d_to = dijkstra(backward, directed=True, indices=current)
+        rows_from.append(d_from)
+        rows_to.append(d_to)
+        # Next landmark: the SCC node farthest from all chosen ones.
+        closest = np.minimum(closest, d_from + d_to)
+        score = np.where(in_scc, closest, -1.0)
+        score[chosen] = -1.0
+        current = int(np.argmax(score))
+
+    return np.asarray(chosen), np.vstack(rows_from), np.vstack(rows_to)
+
+
+def build_landmarks(
+    cg: CompiledGraph,
+    n_landmarks: int = N_LANDMARKS,
+    seed: int = 0,
+) -> Landmarks:
+    nodes, d_from, d_to = select_landmarks(cg, n_landmarks, seed)
+    finite = np.concatenate([d_from[np.isfinite(d_from)], d_to[np.isfinite(d_to)]])
+    max_dist = float(finite.max()) if finite.size else 0.0
+    # Two float32-rounded terms per bound, each off by <= eps * max_dist.
+    slack = 2.0 * float(np.finfo(np.float32).eps) * max_dist
+    return Landmarks(
+        nodes=nodes,
+        dist_from=np.ascontiguousarray(d_from.T, dtype=np.float32),
+        dist_to=np.ascontiguousarray(d_to.T, dtype=np.float32),
+        slack=slack,
+    )
+
+
+def get_landmarks(
+    cg: CompiledGraph,
+    n_landmarks: int = N_LANDMARKS,
+    seed: int = 0,
+) -> Landmarks:
+    """
+    Landmarks for `cg`: memoised on the graph, persisted as
+    `<city>.landmarks.npz` next to its bundle, and rebuilt only when the
+    graph content or the parameters change.
+    """
+    key = ("landmarks", n_landmarks, seed)
+    if key in cg._derived:
+        return cg._derived[key]
+
+    path = artifact_path(cg, "landmarks")
+    data = load_npz_artifact(
+        path, cg.fingerprint, n_landmarks=n_landmarks, seed=seed
+    )
+    if data is not None:
+        lm = Landmarks(
+            nodes=data["nodes"],
+            dist_from=data["dist_from"],
+            dist_to=data["dist_to"],
+            slack=float(data["slack"]),
+        )
+    else:
+        lm = build_landmarks(cg, n_landmarks, seed)
+        if path:
+            save_npz_atomic(
+                path,
+                fingerprint=np.asarray(cg.fingerprint),
+                n_landmarks=np.asarray(n_landmarks),
+                seed=np.asarray(seed),
+                nodes=lm.nodes,
+                dist_from=lm.dist_from,
+                dist_to=lm.dist_to,
+                slack=np.asarray(lm.slack),
+            )
+
+    cg._derived[key] = lm
+    return lm
+
+
+def alt_heuristic(lm: Landmarks, target: int) -> Callable[[int], float]:
+    """
+    ALT lower bound on d(v, target) from the triangle inequality:
+    max over landmarks L of d(L, t) - d(L, v) and d(v, L) - d(t, L).
+
+    Bounds computed on the intact graph stay admissible on a damaged one,
+    since removing edges never shortens a path.
+    """
+    from_t = lm.dist_from[target].astype(np.float64)
+    to_t = lm.dist_to[target].astype(np.float64)
+    dist_from = lm.dist_from
+    dist_to = lm.dist_to
+    slack = lm.slack
+
+    def h(v: int) -> float:
+        with np.errstate(invalid="ignore"):
+            bounds = np.concatenate([from_t - dist_from[v], dist_to[v] - to_t])
+        bounds = bounds[np.isfinite(bounds)]
+        if bounds.size == 0:
+            return 0.0
+        return max(float(bounds.max()) - slack, 0.0)
+
+    return h
+
+
+def max_speed(cg: CompiledGraph) -> float:
+    """
+    Fastest edge speed in metres per routing-weight unit (m/s for
+    travel_time, 1.0 when routing on length).
+    """
+    if "max_speed" not in cg._derived:
+        if cg.weight != "travel_time":
+            speed = 1.0
+        else:
+            tt = np.asarray(cg.travel_time, dtype=np.float64)
+            ln = np.asarray(cg.length, dtype=np.float64)
+            ok = tt > 0
+            speed = float((ln[ok] / tt[ok]).max()) if ok.any() else math.inf
+        cg._derived["max_speed"] = speed
+    return cg._derived["max_speed"]
+
+
+def geo_heuristic(cg: CompiledGraph, target: int) -> Callable[[int], float]:
+    """
+    Great-circle distance to `target` in metres divided by the fastest edge
+    speed: a correctly scaled admissible bound when routing on travel time
+    (or plain metres when routing on length).
+    """
+    if "lonlat_rad" not in cg._derived:
+        cg._derived["lonlat_rad"] = (
+            np.radians(cg.x).tolist(),
+            np.radians(cg.y).tolist(),
+        )
+    lon, lat = cg._derived["lonlat_rad"]
+    speed = max_speed(cg)
+    # Shave a hair off so float rounding cannot overshoot the true bound.
+    scale = 0.999 * _EARTH_RADIUS_M / speed if math.isfinite(speed) else 0.0
+    tlon, tlat = lon[target], lat[target]
+    cos_tlat = math.cos(tlat)
+
+    def h(v: int) -> float:
+        if math.isnan(lon[v]) or math.isnan(tlon):
+            return 0.0
+        a = (
+            math.sin((lat[v] - tlat) / 2) ** 2
+            + math.cos(lat[v]) * cos_tlat * math.sin((lon[v] - tlon) / 2) ** 2
+        )
+        return scale * 2 * math.asin(min(1.0, math.sqrt(a)))
+
+    return h
+
+
+def alt_pair_distances(
+    cg: CompiledGraph,
+    pairs: Sequence[Tuple[int, int]],
+    removed: Optional[np.ndarray] = None,
+    stats: Optional[Dict[str, int]] = None,
+) -> np.ndarray:
+    """
+    Shortest-path length for each (origin, destination) pair using A* with
+    the landmark heuristic. `stats["settled"]` accumulates settled nodes.
+
+    Pairs that `connected_mask` already proves disconnected are answered
+    `inf` without a search.
+    """
+    lm = get_landmarks(cg)
+    od = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    live = connected_mask(cg, od, removed)
+    blocked: Set[int] = set() if removed is None else set(np.asarray(removed).tolist())
+    out = np.full(len(od), np.inf)
+    settled = 0
+    for i in np.flatnonzero(live).tolist():
+        u, v = int(od[i, 0]), int(od[i, 1])
+        out[i], n = astar_search(cg, u, v, blocked, alt_heuristic(lm, v))
+        settled += n
+    if stats is not None:
+        stats["settled"] = stats.get("settled", 0) + settled
+    return out
@@ -9,6 +9,8 @@ import networkx as nx
 import numpy as np
 from community import community_louvain  # from python-louvain
 
+from .artifacts import get_artifact
+from .betweenness import betweenness_centrality
 from .edge_selection import graph_to_edges_gdf
 
 
@@ -29,15 +31,19 @@ def _largest_component_subgraph(G: nx.Graph) -> nx.Graph:
     return H.subgraph(largest_cc).copy()
 
 
-def _approx_average_shortest_path_length(G: nx.Graph, k: int = 200) -> float | None:
+def _approx_average_shortest_path_length(
+    G: nx.Graph, k: int = 200, H: nx.Graph | None = None
+) -> float | None:
     """
     Approximate average shortest path length by sampling up to k source nodes
-    from the largest connected component. Returns None if graph too small.
+    from the largest connected component (`H`, if already known). Returns
+    None if graph too small.
     """
     if G.number_of_nodes() < 2:
         return None
 
-    H = _largest_component_subgraph(G)
+    if H is None:
+        H = _largest_component_subgraph(G)
     nodes = list(H.nodes())
     if len(nodes) < 2:
         return None
@@ -58,11 +64,9 @@ def _approx_average_shortest_path_length(G: nx.Graph, k: int = 200) -> float | N
     return float(sum(lengths) / len(lengths))
 
 
-def compute_city_features(G: nx.MultiDiGraph) -> Dict[str, Any]:
+def _simple_length_graph(G: nx.MultiDiGraph) -> nx.Graph:
     """
-    Compute structural graph features for a city road network.
-
-    Returns a dict with numeric values only (good for ML).
+    Simple undirected graph keeping the shortest parallel edge's length.
     """
     if isinstance(G, (nx.MultiDiGraph, nx.MultiGraph)):
         Gu = nx.Graph()
@@ -73,8 +77,19 @@ def compute_city_features(G: nx.MultiDiGraph) -> Dict[str, Any]:
                     Gu[u][v]["length"] = length
             else:
                 Gu.add_edge(u, v, length=length)
-    else:
-        Gu = G.copy()
+        return Gu
+    return G.copy()
+
+
+def compute_city_features(G: nx.MultiDiGraph) -> Dict[str, Any]:
+    """
+    Compute structural graph features for a city road network.
+
+    Returns a dict with numeric values only (good for ML).
+    """
+    # Both views are shared per-graph artifacts (see `artifacts.py`).
+    Gu = get_artifact(G, "feature_graph", lambda: _simple_length_graph(G))
+    giant = get_artifact(G, "feature_giant", lambda: _largest_component_subgraph(Gu))
 
     n_nodes = Gu.number_of_nodes()
     n_edges = Gu.number_of_edges()
@@ -109,24 +124,22 @@ def compute_city_features(G: nx.MultiDiGraph) -> Dict[str, Any]:
         density = 0.0
 
     if n_nodes > 0:
-        H = _largest_component_subgraph(Gu)
-        giant_frac = H.number_of_nodes() / n_nodes
+        giant_frac = giant.number_of_nodes() / n_nodes
     else:
         giant_frac = 0.0
 
     try:
-        approx_aspl = _approx_average_shortest_path_length(Gu, k=200)
+        approx_aspl = _approx_average_shortest_path_length(Gu, k=200, H=giant)
     except Exception:
         approx_aspl = None
     if approx_aspl is None:
         approx_aspl = 0.0
 
     try:
-        H = _largest_component_subgraph(Gu)
-        if H.number_of_nodes() > 0:
-            partition = community_louvain.best_partition(H)
+        if giant.number_of_nodes() > 0:
+            partition = community_louvain.best_partition(giant)
             # compute modularity
-            mod_val = community_louvain.modularity(partition, H)
+            mod_val = community_louvain.modularity(partition, giant)
             modularity = float(mod_val)
         else:
             modularity = 0.0
@@ -178,9 +191,7 @@ def compute_city_features(G: nx.MultiDiGraph) -> Dict[str, Any]:
             sample_nodes = random.sample(nodes, 300)
         else:
             sample_nodes = nodes
-        bc = nx.betweenness_centrality(
-            Gu, k=len(sample_nodes), normalized=True, seed=42
-        ).values()
+        bc = betweenness_centrality(Gu, k=len(sample_nodes), seed=42).values()
         bc_list = list(bc)
         bc_mean = float(np.mean(bc_list)) if bc_list else 0.0
         bc_std = float(np.std(bc_list)) if bc_list else 0.0
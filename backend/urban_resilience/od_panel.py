@@ -0,0 +1,100 @@
+# backend/urban_resilience/od_panel.py
+
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import networkx as nx
+
+from .compiled_graph import (
+    CompiledGraph,
+    artifact_path,
+    as_compiled,
+    load_npz_artifact,
+    save_npz_atomic,
+)
+from .routing import pair_distances
+
+
+@dataclass
+class ODPanel:
+    """
+    Fixed set of origin–destination pairs with their undamaged
+    shortest-path lengths, shared by every scenario and severity run on a
+    city so that each simulation only pays for the damaged searches.
+    """
+
+    pairs: np.ndarray      # (n, 2) node indices into the compiled graph
+    baseline: np.ndarray   # (n,) intact shortest-path length per pair
+    fingerprint: str
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def take(self, start: int, stop: int) -> "ODPanel":
+        """
+        Rows [start, stop) as their own panel (views, no copy).
+        """
+        return ODPanel(
+            pairs=self.pairs[start:stop],
+            baseline=self.baseline[start:stop],
+            fingerprint=self.fingerprint,
+        )
+
+
+def build_od_panel(cg: CompiledGraph, n_pairs: int, seed: int) -> ODPanel:
+    # Imported here: simulation imports this module for the ODPanel type.
+    from .simulation import sample_od_pairs
+
+    pairs = np.asarray(sample_od_pairs(cg, n_pairs=n_pairs, seed=seed), dtype=np.int64)
+    return ODPanel(
+        pairs=pairs.reshape(-1, 2),
+        baseline=pair_distances(cg, pairs),
+        fingerprint=cg.fingerprint,
+    )
+
+
+def get_od_panel(
+    G: nx.MultiDiGraph | CompiledGraph,
+    n_pairs: int,
+    seed: Optional[int] = None,
+) -> ODPanel:
+    """
+    OD panel of `n_pairs` pairs for `G`: memoised on the graph and, for a
+    graph loaded from disk with a fixed `seed`, persisted as
+    `<city>.od_panel_<n_pairs>_<seed>.npz` next to its bundle. Rebuilt only
+    when the graph content, `n_pairs` or `seed` change.
+
+    With `seed=None` a fresh random panel is drawn and not persisted.
+    """
+    cg = as_compiled(G)
+    if seed is None:
+        return build_od_panel(cg, n_pairs, seed=None)
+
+    key = ("od_panel", n_pairs, seed)
+    if key in cg._derived:
+        return cg._derived[key]
+
+    path = artifact_path(cg, f"od_panel_{n_pairs}_{seed}")
+    data = load_npz_artifact(path, cg.fingerprint, n_pairs=n_pairs, seed=seed)
+    if data is not None:
+        panel = ODPanel(
+            pairs=data["pairs"],
+            baseline=data["baseline"],
+            fingerprint=cg.fingerprint,
+        )
+    else:
+        panel = build_od_panel(cg, n_pairs, seed)
+        if path:
+            save_npz_atomic(
+                path,
+                fingerprint=np.asarray(cg.fingerprint),
+                n_pairs=np.asarray(n_pairs),
+                seed=np.asarray(seed),
+                pairs=panel.pairs,
+                baseline=panel.baseline,
+            )
+
+    cg._derived[key] = panel
+    return panel
@@ -0,0 +1,184 @@
+# backend/urban_resilience/parallel.py
+
+from __future__ import annotations
+import math
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .config import BATCH_WORKERS
+from .experiments import run_severity_sweep_for_city
+from .result_store import ResultStore
+
+
+@dataclass(frozen=True)
+class SweepJob:
+    """
+    One (city, scenario) severity sweep of a batch. `index` is the job's
+    position in the batch, used to put results back in order.
+    """
+
+    index: int
+    city: str
+    scenario: str
+    severities: Tuple[float, ...]
+    n_pairs: int
+    runs: int
+    seed: int
+    panel_seed: int
+
+
+def spawn_seeds(root_seed: int, n: int) -> List[int]:
+    """
+    `n` independent, reproducible job seeds derived from `root_seed` with
+    `SeedSequence.spawn` (job i always gets the same seed).
+    """
+    children = np.random.SeedSequence(root_seed).spawn(n)
+    return [int(c.generate_state(1, dtype=np.uint32)[0]) for c in children]
+
+
+def make_sweep_jobs(
+    cities: Sequence[str],
+    scenarios: Sequence[str],
+    severities: Sequence[float],
+    n_pairs: int,
+    runs: int,
+    seed: int,
+    panel_seed: Optional[int] = None,
+) -> List[SweepJob]:
+    """
+    One job per (city, scenario) in city-major order. Edge selection uses
+    a spawned per-job seed; the OD panel of every job on a city uses
+    `panel_seed` (default: `seed`), so baselines are still shared across
+    scenarios.
+    """
+    if panel_seed is None:
+        panel_seed = seed
+    combos = [(city, scenario) for city in cities for scenario in scenarios]
+    return [
+        SweepJob(
+            index=i,
+            city=city,
+            scenario=scenario,
+            severities=tuple(severities),
+            n_pairs=n_pairs,
+            runs=runs,
+            seed=job_seed,
+            panel_seed=panel_seed,
+        )
+        for i, ((city, scenario), job_seed) in enumerate(
+            zip(combos, spawn_seeds(seed, len(combos)))
+        )
+    ]
+
+
+def run_sweep_job(job: SweepJob) -> pd.DataFrame:
+    return run_severity_sweep_for_city(
+        city=job.city,
+        scenario=job.scenario,
+        severities=job.severities,
+        n_pairs=job.n_pairs,
+        runs=job.runs,
+        seed=job.seed,
+        panel_seed=job.panel_seed,
+    )
+
+
+def city_affine_chunks(jobs: Sequence[SweepJob], workers: int) -> List[List[SweepJob]]:
+    """
+    Group jobs by city, then split each city's group into just enough
+    chunks to keep `workers` processes busy. A chunk runs in one worker,
+    which loads the city graph once (graph_loader's cache keeps it) and
+    reuses it for every job in the chunk.
+    """
+    by_city: Dict[str, List[SweepJob]] = {}
+    for job in jobs:
+        by_city.setdefault(job.city, []).append(job)
+
+    per_city = max(1, math.ceil(workers / max(len(by_city), 1)))
+    chunks: List[List[SweepJob]] = []
+    for group in by_city.values():
+        n_chunks = min(per_city, len(group))
+        size = math.ceil(len(group) / n_chunks)
+        chunks.extend(group[i : i + size] for i in range(0, len(group), size))
+    # Biggest chunks first so the tail of the batch is short.
+    chunks.sort(key=len, reverse=True)
+    return chunks
+
+
+def sweep_job_keys(job: SweepJob) -> List[Tuple[str, str, float, int]]:
+    """
+    (city, scenario, severity, run) of every row the job produces.
+    """
+    return [
+        (job.city, job.scenario, float(sev), run)
+        for sev in job.severities
+        for run in range(job.runs)
+    ]
+
+
+def _run_chunk(
+    chunk: List[SweepJob],
+    store_root: Optional[str] = None,
+) -> List[Tuple[int, pd.DataFrame]]:
+    store = ResultStore(store_root) if store_root else None
+    out = []
+    for job in chunk:
+        df = run_sweep_job(job)
+        if store is not None:
+            # Checkpoint each job as soon as it is done, from the worker.
+            store.append(df, tag=f"{job.index:06d}")
+        out.append((job.index, df))
+    return out
+
+
+def iter_sweep_jobs(
+    jobs: Sequence[SweepJob],
+    workers: Optional[int] = None,
+    store_root: Optional[str] = None,
+) -> Iterator[Tuple[SweepJob, pd.DataFrame]]:
+    """
+    Run `jobs` on `workers` processes (default `BATCH_WORKERS`; 1 runs
+    in-process) and yield `(job, df)` as jobs finish, in completion order.
+
+    Every job's randomness comes from its own seed, so results do not
+    depend on the worker count or on scheduling. With `store_root`, each
+    job's rows are appended to that `ResultStore` as soon as the job ends.
+    """
+    workers = BATCH_WORKERS if workers is None else workers
+    by_index = {job.index: job for job in jobs}
+
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            for index, df in _run_chunk([job], store_root):
+                yield job, df
+        return
+
+    chunks = city_affine_chunks(jobs, workers)
+    ctx = mp.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=ctx) as pool:
+        futures = [pool.submit(_run_chunk, chunk, store_root) for chunk in chunks]
+        for fut in as_completed(futures):
+            for index, df in fut.result():
+                yield by_index[index], df
+
+
+def run_sweep_jobs(
+    jobs: Sequence[SweepJob],
+    workers: Optional[int] = None,
+    on_done: Optional[Callable[[SweepJob, pd.DataFrame], None]] = None,
+) -> List[pd.DataFrame]:
+    """
+    Run `jobs` (see `iter_sweep_jobs`) and return their DataFrames in job
+    order. `on_done(job, df)` is called in the parent as each job finishes.
+    """
+    results: Dict[int, pd.DataFrame] = {}
+    for job, df in iter_sweep_jobs(jobs, workers):
+        results[job.index] = df
+        if on_done is not None:
+            on_done(job, df)
+    return [results[job.index] for job in jobs]
@@ -0,0 +1,83 @@
+# backend/urban_resilience/precompute.py
+
+from __future__ import annotations
+import argparse
+import time
+from typing import Iterable
+
+from .config import API_OD_PANEL_PAIRS, DEFAULT_CITIES, OD_PANEL_SEED
+from .contraction import get_contraction_hierarchy
+from .edge_selection import get_edge_betweenness_ranking
+from .graph_loader import load_compiled_city_graph
+from .landmarks import get_landmarks
+from .od_panel import get_od_panel
+
+# Artifacts `precompute_city` can build, in build order.
+ARTIFACTS = ("ch", "landmarks", "betweenness", "od-panel")
+
+
+def precompute_city(
+    city: str,
+    cache_dir: str = "graphs",
+    artifacts: Iterable[str] = ARTIFACTS,
+) -> None:
+    """
+    Build a city's compiled bundle and the slow derived artifacts persisted
+    next to it, so request-time code only ever loads them:
+
+      ch           contraction hierarchy (`<city>.ch.npz`); built and
+                   queried in pure Python, so this is the slowest step
+      landmarks    ALT landmark distances (`<city>.landmarks.npz`)
+      betweenness  Targeted Attack edge ranking (`<city>.betweenness_*.npz`)
+      od-panel     the API's OD panel (`<city>.od_panel_*.npz`)
+    """
+    wanted = set(artifacts)
+    print(f"=== {city} ===")
+    t0 = time.perf_counter()
+    cg = load_compiled_city_graph(city, cache_dir=cache_dir)
+    print(f"[OK] bundle: {cg.n_nodes} nodes, {cg.n_edges} edges")
+    if "ch" in wanted:
+        ch = get_contraction_hierarchy(cg, build=True, verbose=True)
+        print(f"[OK] contraction hierarchy: {len(ch.arc_src)} arcs")
+    if "landmarks" in wanted:
+        lm = get_landmarks(cg)
+        print(f"[OK] landmarks: {len(lm.nodes)}")
+    if "betweenness" in wanted:
+        ranked = get_edge_betweenness_ranking(cg)
+        print(f"[OK] edge betweenness ranking: {len(ranked)} pairs")
+    if "od-panel" in wanted:
+        panel = get_od_panel(cg, API_OD_PANEL_PAIRS, seed=OD_PANEL_SEED)
+        print(f"[OK] OD panel: {len(panel)} pairs")
+    print(f"[OK] {city} in {time.perf_counter() - t0:.1f} s")
+
+
+def main() -> None:
+    """
+    Offline build:
+    python -m backend.urban_resilience.precompute [city ...] [--cache-dir DIR]
+    """
+    parser = argparse.ArgumentParser(
+        description="Build compiled graph bundles and their persisted artifacts."
+    )
+    parser.add_argument("cities", nargs="*", help="default: config.DEFAULT_CITIES")
+    parser.add_argument("--cache-dir", default="graphs", help="graph cache directory")
+    parser.add_argument(
+        "--artifacts",
+        nargs="+",
+        choices=ARTIFACTS,
+        default=list(ARTIFACTS),
+        help=(
+            "artifacts to build (default: all). The contraction hierarchy "
+            "('ch') is pure Python: it takes the longest to build, and its "
+            "queries settle few nodes but are not sub-millisecond like "
+            "compiled CH libraries"
+        ),
+    )
+    args = parser.parse_args()
+
+    for city in args.cities or DEFAULT_CITIES:
+        precompute_city(city, cache_dir=args.cache_dir, artifacts=args.artifacts)
+
+
+if __name__ == "__main__":
+    main()
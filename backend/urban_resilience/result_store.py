@@ -0,0 +1,217 @@
+# backend/urban_resilience/result_store.py
+
+from __future__ import annotations
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import IO, Any, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Values of the key columns of one row, e.g. (city, scenario, severity, run).
+ResultKey = Tuple[Any, ...]
+
+KEY_COLUMNS = ("city", "scenario", "severity", "run")
+
+
+def _plain(value: Any) -> Any:
+    # numpy scalars -> Python scalars, so keys survive a JSON round trip.
+    return value.item() if hasattr(value, "item") else value
+
+
+@contextlib.contextmanager
+def _exclusive_lock(fh: IO) -> Iterator[None]:
+    """
+    Hold an exclusive inter-process lock on an open file (flock on POSIX,
+    a lock on its first byte on Windows).
+    """
+    if fcntl is not None:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+        return
+    fd = fh.fileno()
+    os.lseek(fd, 0, os.SEEK_SET)
+    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+    try:
+        yield
+    finally:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class ResultStore:
+    """
+    Append-only, crash-safe result directory for long batches:
+
+        <root>/parts/<part>.parquet   one Parquet file per finished job
+        <root>/manifest.jsonl         one line per part: file + row keys
+
+    A part is written to a temp file and renamed into place *before* its
+    manifest line is appended (and fsynced), so the manifest only ever
+    lists complete parts. Several processes may append to one store.
+    Nothing but the set of finished keys is held in memory, however large
+    the sweep grows.
+    """
+
+    def __init__(
+        self,
+        root: str | os.PathLike,
+        key_columns: Sequence[str] = KEY_COLUMNS,
+    ):
+        self.root = Path(root)
+        self.key_columns = list(key_columns)
+        self.parts_dir = self.root / "parts"
+        self.manifest_path = self.root / "manifest.jsonl"
+        self._done: Optional[Set[ResultKey]] = None
+
+    def exists(self) -> bool:
+        return self.manifest_path.exists()
+
+    def parts(self) -> Iterator[Tuple[str, List[ResultKey]]]:
+        """
+        (part file name, keys) for every manifest entry, in write order. A
+        torn last line from a crash mid-append is ignored.
+        """
+        if not self.manifest_path.exists():
+            return
+        with open(self.manifest_path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                yield entry["part"], [tuple(k) for k in entry["keys"]]
+
+    def row_keys(self, df: pd.DataFrame) -> List[ResultKey]:
+        return [
+            tuple(_plain(v) for v in row)
+            for row in df[self.key_columns].itertuples(index=False)
+        ]
+
+    def completed(self) -> Set[ResultKey]:
+        if self._done is None:
+            self._done = {k for _, keys in self.parts() for k in keys}
+        return self._done
+
+    def is_complete(self, keys: Iterable[ResultKey]) -> bool:
+        done = self.completed()
+        return all(k in done for k in keys)
+
+    def append(self, df: pd.DataFrame, tag: str) -> None:
+        """
+        Persist the rows of one finished job. Rows whose key is already in
+        the manifest (a job re-run after a partial resume) are dropped.
+        """
+        keys = self.row_keys(df)
+        done = self.completed()
+        fresh = [k not in done for k in keys]
+        if not any(fresh):
+            return
+        df = df[fresh]
+        keys = [k for k, f in zip(keys, fresh) if f]
+
+        self.parts_dir.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha1(json.dumps(keys).encode("utf-8")).hexdigest()[:12]
+        name = f"{tag}-{digest}.parquet"
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=name + ".", suffix=".tmp", dir=self.parts_dir
+        )
+        os.close(fd)
+        try:
+            pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path)
+            os.replace(tmp_path, self.parts_dir / name)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        # Worker processes share the manifest: lock around the append.
+        with open(self.manifest_path, "a", encoding="utf-8") as fh:
+            with _exclusive_lock(fh):
+                line = json.dumps({"part": name, "keys": keys}) + "\n"
+                if not self._ends_with_newline():
+                    # Terminate a torn line left by a crash mid-append.
+                    line = "\n" + line
+                fh.write(line)
+                fh.flush()
+                os.fsync(fh.fileno())
+        done.update(keys)
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.manifest_path, "rb") as fh:
+            fh.seek(0, os.SEEK_END)
+            if fh.tell() == 0:
+                return True
+            fh.seek(-1, os.SEEK_END)
+            return fh.read(1) == b"\n"
+
+    def consolidate(
+        self,
+        parquet_path: Optional[str | os.PathLike] = None,
+        csv_path: Optional[str | os.PathLike] = None,
+    ) -> int:
+        """
+        Stream every part into one Parquet and/or CSV file, holding one part
+        in memory at a time. Parts are written in part-name order, so
+        callers that tag parts with a zero-padded job index get rows in job
+        order no matter in which order jobs finished. Returns the number of
+        rows written.
+        """
+        names = sorted(name for name, _ in self.parts())
+        if not names:
+            return 0
+        # A column that is all-null in one part (e.g. a missing label) and
+        # typed in another must still land in one schema; parts written
+        # before a column existed get it as nulls.
+        schema = pa.unify_schemas(
+            [pq.read_schema(self.parts_dir / name) for name in names],
+            promote_options="permissive",
+        )
+        writer = None
+        n_rows = 0
+        for name in names:
+            table = pq.read_table(self.parts_dir / name)
+            for field in schema:
+                if field.name not in table.column_names:
+                    table = table.append_column(
+                        field.name, pa.nulls(table.num_rows, type=field.type)
+                    )
+            table = table.select(schema.names).cast(schema)
+            if parquet_path is not None:
+                if writer is None:
+                    writer = pq.ParquetWriter(str(parquet_path), schema)
+                writer.write_table(table)
+            if csv_path is not None:
+                table.to_pandas().to_csv(
+                    csv_path, mode="a" if n_rows else "w", header=not n_rows, index=False
+                )
+            n_rows += table.num_rows
+        if writer is not None:
+            writer.close()
+        return n_rows
+
+    def clear(self) -> None:
+        """
+        Delete every part and the manifest (and `root`, if nothing else is
+        left in it), e.g. once the parts have been consolidated elsewhere.
+        """
+        shutil.rmtree(self.parts_dir, ignore_errors=True)
+        with contextlib.suppress(FileNotFoundError):
+            self.manifest_path.unlink()
+        with contextlib.suppress(OSError):
+            self.root.rmdir()
+        self._done = None
@@ -0,0 +1,390 @@
+# backend/urban_resilience/routing.py
+
+from __future__ import annotations
+import heapq
+import math
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components, dijkstra
+
+from .compiled_graph import CompiledGraph
+
+# Max number of single-source rows materialised at once (rows are n floats).
+_SOURCE_CHUNK = 16
+
+
+def _pair_structure(cg: CompiledGraph) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Collapse parallel edges into (u, v) pairs.
+
+    Edges are sorted by (source, target, key), so each pair is a contiguous
+    run. Returns (pair_starts, pair_targets, pair_indptr): the first edge of
+    every pair (plus a final sentinel equal to m), its target node and CSR
+    offsets over pairs.
+    """
+    if "pair_structure" not in cg._derived:
+        src = cg.edge_sources
+        tgt = cg.targets
+        if cg.n_edges:
+            new_pair = np.ones(cg.n_edges, dtype=bool)
+            new_pair[1:] = (src[1:] != src[:-1]) | (tgt[1:] != tgt[:-1])
+            pair_starts = np.flatnonzero(new_pair)
+        else:
+            pair_starts = np.empty(0, dtype=np.int64)
+        pair_targets = tgt[pair_starts].astype(np.int32)
+        pair_indptr = np.zeros(cg.n_nodes + 1, dtype=np.int32)
+        np.cumsum(
+            np.bincount(src[pair_starts], minlength=cg.n_nodes), out=pair_indptr[1:]
+        )
+        pair_starts = np.append(pair_starts, cg.n_edges)
+        cg._derived["pair_structure"] = (pair_starts, pair_targets, pair_indptr)
+    return cg._derived["pair_structure"]
+
+
+def _edge_pair(cg: CompiledGraph) -> np.ndarray:
+    """
+    Pair index of every edge.
+    """
+    if "edge_pair" not in cg._derived:
+        pair_starts = _pair_structure(cg)[0]
+        cg._derived["edge_pair"] = (
+            np.repeat(
+                np.arange(len(pair_starts) - 1, dtype=np.int32), np.diff(pair_starts)
+            )
+        )
+    return cg._derived["edge_pair"]
+
+
+def routing_matrix(cg: CompiledGraph) -> csr_matrix:
+    """
+    Sparse (n x n) weight matrix of the intact graph for
+    `scipy.sparse.csgraph`.
+
+    Parallel edges collapse to their cheapest member, which is how NetworkX
+    weighs MultiDiGraph edges in shortest-path searches.
+    """
+    if "routing_matrix" not in cg._derived:
+        pair_starts, pair_targets, pair_indptr = _pair_structure(cg)
+        data = (
+            np.minimum.reduceat(cg.weights, pair_starts[:-1])
+            if cg.n_edges
+            else np.empty(0, dtype=np.float64)
+        )
+        cg._derived["routing_matrix"] = csr_matrix(
+            (data, pair_targets, pair_indptr), shape=(cg.n_nodes, cg.n_nodes)
+        )
+    return cg._derived["routing_matrix"]
+
+
+def damaged_pair_weights(
+    cg: CompiledGraph,
+    removed: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pairs touched by the removed edges and their new (cheapest surviving,
+    or `inf`) weights. Costs O(number of removed edges), not O(m).
+    """
+    removed = np.unique(np.asarray(removed, dtype=np.int64))
+    pair_starts = _pair_structure(cg)[0]
+    pairs = np.unique(_edge_pair(cg)[removed])
+    starts = pair_starts[pairs]
+    sizes = pair_starts[pairs + 1] - starts
+    offsets = np.zeros(len(pairs), dtype=np.int64)
+    np.cumsum(sizes[:-1], out=offsets[1:])
+    edges = np.repeat(starts - offsets, sizes) + np.arange(int(sizes.sum()))
+    w = cg.weights[edges]
+    w[np.isin(edges, removed, assume_unique=True)] = np.inf
+    return pairs, np.minimum.reduceat(w, offsets)
+
+
+@contextmanager
+def damaged_matrix(
+    cg: CompiledGraph,
+    removed: Optional[np.ndarray] = None,
+) -> Iterator[csr_matrix]:
+    """
+    Routing matrix with `removed` edges masked out (infinite weight).
+
+    The damage is a patch over the shared, immutable graph structure: each
+    thread keeps one scratch weight vector per graph, overwrites only the
+    pairs touched by the removed edges for the duration of the block, and
+    restores them afterwards. No per-scenario allocation proportional to
+    the size of the graph is made and nothing is copied.
+    """
+    base = routing_matrix(cg)
+    if removed is None or len(removed) == 0:
+        yield base
+        return
+
+    pairs, new_w = damaged_pair_weights(cg, removed)
+    local = cg._derived.setdefault("scratch", threading.local())
+    if getattr(local, "busy", False):
+        # Nested damaged views in one thread: fall back to a private copy.
+        data = base.data.copy()
+        data[pairs] = new_w
+        yield csr_matrix((data, base.indices, base.indptr), shape=base.shape)
+        return
+
+    if getattr(local, "matrix", None) is None:
+        local.matrix = csr_matrix(
+            (base.data.copy(), base.indices, base.indptr), shape=base.shape
+        )
+    matrix = local.matrix
+    local.busy = True
+    matrix.data[pairs] = new_w
+    try:
+        yield matrix
+    finally:
+        matrix.data[pairs] = base.data[pairs]
+        local.busy = False
+
+
+def distance_rows(
+    cg: CompiledGraph,
+    origins: np.ndarray,
+    removed: Optional[np.ndarray] = None,
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Yield `(offset, rows)` where `rows[i]` holds the shortest-path lengths
+    from `origins[offset + i]` to every node (`inf` if unreachable).
+
+    One C-level Dijkstra per origin, in chunks so that at most
+    `_SOURCE_CHUNK` full distance rows are held at a time.
+    """
+    origins = np.asarray(origins, dtype=np.int64)
+    with damaged_matrix(cg, removed) as matrix:
+        for start in range(0, len(origins), _SOURCE_CHUNK):
+            chunk = origins[start : start + _SOURCE_CHUNK]
+            rows = dijkstra(matrix, directed=True, indices=chunk)
+            yield start, rows.reshape(len(chunk), -1)
+
+
+def damaged_weak_labels(cg: CompiledGraph, removed: np.ndarray) -> np.ndarray:
+    """
+    Weakly connected component label of every node once `removed` edges
+    are gone. One vectorized labelling pass over the routing matrix.
+
+    Like `damaged_matrix`, the damage is a patch over thread-local scratch:
+    each thread keeps one copy of the matrix's column indices per graph,
+    points every dead pair back at its own source (a self-loop, which
+    connects nothing) for the pass and restores it afterwards, so no O(m)
+    array is built per call beyond scipy's own.
+    """
+    base = routing_matrix(cg)
+    pairs, new_w = damaged_pair_weights(cg, removed)
+    dead = pairs[np.isinf(new_w)]
+
+    local = cg._derived.setdefault("scratch", threading.local())
+    if getattr(local, "weak_indices", None) is None:
+        local.weak_indices = base.indices.copy()
+    indices = local.weak_indices
+    indices[dead] = np.searchsorted(base.indptr, dead, side="right") - 1
+    try:
+        # Float64 data is taken as is by csgraph, so only the indices differ.
+        patched = csr_matrix((base.data, indices, base.indptr), shape=base.shape)
+        _, labels = connected_components(patched, directed=True, connection="weak")
+    finally:
+        indices[dead] = base.indices[dead]
+    return labels
+
+
+def connected_mask(
+    cg: CompiledGraph,
+    pairs: np.ndarray,
+    removed: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    False for every pair whose ends lie in different weak components of
+    the damaged graph, i.e. that is certainly disconnected. True pairs may
+    still be unreachable one way and need a search to settle.
+    """
+    od = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    if removed is None or len(removed) == 0:
+        return np.ones(len(od), dtype=bool)
+    labels = damaged_weak_labels(cg, removed)
+    return labels[od[:, 0]] == labels[od[:, 1]]
+
+
+def _search_pairs(
+    cg: CompiledGraph,
+    od: np.ndarray,
+    removed: Optional[np.ndarray],
+) -> np.ndarray:
+    origins, inverse = np.unique(od[:, 0], return_inverse=True)
+    out = np.empty(len(od), dtype=np.float64)
+
+    for start, rows in distance_rows(cg, origins, removed):
+        sel = (inverse >= start) & (inverse < start + len(rows))
+        out[sel] = rows[inverse[sel] - start, od[sel, 1]]
+    return out
+
+
+def pair_distances(
+    cg: CompiledGraph,
+    pairs: Sequence[Tuple[int, int]],
+    removed: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Shortest-path length for each (origin, destination) node-index pair,
+    `inf` where the destination is unreachable.
+
+    Pairs are grouped by origin, so every distinct origin costs a single
+    single-source search no matter how many destinations it has. On a
+    damaged graph, pairs split across weak components are answered `inf`
+    straight from `connected_mask` and their origins are not searched.
+    """
+    if len(pairs) == 0:
+        return np.empty(0, dtype=np.float64)
+
+    od = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    live = connected_mask(cg, od, removed)
+    out = np.full(len(od), np.inf)
+    if live.any():
+        out[live] = _search_pairs(cg, od[live], removed)
+    return out
+
+
+def _pair_keys(cg: CompiledGraph) -> np.ndarray:
+    """
+    `source * n + target` of every pair; sorted, since pairs are.
+    """
+    if "pair_keys" not in cg._derived:
+        pair_starts, pair_targets, _ = _pair_structure(cg)
+        sources = cg.edge_sources[pair_starts[:-1]].astype(np.int64)
+        cg._derived["pair_keys"] = sources * cg.n_nodes + pair_targets
+    return cg._derived["pair_keys"]
+
+
+def pair_distances_with_paths(
+    cg: CompiledGraph,
+    pairs: Sequence[Tuple[int, int]],
+    removed: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """
+    Like `pair_distances`, but also returns the shortest path of every pair
+    as an array of pair indices (empty if unreachable or origin ==
+    destination), read off the predecessor tree of each origin's search.
+    """
+    od = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    out = np.full(len(od), np.inf)
+    paths: List[np.ndarray] = [np.empty(0, dtype=np.int64)] * len(od)
+    live = np.flatnonzero(connected_mask(cg, od, removed))
+    if live.size == 0:
+        return out, paths
+
+    keys = _pair_keys(cg)
+    origins, inverse = np.unique(od[live, 0], return_inverse=True)
+    with damaged_matrix(cg, removed) as matrix:
+        for start in range(0, len(origins), _SOURCE_CHUNK):
+            chunk = origins[start : start + _SOURCE_CHUNK]
+            rows, preds = dijkstra(
+                matrix, directed=True, indices=chunk, return_predecessors=True
+            )
+            rows = rows.reshape(len(chunk), -1)
+            preds = preds.reshape(len(chunk), -1)
+
+            in_chunk = (inverse >= start) & (inverse < start + len(chunk))
+            sel, r = live[in_chunk], inverse[in_chunk] - start
+            out[sel] = rows[r, od[sel, 1]]
+            found = np.isfinite(out[sel])
+            sel, r = sel[found], r[found]
+            if sel.size == 0:
+                continue
+
+            # Walk all predecessor chains of the chunk in lockstep.
+            steps = [od[sel, 1]]
+            while True:
+                cur = steps[-1]
+                nxt = np.where(cur >= 0, preds[r, np.maximum(cur, 0)], -1)
+                if (nxt < 0).all():
+                    break
+                steps.append(nxt)
+            chains = np.vstack(steps)[::-1]
+            for col, i in enumerate(sel.tolist()):
+                nodes = chains[:, col]
+                nodes = nodes[nodes >= 0]
+                paths[i] = np.searchsorted(keys, nodes[:-1] * cg.n_nodes + nodes[1:])
+    return out, paths
+
+
+def reverse_routing_matrix(cg: CompiledGraph) -> csr_matrix:
+    """
+    Transpose of `routing_matrix`, for searches *towards* a node.
+    """
+    if "reverse_routing_matrix" not in cg._derived:
+        cg._derived["reverse_routing_matrix"] = routing_matrix(cg).T.tocsr()
+    return cg._derived["reverse_routing_matrix"]
+
+
+def strong_component_labels(cg: CompiledGraph) -> np.ndarray:
+    """
+    Strongly connected component label of every node (intact graph).
+    """
+    if "scc_labels" not in cg._derived:
+        _, labels = connected_components(
+            routing_matrix(cg), directed=True, connection="strong"
+        )
+        cg._derived["scc_labels"] = labels.astype(np.int32)
+    return cg._derived["scc_labels"]
+
+
+def largest_strong_component(cg: CompiledGraph) -> np.ndarray:
+    """
+    Node indices of the largest strongly connected component.
+    """
+    if "largest_scc" not in cg._derived:
+        labels = strong_component_labels(cg)
+        biggest = np.argmax(np.bincount(labels))
+        cg._derived["largest_scc"] = np.flatnonzero(labels == biggest)
+    return cg._derived["largest_scc"]
+
+
+def astar_search(
+    cg: CompiledGraph,
+    source: int,
+    target: int,
+    blocked: Optional[Set[int]] = None,
+    heuristic: Optional[Callable[[int], float]] = None,
+) -> Tuple[float, int]:
+    """
+    Point-to-point A* over the CSR arrays, skipping edge indices in
+    `blocked`. `heuristic(node)` must be an admissible lower bound on the
+    distance from `node` to `target`; None means plain Dijkstra.
+
+    Returns (distance, number of settled nodes); distance is `inf` if
+    `target` is unreachable. Pure Python, meant for single queries where a
+    good heuristic prunes most of the graph.
+    """
+    if "astar_lists" not in cg._derived:
+        cg._derived["astar_lists"] = (
+            cg.indptr.tolist(),
+            cg.targets.tolist(),
+            cg.weights.tolist(),
+        )
+    indptr, targets, weights = cg._derived["astar_lists"]
+    blocked = blocked or set()
+    h = heuristic or (lambda n: 0.0)
+
+    best = {source: 0.0}
+    queue = [(h(source), 0.0, source)]
+    settled: Set[int] = set()
+    while queue:
+        _, dist, node = heapq.heappop(queue)
+        if node in settled:
+            continue
+        if node == target:
+            return dist, len(settled) + 1
+        settled.add(node)
+        for e in range(indptr[node], indptr[node + 1]):
+            if e in blocked:
+                continue
+            nbr = targets[e]
+            nd = dist + weights[e]
+            if nd < best.get(nbr, math.inf):
+                best[nbr] = nd
+                heapq.heappush(queue, (nd + h(nbr), nd, nbr))
+    return math.inf, len(settled)
@@ -4,10 +4,12 @@ from __future__ import annotations
 import os
 from typing import List, Optional
 
+import numpy as np
 import pandas as pd
 
-from .config import DEFAULT_CITIES, SCENARIOS
-from .experiments import run_single_scenario_for_city
+from .config import DEFAULT_CITIES, OD_PANEL_SEED, SCENARIOS
+from .experiments import compare_scenarios_for_city
+from .parallel import make_sweep_jobs, run_sweep_jobs
 
 
 def run_experiments(
@@ -18,12 +20,19 @@ def run_experiments(
     runs_per_severity: int = 3,
     output_csv: str = "multi_city_results.csv",
     seed: Optional[int] = None,
+    workers: Optional[int] = None,
 ):
     """
     Offline batch runner:
       - loops over cities × scenarios × severities
       - runs each combo multiple times
       - saves a single CSV for analysis.
+
+    Combos run on `workers` processes (see `parallel.run_sweep_jobs`) with
+    per-job seeds spawned from `seed`; the CSV does not depend on the
+    worker count. Every run draws its OD pairs from the city's panel for
+    `OD_PANEL_SEED`, whatever `seed` is, so repeated batches reuse one
+    persisted panel per city.
     """
     if cities is None:
         cities = DEFAULT_CITIES
@@ -31,21 +40,20 @@ def run_experiments(
         scenarios = SCENARIOS
     if severities is None:
         severities = [0.05, 0.1, 0.2, 0.3, 0.4]
+    if seed is None:
+        seed = int(np.random.SeedSequence().generate_state(1)[0])
+        print(f"Using seed={seed}")
 
-    dfs: List[pd.DataFrame] = []
-
-    for city in cities:
-        for scenario in scenarios:
-            for sev in severities:
-                df = run_single_scenario_for_city(
-                    city=city,
-                    scenario=scenario,
-                    severity=sev,
-                    n_pairs=n_pairs,
-                    runs=runs_per_severity,
-                    seed=seed,
-                )
-                dfs.append(df)
+    jobs = make_sweep_jobs(
+        cities,
+        scenarios,
+        severities,
+        n_pairs=n_pairs,
+        runs=runs_per_severity,
+        seed=seed,
+        panel_seed=OD_PANEL_SEED,
+    )
+    dfs: List[pd.DataFrame] = run_sweep_jobs(jobs, workers=workers)
 
     if not dfs:
         print("No data generated.")
@@ -57,5 +65,41 @@ def run_experiments(
     print(f"Saved results to {output_csv}")
 
 
+def run_scenario_comparison(
+    cities: Optional[List[str]] = None,
+    scenarios: Optional[List[str]] = None,
+    severities: Optional[List[float]] = None,
+    n_pairs: int = 100,
+    runs: int = 3,
+    seed: int = 42,
+    output_prefix: str = "scenario_comparison",
+):
+    """
+    Common-random-numbers comparison of all scenarios on each city (see
+    `experiments.compare_scenarios_for_city`). Saves
+    `<output_prefix>_levels.csv` and `<output_prefix>_differences.csv`.
+    """
+    cities = cities or DEFAULT_CITIES
+    scenarios = scenarios or SCENARIOS
+    severities = severities or [0.05, 0.1, 0.2, 0.3, 0.4]
+
+    levels: List[pd.DataFrame] = []
+    differences: List[pd.DataFrame] = []
+    for city in cities:
+        print(f"[compare] {city}")
+        lv, diff = compare_scenarios_for_city(
+            city, scenarios, severities, n_pairs=n_pairs, runs=runs, seed=seed
+        )
+        levels.append(lv)
+        differences.append(diff)
+
+    os.makedirs(os.path.dirname(output_prefix) or ".", exist_ok=True)
+    pd.concat(levels, ignore_index=True).to_csv(f"{output_prefix}_levels.csv", index=False)
+    pd.concat(differences, ignore_index=True).to_csv(
+        f"{output_prefix}_differences.csv", index=False
+    )
+    print(f"Saved {output_prefix}_levels.csv and {output_prefix}_differences.csv")
+
+
 if __name__ == "__main__":
     run_experiments()
\ No newline at end of file
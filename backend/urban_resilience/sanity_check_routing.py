@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import math
+import sys
+import time
+from typing import List
+
+import networkx as nx
+import numpy as np
+
+from backend.urban_resilience.config import DEFAULT_CITIES, N_PAIRS_PER_RUN
+from backend.urban_resilience.graph_loader import (
+    load_city_graph,
+    load_compiled_city_graph,
+)
+from backend.urban_resilience.landmarks import alt_heuristic, geo_heuristic, get_landmarks
+from backend.urban_resilience.edge_selection import select_edges_for_scenario
+from backend.urban_resilience.compiled_graph import as_compiled
+from backend.urban_resilience.routing import astar_search, pair_distances
+from backend.urban_resilience.simulation import _weight_attr, sample_od_pairs
+
+
+def _nx_ratios(G, G_after, pairs, weight) -> List[float]:
+    cg = as_compiled(G)
+    pos = {nid: i for i, nid in enumerate(cg.node_ids.tolist())}
+    ratios = []
+    for u, v in pairs:
+        h_target = geo_heuristic(cg, pos[v])
+
+        def heuristic(a, _b):
+            return h_target(pos[a])
+
+        base = nx.astar_path_length(G, u, v, heuristic=heuristic, weight=weight)
+        try:
+            dmg = nx.astar_path_length(G_after, u, v, heuristic=heuristic, weight=weight)
+        except nx.NetworkXNoPath:
+            dmg = np.inf
+        ratios.append(dmg / base)
+    return ratios
+
+
+def benchmark_city(city: str, severity: float = 0.1) -> None:
+    print(f"\n=== {city} ===")
+    G = load_city_graph(city, cache_dir="graphs")
+    edge_ids = select_edges_for_scenario(G, "Random Failure", severity, seed=7)
+    pairs = sample_od_pairs(G, n_pairs=N_PAIRS_PER_RUN, seed=123)
+
+    # Reference: the original NetworkX A* path (copy + remove + 2 searches/pair)
+    t0 = time.perf_counter()
+    G_after = G.copy()
+    G_after.remove_edges_from(edge_ids)
+    ref = _nx_ratios(G, G_after, pairs, _weight_attr(G))
+    t_nx = time.perf_counter() - t0
+
+    cg = as_compiled(G)
+    removed = np.unique(cg.edge_index(edge_ids))
+    idx_pairs = cg.node_index(pairs).reshape(-1, 2)
+    pair_distances(cg, idx_pairs[:1])  # build the shared routing matrix once
+
+    t0 = time.perf_counter()
+    base = pair_distances(cg, idx_pairs)
+    dmg = pair_distances(cg, idx_pairs, removed=removed)
+    fast = (dmg / base).tolist()
+    t_csr = time.perf_counter() - t0
+
+    assert ref == fast, "CSR engine ratios differ from NetworkX A*"
+
+    n = len(pairs)
+    print(f"  pairs={n}, removed edges={len(removed)}")
+    print(f"  NetworkX A*     : {1000 * t_nx / n:9.2f} ms/pair")
+    print(f"  CSR Dijkstra    : {1000 * t_csr / n:9.2f} ms/pair")
+    print(f"  speedup         : {t_nx / max(t_csr, 1e-9):9.1f}x  (ratios match)")
+
+
+def compare_heuristics(city: str, n_queries: int = N_PAIRS_PER_RUN) -> None:
+    """
+    Settled-node counts of point-to-point A* with the old degree-based bound,
+    the metres / max-speed bound and the landmark (ALT) bound.
+    """
+    print(f"\n--- A* heuristics: {city} ---")
+    cg = load_compiled_city_graph(city, cache_dir="graphs")
+    pairs = sample_od_pairs(cg, n_pairs=n_queries, seed=123)
+    exact = pair_distances(cg, pairs)
+
+    t0 = time.perf_counter()
+    lm = get_landmarks(cg)
+    print(f"  landmarks ready in {time.perf_counter() - t0:.2f} s ({len(lm.nodes)} landmarks)")
+
+    def degrees(target: int):
+        tx, ty = float(cg.x[target]), float(cg.y[target])
+        return lambda v: math.hypot(float(cg.x[v]) - tx, float(cg.y[v]) - ty)
+
+    heuristics = {
+        "none (Dijkstra)": lambda t: None,
+        "degrees (old)": degrees,
+        "metres / max speed": lambda t: geo_heuristic(cg, t),
+        "ALT (landmarks)": lambda t: alt_heuristic(lm, t),
+    }
+    for label, make_h in heuristics.items():
+        settled = 0
+        t0 = time.perf_counter()
+        for (u, v), d in zip(pairs, exact.tolist()):
+            dist, n = astar_search(cg, u, v, heuristic=make_h(v))
+            assert math.isclose(dist, d, rel_tol=1e-9), (label, dist, d)
+            settled += n
+        elapsed = time.perf_counter() - t0
+        print(
+            f"  {label:20s}: {settled / len(pairs):10.1f} settled/query  "
+            f"{1000 * elapsed / len(pairs):8.2f} ms/query"
+        )
+
+
+def main() -> None:
+    cities = sys.argv[1:] or DEFAULT_CITIES
+    for city in cities:
+        benchmark_city(city)
+        compare_heuristics(city)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import sys
+from typing import Dict, List
+
+import numpy as np
+
+from backend.urban_resilience.compiled_graph import _ARRAY_FIELDS
+from backend.urban_resilience.config import DEFAULT_CITIES
+from backend.urban_resilience.graph_loader import _safe_name, load_compiled_city_graph
+
+
+def _memory_kb(bundle_dir: str) -> Dict[str, int]:
+    """
+    Memory of the current process from /proc/self/smaps (Linux only):
+    total Rss / Pss, plus the Pss of mappings backed by the graph bundle.
+    """
+    out = {"Rss": 0, "Pss": 0, "Bundle_Pss": 0}
+    in_bundle = False
+    with open("/proc/self/smaps", "r", encoding="utf-8") as fh:
+        for line in fh:
+            parts = line.split()
+            if not parts:
+                continue
+            if not parts[0].endswith(":"):
+                # Mapping header: "addr perms offset dev inode [path]"
+                in_bundle = len(parts) >= 6 and parts[5].startswith(bundle_dir)
+                continue
+            if parts[0] in ("Rss:", "Pss:") and parts[1].isdigit():
+                out[parts[0][:-1]] += int(parts[1])
+                if parts[0] == "Pss:" and in_bundle:
+                    out["Bundle_Pss"] += int(parts[1])
+    return out
+
+
+def _worker(city: str, mmap: bool, bundle_dir: str, barrier, queue) -> None:
+    cg = load_compiled_city_graph(city, cache_dir="graphs", mmap=mmap)
+    # Touch every page so the whole bundle is resident in this process.
+    for f in _ARRAY_FIELDS:
+        arr = getattr(cg, f)
+        if arr.dtype.kind in "iuf":
+            float(np.sum(arr, dtype=np.float64))
+        else:
+            len(arr.tolist())
+    barrier.wait()          # every worker is alive and fully loaded
+    queue.put(_memory_kb(bundle_dir))
+    barrier.wait()          # keep mappings alive until all have reported
+
+
+def measure(
+    city: str, n_workers: int, mmap: bool, bundle_dir: str
+) -> List[Dict[str, int]]:
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(n_workers)
+    queue = ctx.Queue()
+    procs = [
+        ctx.Process(target=_worker, args=(city, mmap, bundle_dir, barrier, queue))
+        for _ in range(n_workers)
+    ]
+    for p in procs:
+        p.start()
+    stats = [queue.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return stats
+
+
+def main() -> None:
+    city = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CITIES[0]
+    cg = load_compiled_city_graph(city, cache_dir="graphs", mmap=True)
+    bundle_dir = os.path.abspath(os.path.join("graphs", f"{_safe_name(city)}.cgraph"))
+    bundle_mb = cg.nbytes / 2**20
+    print(f"City = {city}, compiled bundle = {bundle_mb:.1f} MB")
+
+    for mmap in (False, True):
+        print(f"\n--- mmap={mmap} ---")
+        for n_workers in (1, 2, 4, 8):
+            stats = measure(city, n_workers, mmap, bundle_dir)
+            rss = sum(s["Rss"] for s in stats) / 1024
+            pss = sum(s["Pss"] for s in stats) / 1024
+            bundle_pss = sum(s["Bundle_Pss"] for s in stats) / 1024
+            print(
+                f"  workers={n_workers}: sum Rss={rss:8.1f} MB  "
+                f"sum Pss={pss:8.1f} MB  bundle Pss={bundle_pss:8.1f} MB"
+            )
+
+            if mmap:
+                # Pss splits shared pages between the processes mapping them,
+                # so the bundle must add up to ~one copy however many workers.
+                assert bundle_pss <= 1.1 * bundle_mb + 1.0, (
+                    f"bundle memory grows with worker count: {bundle_pss:.1f} MB"
+                )
+
+    print("\n[OK] Memory-mapped bundles are shared across worker processes.")
+
+
+if __name__ == "__main__":
+    main()
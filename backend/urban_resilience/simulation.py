@@ -2,11 +2,28 @@
 
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Iterable, List, Tuple, Optional
+from typing import Iterable, List, Optional, Sequence, Tuple
 
 import numpy as np
 import networkx as nx
 import math
+import time
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.stats import norm, t as student_t
+
+from .artifacts import get_artifact
+from .compiled_graph import CompiledGraph, as_compiled
+from .routing import (
+    _edge_pair,
+    distance_rows,
+    largest_strong_component,
+    pair_distances,
+    pair_distances_with_paths,
+)
+from .landmarks import alt_pair_distances
+from .contraction import ch_damaged_distances, get_contraction_hierarchy
+from .od_panel import ODPanel
 
 EdgeId = Tuple[int, int, int]
 
@@ -23,47 +40,118 @@ class SimulationResult:
     n_pairs: int
 
 
-def _largest_component(G: nx.Graph) -> nx.Graph:
+def _compiled_adjacency(cg: CompiledGraph) -> csr_matrix:
+    """
+    Unweighted sparse adjacency matrix of a CompiledGraph (cached on it).
+    """
+    if "adjacency" not in cg._derived:
+        data = np.ones(cg.n_edges, dtype=np.int8)
+        cg._derived["adjacency"] = csr_matrix(
+            (data, cg.targets, cg.indptr), shape=(cg.n_nodes, cg.n_nodes)
+        )
+    return cg._derived["adjacency"]
+
+
+def _compiled_largest_component(cg: CompiledGraph) -> np.ndarray:
     """
-    Keep the largest connected component (weak for directed graphs).
+    Node indices of the largest weakly connected component of a CompiledGraph.
     """
-    if isinstance(G, (nx.DiGraph, nx.MultiDiGraph)):
-        comp = max(nx.weakly_connected_components(G), key=len)
-        return G.subgraph(comp).copy()
-    comp = max(nx.connected_components(G), key=len)
-    return G.subgraph(comp).copy()
+    if "largest_wcc" not in cg._derived:
+        _, labels = connected_components(
+            _compiled_adjacency(cg), directed=True, connection="weak"
+        )
+        biggest = np.argmax(np.bincount(labels))
+        cg._derived["largest_wcc"] = np.flatnonzero(labels == biggest)
+    return cg._derived["largest_wcc"]
 
 
 def sample_od_pairs(
-    G: nx.MultiDiGraph,
+    G: nx.MultiDiGraph | CompiledGraph,
     n_pairs: int,
     seed: Optional[int] = None,
 ):
     """
-    Sample origin–destination node pairs that are connected in the largest component.
+    Sample origin–destination node pairs inside the largest strongly
+    connected component, so every pair is connected by construction.
+
+    Both ends are drawn in one vectorized step from the graph's precomputed
+    SCC labels (see `routing.largest_strong_component`): no path checks and
+    no subgraph copies. For a CompiledGraph the pairs are node *indices*,
+    for a NetworkX graph they are node ids.
     """
+    cg = as_compiled(G)
+    nodes = largest_strong_component(cg)
+    k = len(nodes)
+    if k < 2:
+        raise RuntimeError("Could not sample any connected OD pairs.")
+
     rng = np.random.default_rng(seed)
-    H = _largest_component(G)
-    nodes = list(H.nodes())
-    pairs: List[Tuple[int, int]] = []
-    attempts = 0
-    max_attempts = n_pairs * 20
-
-    while len(pairs) < n_pairs and attempts < max_attempts:
-        u, v = rng.choice(nodes, size=2, replace=False)
-        attempts += 1
-        if nx.has_path(H, u, v):
-            pairs.append((u, v))
+    first = rng.integers(0, k, size=n_pairs)
+    # A non-zero offset guarantees origin != destination.
+    second = (first + rng.integers(1, k, size=n_pairs)) % k
+    pairs = np.column_stack([nodes[first], nodes[second]])
+
+    if not isinstance(G, CompiledGraph):
+        pairs = cg.node_ids[pairs]
+    return [(u, v) for u, v in pairs.tolist()]
+
+
+def sample_od_batch(
+    G: nx.MultiDiGraph | CompiledGraph,
+    n_origins: int,
+    dests_per_origin: int,
+    seed: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Batched OD sampling: draw `n_origins` origins from the largest component
+    and `dests_per_origin` destinations for each one.
+
+    Destinations are drawn only among nodes the origin actually reaches, read
+    off the same single-source search that yields the baseline distances, so
+    no per-pair path checks are needed.
+
+    Returns (pairs, baseline): an (n, 2) array of node *indices* grouped by
+    origin, and the undamaged shortest-path length of every pair.
+    """
+    if n_origins < 1 or dests_per_origin < 1:
+        raise ValueError(
+            f"need at least one origin and destination, got {n_origins} x {dests_per_origin}"
+        )
+    cg = as_compiled(G)
+    rng = np.random.default_rng(seed)
+    nodes = _compiled_largest_component(cg)
+    origins = rng.choice(nodes, size=min(n_origins, len(nodes)), replace=False)
+
+    pairs: List[np.ndarray] = []
+    baseline: List[np.ndarray] = []
+    for start, rows in distance_rows(cg, origins):
+        for i, row in enumerate(rows):
+            origin = origins[start + i]
+            reachable = np.flatnonzero(np.isfinite(row))
+            reachable = reachable[reachable != origin]
+            if reachable.size == 0:
+                continue
+            dests = rng.choice(
+                reachable,
+                size=dests_per_origin,
+                replace=reachable.size < dests_per_origin,
+            )
+            pairs.append(np.column_stack([np.full(dests.size, origin), dests]))
+            baseline.append(row[dests])
 
     if not pairs:
         raise RuntimeError("Could not sample any connected OD pairs.")
-    return pairs
+    return np.concatenate(pairs), np.concatenate(baseline)
 
 
 def _weight_attr(G: nx.MultiDiGraph) -> str:
     """
     Decide whether to use 'travel_time' or 'length' as edge weight.
     """
+    return get_artifact(G, "weight_attr", lambda: _detect_weight_attr(G))
+
+
+def _detect_weight_attr(G: nx.MultiDiGraph) -> str:
     for _, _, data in G.edges(data=True):
         if "travel_time" in data:
             return "travel_time"
@@ -73,96 +161,420 @@ def _weight_attr(G: nx.MultiDiGraph) -> str:
     return "length"
 
 
-def _geo_heuristic(G: nx.MultiDiGraph):
+def _summarise_ratios(
+    ratios: List[float],
+    disconnected: int,
+    n_removed: int,
+    n_pairs: int,
+    penalty_ratio: float,
+):
+    if not ratios:
+        return {
+            "avg_ratio": penalty_ratio,
+            "median_ratio": penalty_ratio,
+            "pct_disconnected": 100.0,
+            "n_removed_edges": n_removed,
+            "n_pairs": n_pairs,
+        }
+
+    return {
+        "avg_ratio": float(np.mean(ratios)),
+        "median_ratio": float(np.median(ratios)),
+        "pct_disconnected": 100.0 * disconnected / n_pairs,
+        "n_removed_edges": n_removed,
+        "n_pairs": n_pairs,
+    }
+
+
+def mean_ci(values: Sequence[float], confidence: float = 0.95) -> Tuple[float, float]:
+    """
+    (mean, half-width) of a Student-t confidence interval for the mean of
+    `values`. The half-width is infinite with fewer than two values.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    if x.size == 0:
+        return math.nan, math.inf
+    mean = float(x.mean())
+    if x.size < 2:
+        return mean, math.inf
+    sem = float(x.std(ddof=1)) / math.sqrt(x.size)
+    return mean, float(student_t.ppf(0.5 + confidence / 2, x.size - 1) * sem)
+
+
+def proportion_ci(
+    k: int, n: int, confidence: float = 0.95
+) -> Tuple[float, float]:
+    """
+    (low, high) Wilson score interval for a proportion of `k` out of `n`.
+    Unlike the normal approximation it stays wide at k = 0 or k = n.
+    """
+    if n == 0:
+        return 0.0, 1.0
+    z = float(norm.ppf(0.5 + confidence / 2))
+    p = k / n
+    denom = 1.0 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    low = 0.0 if k == 0 else max(0.0, centre - half)
+    high = 1.0 if k == n else min(1.0, centre + half)
+    return low, high
+
+
+def _shock_metrics(
+    baseline: np.ndarray,
+    damaged: np.ndarray,
+    n_removed: int,
+    penalty_ratio: float,
+):
+    ratios: List[float] = []
+    disconnected = 0
+
+    for base, dmg in zip(baseline.tolist(), damaged.tolist()):
+        if not math.isfinite(base):
+            # Should be rare, since we sampled from the largest component
+            continue
+        if math.isfinite(dmg):
+            ratios.append(dmg / base)
+        else:
+            disconnected += 1
+            ratios.append(penalty_ratio)
+
+    return _summarise_ratios(ratios, disconnected, n_removed, len(baseline), penalty_ratio)
+
+
+def _probe_pairs(
+    cg: CompiledGraph,
+    pairs: np.ndarray,
+    removed: np.ndarray,
+    engine: str,
+    ch=None,
+    baseline: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (baseline, damaged) distances of `pairs` with the given engine; a known
+    `baseline` is reused and only the damaged searches are run.
+    """
+    damaged = None
+    if baseline is None:
+        if ch is not None:
+            baseline, damaged = ch_damaged_distances(cg, ch, pairs, removed)
+        elif engine == "alt":
+            baseline = alt_pair_distances(cg, pairs)
+        else:
+            baseline = pair_distances(cg, pairs)
+
+    if damaged is None:
+        if engine == "alt":
+            damaged = alt_pair_distances(cg, pairs, removed=removed)
+        else:
+            damaged = pair_distances(cg, pairs, removed=removed)
+    return baseline, damaged
+
+
+def pair_ratios(baseline: np.ndarray, damaged: np.ndarray) -> np.ndarray:
+    """
+    Per-pair damaged / baseline travel-time ratio: inf for pairs the damage
+    disconnects, NaN for pairs without a finite baseline (which
+    `_shock_metrics` skips).
+    """
+    ratios = np.full(len(baseline), np.nan)
+    valid = np.isfinite(baseline)
+    ratios[valid] = damaged[valid] / baseline[valid]
+    return ratios
+
+
+def _shock_intervals(
+    baseline: np.ndarray,
+    damaged: np.ndarray,
+    penalty_ratio: float,
+    confidence: float,
+) -> Tuple[Optional[List[float]], List[float]]:
     """
-    Build an admissible heuristic function for A* based on straight-line
-    distance between node coordinates. Keeps paths optimal but can prune
-    some search.
+    Confidence intervals ([low, high]) of `avg_ratio` and `pct_disconnected`
+    as `_shock_metrics` computes them from the same distances. The
+    `avg_ratio` interval is None until two pairs have a ratio (it would be
+    unbounded, which JSON cannot carry).
     """
+    raw = pair_ratios(baseline, damaged)
+    valid = ~np.isnan(raw)
+    lost = np.isinf(raw)
+    mean, half = mean_ci(np.where(lost, penalty_ratio, raw)[valid], confidence)
+    low, high = proportion_ci(int(lost.sum()), len(baseline), confidence)
+    ratio_ci = [mean - half, mean + half] if math.isfinite(mean + half) else None
+    return ratio_ci, [100.0 * low, 100.0 * high]
 
-    def h(u: int, v: int) -> float:
-        ux = G.nodes[u].get("x")
-        uy = G.nodes[u].get("y")
-        vx = G.nodes[v].get("x")
-        vy = G.nodes[v].get("y")
-        if ux is None or uy is None or vx is None or vy is None:
-            return 0.0
-        dx = ux - vx
-        dy = uy - vy
-        # Euclidean distance in degrees; we're only using it as a lower bound
-        return math.hypot(dx, dy)
 
-    return h
+def _simulate_sequential(
+    cg: CompiledGraph,
+    removed: np.ndarray,
+    batch_size: int,
+    penalty_ratio: float,
+    seed: Optional[int],
+    engine: str,
+    ch,
+    od_panel: Optional[ODPanel],
+    target_ratio_ci: Optional[float],
+    target_disconnected_ci: Optional[float],
+    max_pairs: int,
+    time_budget: Optional[float],
+    confidence: float,
+) -> dict:
+    """
+    Sequential mode of `simulate_single_shock`: probe OD batches until the
+    CI targets are met or a budget runs out.
+    """
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    batch_size = max(1, batch_size)
+    limit = max_pairs if od_panel is None else min(max_pairs, len(od_panel.pairs))
+    baselines: List[np.ndarray] = []
+    damages: List[np.ndarray] = []
+    n_used = 0
+
+    while True:
+        size = min(batch_size, limit - n_used)
+        if od_panel is not None:
+            batch = od_panel.take(n_used, n_used + size)
+            pairs, base = batch.pairs, batch.baseline
+        else:
+            batch_seed = int(rng.integers(0, 2**32))
+            pairs = np.asarray(sample_od_pairs(cg, n_pairs=size, seed=batch_seed))
+            base = None
+        base, dmg = _probe_pairs(cg, pairs, removed, engine, ch, base)
+        baselines.append(base)
+        damages.append(dmg)
+        n_used += len(pairs)
+
+        baseline = np.concatenate(baselines)
+        damaged = np.concatenate(damages)
+        ratio_ci, disconnected_ci = _shock_intervals(
+            baseline, damaged, penalty_ratio, confidence
+        )
+        converged = (
+            target_ratio_ci is None
+            or ratio_ci is not None
+            and (ratio_ci[1] - ratio_ci[0]) / 2 <= target_ratio_ci
+        ) and (
+            target_disconnected_ci is None
+            or (disconnected_ci[1] - disconnected_ci[0]) / 2 <= target_disconnected_ci
+        )
+        if converged:
+            stop_reason = "converged"
+        elif n_used >= limit or not len(pairs):
+            stop_reason = "max_pairs"
+        elif time_budget is not None and time.perf_counter() - started >= time_budget:
+            stop_reason = "time_budget"
+        else:
+            continue
+
+        metrics = _shock_metrics(baseline, damaged, int(removed.size), penalty_ratio)
+        metrics.update(
+            avg_ratio_ci=ratio_ci,
+            pct_disconnected_ci=disconnected_ci,
+            stop_reason=stop_reason,
+        )
+        return metrics
 
 
 def simulate_single_shock(
-    G: nx.MultiDiGraph,
+    G: nx.MultiDiGraph | CompiledGraph,
     edge_ids_to_remove: Iterable[EdgeId],
     n_pairs: int = 20,
     penalty_ratio: float = 5.0,
     seed: Optional[int] = None,
+    n_origins: Optional[int] = None,
+    engine: str = "dijkstra",
+    od_panel: Optional[ODPanel] = None,
+    target_ratio_ci: Optional[float] = None,
+    target_disconnected_ci: Optional[float] = None,
+    max_pairs: int = 2000,
+    time_budget: Optional[float] = None,
+    confidence: float = 0.95,
 ):
     """
-    Remove specified edges, then compare A* travel times before vs after on OD pairs.
+    Remove specified edges, then compare shortest travel times before vs after
+    on sampled OD pairs.
 
-    Uses an admissible geometric heuristic so A* still returns exact shortest paths.
+    Searches run on the CSR arrays of the compiled graph (a NetworkX graph is
+    compiled once and memoised) with `scipy.sparse.csgraph.dijkstra`, so
+    distances are exact and no per-edge Python work is done. Removed edges
+    are masked out with infinite weight rather than deleted from a copy.
+
+    With `n_origins` set, OD pairs are drawn in batched mode (see
+    `sample_od_batch`): `n_origins` origins with about `n_pairs / n_origins`
+    destinations each, so the whole probe costs one baseline and one
+    damaged single-source search per origin. This makes thousands of pairs
+    per call affordable.
+
+    `engine="alt"` answers the sampled pairs with point-to-point A* guided by
+    precomputed landmarks (see `landmarks.get_landmarks`) instead of full
+    single-source searches; it pays off on large cities with few pairs.
+
+    `engine="ch"` answers baseline queries from the city's contraction
+    hierarchy (built offline, see `precompute.py`) and reuses the baseline
+    for every pair whose shortest path avoids the damage; only the other
+    pairs run the masked search. Without a prebuilt index it behaves like
+    `engine="dijkstra"`.
+
+    With `od_panel` (see `od_panel.get_od_panel`) the panel's pairs and
+    precomputed baseline distances are used as-is and `n_pairs`, `seed` and
+    `n_origins` are ignored: only the damaged searches are run.
+
+    Sequential mode: with `target_ratio_ci` (CI half-width of `avg_ratio`)
+    and/or `target_disconnected_ci` (CI half-width of `pct_disconnected`,
+    in percentage points) set, OD pairs are added in batches of `n_pairs`
+    until every given target is met at `confidence`, `max_pairs` pairs have
+    been used or `time_budget` seconds have passed (`n_origins` is ignored;
+    an `od_panel` is consumed batch by batch). The result then also has
+    "avg_ratio_ci" and "pct_disconnected_ci" ([low, high]; "avg_ratio_ci"
+    is None when fewer than two pairs have a ratio) and "stop_reason"
+    ("converged", "max_pairs" or "time_budget"); "n_pairs" is the number of
+    pairs used. Targets and `time_budget` must be positive and `max_pairs`
+    at least 1 (ValueError otherwise).
     """
-    G_before = G
-    G_after = G.copy()
+    if engine not in ("dijkstra", "alt", "ch"):
+        raise ValueError(f"Unknown engine: {engine}")
+
+    cg = as_compiled(G)
+    ch = get_contraction_hierarchy(cg) if engine == "ch" else None
+    removed = np.unique(cg.edge_index(edge_ids_to_remove))
+    n_removed = int(removed.size)
 
-    n_removed = 0
-    for u, v, k in edge_ids_to_remove:
-        if G_after.has_edge(u, v, k):
-            G_after.remove_edge(u, v, k)
-            n_removed += 1
+    if od_panel is not None and od_panel.fingerprint != cg.fingerprint:
+        raise ValueError("OD panel was built for a different graph.")
 
     if n_removed == 0:
-        return {
+        metrics = {
             "avg_ratio": 1.0,
             "median_ratio": 1.0,
             "pct_disconnected": 0.0,
             "n_removed_edges": 0,
             "n_pairs": 0,
         }
+        if target_ratio_ci is not None or target_disconnected_ci is not None:
+            metrics.update(
+                avg_ratio_ci=[1.0, 1.0],
+                pct_disconnected_ci=[0.0, 0.0],
+                stop_reason="converged",
+            )
+        return metrics
 
-    pairs = sample_od_pairs(G_before, n_pairs=n_pairs, seed=seed)
-    weight = _weight_attr(G_before)
-    heuristic = _geo_heuristic(G_before)
+    if target_ratio_ci is not None or target_disconnected_ci is not None:
+        for name, value in (
+            ("target_ratio_ci", target_ratio_ci),
+            ("target_disconnected_ci", target_disconnected_ci),
+            ("time_budget", time_budget),
+        ):
+            if value is not None and not value > 0:
+                raise ValueError(f"{name} must be positive, got {value}")
+        if max_pairs < 1:
+            raise ValueError(f"max_pairs must be at least 1, got {max_pairs}")
+        return _simulate_sequential(
+            cg,
+            removed,
+            batch_size=n_pairs,
+            penalty_ratio=penalty_ratio,
+            seed=seed,
+            engine=engine,
+            ch=ch,
+            od_panel=od_panel,
+            target_ratio_ci=target_ratio_ci,
+            target_disconnected_ci=target_disconnected_ci,
+            max_pairs=max_pairs,
+            time_budget=time_budget,
+            confidence=confidence,
+        )
 
-    ratios: List[float] = []
-    disconnected = 0
+    if od_panel is not None:
+        pairs, baseline = od_panel.pairs, od_panel.baseline
+    elif n_origins:
+        pairs, baseline = sample_od_batch(
+            cg, n_origins, max(1, math.ceil(n_pairs / n_origins)), seed=seed
+        )
+    else:
+        pairs = np.asarray(sample_od_pairs(cg, n_pairs=n_pairs, seed=seed))
+        baseline = None
 
-    for u, v in pairs:
-        try:
-            baseline = nx.astar_path_length(
-                G_before, u, v, heuristic=heuristic, weight=weight
-            )
-        except nx.NetworkXNoPath:
-            # Should be rare, since we sampled from the largest component
-            continue
+    baseline, damaged = _probe_pairs(cg, pairs, removed, engine, ch, baseline)
+    return _shock_metrics(baseline, damaged, n_removed, penalty_ratio)
 
-        try:
-            damaged = nx.astar_path_length(
-                G_after, u, v, heuristic=heuristic, weight=weight
-            )
-            ratios.append(damaged / baseline)
-        except nx.NetworkXNoPath:
-            disconnected += 1
-            ratios.append(penalty_ratio)
 
-    if not ratios:
-        return {
-            "avg_ratio": penalty_ratio,
-            "median_ratio": penalty_ratio,
-            "pct_disconnected": 100.0,
-            "n_removed_edges": n_removed,
-            "n_pairs": len(pairs),
+def simulate_severity_sweep(
+    G: nx.MultiDiGraph | CompiledGraph,
+    order: np.ndarray,
+    unit_ends: np.ndarray,
+    severities: Sequence[float],
+    n_pairs: int = 20,
+    penalty_ratio: float = 5.0,
+    seed: Optional[int] = None,
+    od_panel: Optional[ODPanel] = None,
+    with_pair_ratios: bool = False,
+) -> List[dict]:
+    """
+    `simulate_single_shock` for several severities of one scenario at once.
+
+    `order` / `unit_ends` is the scenario's removal ordering (see
+    `edge_selection.scenario_removal_order`); severity `s` removes the
+    same prefix `select_edges_for_scenario` would. Since the removed sets
+    are nested, severities are applied in increasing order and each OD
+    pair is re-searched only if its current shortest path (kept from the
+    previous search's predecessor tree) uses a pair touched by the newly
+    removed edges. Removing edges never shortens a path, so untouched
+    pairs keep their distance.
+
+    Returns one metrics dict per severity, in the order given, each with a
+    "severity" key (and, with `with_pair_ratios`, the "pair_ratios" array of
+    `pair_ratios` for the OD pairs in order).
+    """
+    cg = as_compiled(G)
+    order = np.asarray(order, dtype=np.int64)
+    n_units = len(unit_ends)
+    edge_pair = _edge_pair(cg)
+    if n_units == 0:
+        untouched = {
+            "avg_ratio": 1.0,
+            "median_ratio": 1.0,
+            "pct_disconnected": 0.0,
+            "n_removed_edges": 0,
+            "n_pairs": 0,
         }
+        if with_pair_ratios:
+            n = len(od_panel.pairs) if od_panel is not None else n_pairs
+            untouched["pair_ratios"] = np.ones(n)
+        return [{"severity": sev, **untouched} for sev in severities]
 
-    return {
-        "avg_ratio": float(np.mean(ratios)),
-        "median_ratio": float(np.median(ratios)),
-        "pct_disconnected": 100.0 * disconnected / len(pairs),
-        "n_removed_edges": n_removed,
-        "n_pairs": len(pairs),
-    }
\ No newline at end of file
+    if od_panel is not None:
+        if od_panel.fingerprint != cg.fingerprint:
+            raise ValueError("OD panel was built for a different graph.")
+        pairs = od_panel.pairs
+    else:
+        pairs = np.asarray(sample_od_pairs(cg, n_pairs=n_pairs, seed=seed))
+    baseline, paths = pair_distances_with_paths(cg, pairs)
+    current = baseline.copy()
+
+    results = {}
+    done = 0
+    for sev in sorted(set(severities)):
+        n_removed = int(unit_ends[max(1, int(n_units * sev)) - 1])
+        touched = np.zeros(len(edge_pair) and int(edge_pair[-1]) + 1, dtype=bool)
+        touched[edge_pair[order[done:n_removed]]] = True
+        owner = np.repeat(np.arange(len(paths)), [len(p) for p in paths])
+        hit = owner[touched[np.concatenate(paths)]] if len(owner) else owner
+        stale = np.zeros(len(pairs), dtype=bool)
+        stale[hit] = True
+        stale &= np.isfinite(current)
+        done = n_removed
+        if stale.any():
+            idx = np.flatnonzero(stale)
+            dists, new_paths = pair_distances_with_paths(
+                cg, pairs[idx], removed=order[:n_removed]
+            )
+            current[idx] = dists
+            for i, path in zip(idx.tolist(), new_paths):
+                paths[i] = path
+
+        results[sev] = _shock_metrics(baseline, current, n_removed, penalty_ratio)
+        if with_pair_ratios:
+            results[sev]["pair_ratios"] = pair_ratios(baseline, current)
+
+    return [{"severity": sev, **results[sev]} for sev in severities]
@@ -7,6 +7,8 @@ const SCENARIO_DESCRIPTIONS = {
     "Major highway segments are flooded and taken out of service.",
   "Targeted Attack (Top k%)":
     "An attack knocks out the most central backbone links in the network.",
+  "Adaptive Targeted Attack":
+    "An attacker removes the most central links in rounds, re-targeting the new backbone after each one.",
   "Random Failure":
     "Random road segments fail across the network.",
 };